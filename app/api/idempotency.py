@@ -0,0 +1,172 @@
+"""
+Idempotency-Key support for write endpoints
+
+A POST to one of IDEMPOTENT_ENDPOINTS carrying an Idempotency-Key header
+claims the key with a unique insert before the handler runs:
+- first request: runs normally; the response is stored (5xx responses are
+  not stored, so the client can retry them)
+- repeat with the same body: the stored response is replayed
+  (Idempotent-Replayed: true), the handler does not run again
+- repeat while the first is still running: 409, until it finishes or fails
+  (a claim older than IDEMPOTENCY_IN_PROGRESS_TIMEOUT_MINUTES is treated as
+  left by a crashed process and taken over)
+- same key with a different body: 422
+Keys are scoped by the body's user_id, so two users picking the same key never
+see each other's responses. They expire after IDEMPOTENCY_TTL_HOURS.
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import IntegrityError
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import IdempotencyKey
+
+IDEMPOTENT_ENDPOINTS = {
+    "/api/actions/queue",
+    "/api/actions/queue-bulk",
+    "/api/prospects/add",
+    "/api/campaigns/create",
+}
+
+HEADER = "idempotency-key"
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        key = request.headers.get(HEADER)
+        if request.method != "POST" or not key or request.url.path not in IDEMPOTENT_ENDPOINTS:
+            return await call_next(request)
+
+        if len(key) > 255:
+            return JSONResponse({"detail": "Idempotency-Key too long (max 255)"}, status_code=400)
+
+        endpoint = f"POST {request.url.path}"
+        request_body = await request.body()
+        request_hash = hashlib.sha256(request_body).hexdigest()
+        scope = (_user_id(request_body), key, endpoint)
+
+        existing = await asyncio.to_thread(_claim, *scope, request_hash)
+        if existing is not None:
+            return existing
+
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        except Exception:
+            await asyncio.to_thread(_release, *scope)
+            raise
+
+        if response.status_code >= 500:
+            await asyncio.to_thread(_release, *scope)
+        else:
+            await asyncio.to_thread(_store, *scope, response.status_code, body)
+
+        return Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            media_type=response.media_type
+        )
+
+
+def _user_id(body: bytes) -> str:
+    """user_id of a JSON request body ("" if there is none - the handler rejects such bodies anyway)"""
+    try:
+        user_id = json.loads(body).get("user_id")
+    except (ValueError, AttributeError):
+        return ""
+    return user_id if isinstance(user_id, str) else ""
+
+
+def _claim(user_id: str, key: str, endpoint: str, request_hash: str):
+    """Claim the key (returns None), or the response to send instead"""
+    db = SessionLocal()
+    try:
+        for _ in range(2):
+            db.add(IdempotencyKey(user_id=user_id, key=key, endpoint=endpoint, request_hash=request_hash,
+                                  status="in_progress"))
+            try:
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+
+            record = db.query(IdempotencyKey).filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.key == key,
+                IdempotencyKey.endpoint == endpoint
+            ).first()
+            if record is None:
+                continue  # Released in the meantime - claim again
+
+            age = datetime.now(timezone.utc) - record.created_at.replace(tzinfo=record.created_at.tzinfo or timezone.utc)
+            expired = age > timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+            # Only a claim left by a crashed process gets this old - a running request keeps it (409 below)
+            abandoned = (
+                record.status != "completed"
+                and age > timedelta(minutes=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT_MINUTES)
+            )
+            if expired or abandoned:
+                db.delete(record)  # Start over with this key
+                db.commit()
+                continue
+
+            if record.request_hash != request_hash:
+                return JSONResponse(
+                    {"detail": "Idempotency-Key was already used with a different request body"},
+                    status_code=422
+                )
+            if record.status != "completed":
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"}
+                )
+            return Response(
+                content=record.response_body,
+                status_code=record.response_status,
+                media_type="application/json",
+                headers={"Idempotent-Replayed": "true"}
+            )
+
+        return JSONResponse({"detail": "Could not claim Idempotency-Key, retry"}, status_code=409)
+    finally:
+        db.close()
+
+
+def _store(user_id: str, key: str, endpoint: str, status_code: int, body: bytes):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.endpoint == endpoint
+        ).update({
+            IdempotencyKey.status: "completed",
+            IdempotencyKey.response_status: status_code,
+            IdempotencyKey.response_body: body.decode()
+        })
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(user_id: str, key: str, endpoint: str):
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.endpoint == endpoint
+        ).delete()
+        db.commit()
+    finally:
+        db.close()
+
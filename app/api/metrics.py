@@ -0,0 +1,56 @@
+"""
+/metrics endpoint and per-route request timing (see app.services.metrics)
+"""
+
+import time
+
+from fastapi import APIRouter, Response
+from starlette.routing import Match
+
+from app.services import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+class MetricsMiddleware:
+    """Per-route request latency (pure ASGI - no per-request task or body buffering)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Route template (/api/campaigns/{campaign_id}), not the raw path, to bound cardinality
+            route = getattr(scope.get("route") or _match_route(scope), "path", "unmatched")
+            metrics.REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+
+
+def _match_route(scope):
+    """Route of a request answered before routing (e.g. an idempotent replay), None for a 404"""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
@@ -0,0 +1,88 @@
+"""
+Per-request profiling (see app.services.profiling)
+
+Explicit, admin-only: send X-Profile-Token (= PROFILING_TOKEN) and either
+?__profile=1 / X-Profile: 1 - the response is replaced by the speedscope
+report (original status in X-Profiled-Status) - or ?__profile=store /
+X-Profile: store - normal response, report saved under the id in X-Profile-Id.
+Without PROFILING_TOKEN set, explicit profiling is off.
+
+Sampled: 1 in PROFILE_SAMPLE_RATE requests is profiled and stored.
+"""
+
+import asyncio
+import hmac
+from urllib.parse import parse_qs
+
+from app.config import settings
+from app.services import profiling
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = _requested_mode(scope)
+        if mode is None:
+            if not profiling.sampled():
+                await self.app(scope, receive, send)
+                return
+            mode = "store"
+
+        profile_id = profiling.new_profile_id()
+        profiled_status = 500
+
+        async def send_profiled(message):
+            nonlocal profiled_status
+            if message["type"] == "http.response.start":
+                profiled_status = message["status"]
+                if mode == "store":
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            if mode == "store":
+                await send(message)
+            # "return": the handler's response is dropped, the report is sent instead
+
+        profiler = profiling.new_profiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            profiler.stop()
+
+        name = f"{scope['method']} {scope['path']}"
+        if mode == "store":
+            await asyncio.to_thread(profiling.store, profiler, "request", name, profile_id)
+            return
+
+        report = (await asyncio.to_thread(profiling.render, profiler)).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(report)).encode()),
+                (b"x-profiled-status", str(profiled_status).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": report})
+
+
+def _requested_mode(scope):
+    """"return", "store" or None - only with a valid X-Profile-Token"""
+    if not settings.PROFILING_TOKEN:
+        return None
+
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+    flag = headers.get("x-profile")
+    if flag is None:
+        flag = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("__profile", [None])[0]
+    if flag not in ("1", "true", "store"):
+        return None
+    if not hmac.compare_digest(headers.get("x-profile-token", "").encode(), settings.PROFILING_TOKEN.encode()):
+        return None
+    return "store" if flag == "store" else "return"
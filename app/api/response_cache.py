@@ -0,0 +1,50 @@
+"""
+ETag / If-None-Match for cached GET endpoints (see app.services.response_cache)
+
+A route hands over two callables: `load` reads the row and returns
+(updated_at, response data), raising HTTPException as usual; `version` is the
+cheap updated_at-only query used to revalidate a stale entry. While an entry is
+fresh, neither runs - a matching If-None-Match gets 304, anything else the
+cached body.
+Without Redis, or while its invalidation subscriber is disconnected (see
+response_cache.trusted), entries are never fresh: `version` runs on every hit,
+so a write by another process is never answered with 304.
+"""
+
+import json
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.services import response_cache
+
+CACHE_CONTROL = "private, no-cache"  # Clients may keep it, but revalidate every time
+
+
+def cached_response(request: Request, kind: str, key: str, load, version) -> Response:
+    entry, fresh = response_cache.get(kind, key)
+    if entry is not None and not fresh:
+        if str(version()) == entry.version:
+            entry = response_cache.renew(kind, key, entry)
+        else:
+            entry = None
+    if entry is None:
+        updated_at, data = load()
+        body = json.dumps(
+            jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+        entry = response_cache.put(kind, key, updated_at, body)
+
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if _matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 13.1.2): W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -6,10 +6,15 @@ import uuid
 
 from app.database import get_db
 from app.models import User, Prospect, Action
-from app.models.schemas import QueueActionRequest, ActionResponse
+from app.models.schemas import QueueActionRequest, QueueBulkActionsRequest, ActionResponse
+from app.services.events import emit
+from app.services.scheduling import spread_schedule
 
 router = APIRouter()
 
+# Action types execute_action knows how to run
+ACTION_TYPES = {"connect", "message", "visit_profile"}
+
 
 @router.post("/queue", response_model=ActionResponse)
 async def queue_action(req: QueueActionRequest, db: Session = Depends(get_db)):
@@ -51,6 +56,8 @@ async def queue_action(req: QueueActionRequest, db: Session = Depends(get_db)):
     
     try:
         db.add(action)
+        emit(db, action.user_id, "action.status", action_id=action_id, action_type=action.action_type,
+             prospect_id=action.prospect_id, campaign_id=action.campaign_id, status="pending")
         db.commit()
         db.refresh(action)
     except Exception as e:
@@ -64,6 +71,83 @@ async def queue_action(req: QueueActionRequest, db: Session = Depends(get_db)):
     )
 
 
+@router.post("/queue-bulk")
+async def queue_actions_bulk(req: QueueBulkActionsRequest, db: Session = Depends(get_db)):
+    """
+    Queue up to 5000 actions in one call
+    Ownership is checked with one query, unscheduled items are spread over the
+    user's send window (respecting daily_limits, including actions already
+    pending or sent), valid items are inserted in
+    one bulk statement; the response has one result per item, in order
+    """
+    user = db.query(User).filter(User.user_id == req.user_id).first()
+    if not user:
+        raise HTTPException(404, "User not found")
+    
+    prospect_ids = {item.prospect_id for item in req.items}
+    campaign_of = dict(
+        db.query(Prospect.prospect_id, Prospect.campaign_id).filter(
+            Prospect.user_id == req.user_id,
+            Prospect.prospect_id.in_(prospect_ids)
+        ).all()
+    )
+    
+    results = []
+    valid = []
+    for index, item in enumerate(req.items):
+        if item.prospect_id not in campaign_of:
+            error = "Prospect not found"
+        elif item.action_type not in ACTION_TYPES:
+            error = f"Unsupported action_type: {item.action_type}"
+        else:
+            valid.append(index)
+            results.append({"index": index, "prospect_id": item.prospect_id, "status": "queued"})
+            continue
+        results.append({"index": index, "prospect_id": item.prospect_id, "status": "error", "error": error})
+    
+    unscheduled = [i for i in valid if not req.items[i].scheduled_for]
+    spread = dict(zip(unscheduled, spread_schedule([req.items[i].action_type for i in unscheduled], user, db)))
+    for index, scheduled_for in spread.items():
+        if scheduled_for is None:
+            results[index].update(status="error", error=f"Daily limit for {req.items[index].action_type} is 0")
+    valid = [i for i in valid if results[i]["status"] == "queued"]
+    
+    rows = []
+    for index in valid:
+        item = req.items[index]
+        row = {
+            "action_id": f"action_{uuid.uuid4().hex[:12]}",
+            "user_id": req.user_id,
+            "prospect_id": item.prospect_id,
+            "campaign_id": campaign_of[item.prospect_id],
+            "action_type": item.action_type,
+            "action_data": item.action_data,
+            "scheduled_for": item.scheduled_for or spread[index],
+            "status": "pending",
+            "retry_count": 0,
+            "created_at": datetime.now(timezone.utc)
+        }
+        rows.append(row)
+        results[index].update(action_id=row["action_id"], scheduled_for=row["scheduled_for"])
+    
+    if rows:
+        try:
+            db.bulk_insert_mappings(Action, rows)
+            emit(db, req.user_id, "actions.queued", count=len(rows),
+                 campaign_ids=sorted({r["campaign_id"] for r in rows if r["campaign_id"]}))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(500, f"Database error: {str(e)}")
+    
+    return {
+        "status": "success",
+        "queued": len(rows),
+        "failed": len(results) - len(rows),
+        "results": results
+    }
+
+
 @router.get("/pending", response_model=List[ActionResponse])
 async def get_pending_actions(user_id: str, db: Session = Depends(get_db)):
     """Get all pending actions for a user (including future scheduled actions)"""
@@ -116,6 +200,8 @@ async def cancel_action(action_id: str, db: Session = Depends(get_db)):
         raise HTTPException(400, f"Cannot cancel action with status: {action.status}")
     
     action.status = "cancelled"
+    emit(db, action.user_id, "action.status", action_id=action.action_id, action_type=action.action_type,
+         prospect_id=action.prospect_id, campaign_id=action.campaign_id, status="cancelled")
     
     try:
         db.commit()
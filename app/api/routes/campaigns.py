@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List
+import asyncio
 import uuid
 
+from app.api.response_cache import cached_response
+from app.config import settings
 from app.database import get_db
-from app.models import User, Campaign
+from app.models import User, Campaign, ScoringBatch
 from app.models.schemas import (
     CreateCampaignRequest, 
     CampaignResponse,
     CampaignStatsResponse
 )
+from app.services import analytics, llm_metrics
 
 router = APIRouter()
 
@@ -59,22 +63,25 @@ async def create_campaign(req: CreateCampaignRequest, db: Session = Depends(get_
 
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
-async def get_campaign(campaign_id: str, db: Session = Depends(get_db)):
-    """Get campaign details"""
-    campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
-    if not campaign:
-        raise HTTPException(404, "Campaign not found")
+async def get_campaign(campaign_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get campaign details (ETag / If-None-Match supported)"""
+    def load():
+        campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+        if not campaign:
+            raise HTTPException(404, "Campaign not found")
+        
+        return campaign.updated_at, CampaignResponse(
+            campaign_id=campaign.campaign_id,
+            user_id=campaign.user_id,
+            name=campaign.name,
+            status=campaign.status,
+            target_filters=campaign.target_filters,
+            sequence=campaign.sequence,
+            stats=campaign.stats,
+            created_at=campaign.created_at
+        )
     
-    return CampaignResponse(
-        campaign_id=campaign.campaign_id,
-        user_id=campaign.user_id,
-        name=campaign.name,
-        status=campaign.status,
-        target_filters=campaign.target_filters,
-        sequence=campaign.sequence,
-        stats=campaign.stats,
-        created_at=campaign.created_at
-    )
+    return cached_response(request, "campaign", campaign_id, load, lambda: _campaign_version(db, campaign_id))
 
 
 @router.get("/user/{user_id}/list", response_model=List[CampaignResponse])
@@ -134,16 +141,99 @@ async def resume_campaign(campaign_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{campaign_id}/stats", response_model=CampaignStatsResponse)
-async def get_campaign_stats(campaign_id: str, db: Session = Depends(get_db)):
-    """Get detailed campaign statistics"""
+async def get_campaign_stats(campaign_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get detailed campaign statistics (ETag / If-None-Match supported)"""
+    def load():
+        campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+        if not campaign:
+            raise HTTPException(404, "Campaign not found")
+        
+        return campaign.updated_at, CampaignStatsResponse(
+            campaign_id=campaign.campaign_id,
+            name=campaign.name,
+            status=campaign.status,
+            stats=campaign.stats,
+            created_at=campaign.created_at
+        )
+    
+    return cached_response(request, "campaign_stats", campaign_id, load, lambda: _campaign_version(db, campaign_id))
+
+
+def _campaign_version(db: Session, campaign_id: str):
+    return db.query(Campaign.updated_at).filter(Campaign.campaign_id == campaign_id).scalar()
+
+
+@router.post("/{campaign_id}/rescore")
+async def rescore_campaign(
+    campaign_id: str,
+    only_unscored: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Re-score campaign prospects offline via the provider's batch API
+    Results are applied by the poll_scoring_batches task when the batch finishes
+    """
+    from app.tasks.linkedin_tasks import submit_campaign_rescore
+    
     campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
     if not campaign:
         raise HTTPException(404, "Campaign not found")
     
-    return CampaignStatsResponse(
-        campaign_id=campaign.campaign_id,
-        name=campaign.name,
-        status=campaign.status,
-        stats=campaign.stats,
-        created_at=campaign.created_at
-    )
+    if settings.SYNC_MODE:
+        result = await asyncio.to_thread(submit_campaign_rescore, campaign_id, only_unscored)
+        if "error" in result:
+            raise HTTPException(400, result["error"])
+        return {"status": "success", **result}
+    
+    submit_campaign_rescore.delay(campaign_id, only_unscored)
+    return {"status": "queued", "message": "Batch scoring submitted"}
+
+
+@router.get("/{campaign_id}/scoring-batches")
+async def list_scoring_batches(campaign_id: str, db: Session = Depends(get_db)):
+    """List offline scoring batches for a campaign"""
+    batches = db.query(ScoringBatch).filter(
+        ScoringBatch.campaign_id == campaign_id
+    ).order_by(ScoringBatch.created_at.desc()).all()
+    
+    return [
+        {
+            "batch_id": b.batch_id,
+            "provider": b.provider,
+            "status": b.status,
+            "request_count": b.request_count,
+            "scored_count": b.scored_count,
+            "failed_count": b.failed_count,
+            "created_at": b.created_at,
+            "completed_at": b.completed_at
+        }
+        for b in batches
+    ]
+
+
+@router.get("/{campaign_id}/llm-usage")
+async def get_campaign_llm_usage(
+    campaign_id: str,
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db)
+):
+    """LLM latency (p50/p95) and token usage per feature for a campaign"""
+    campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+    
+    return {"campaign_id": campaign_id, **llm_metrics.usage_report(db, days, campaign_id=campaign_id)}
+
+
+@router.get("/{campaign_id}/analytics")
+async def get_campaign_analytics(
+    campaign_id: str,
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """Funnel, conversion rates, stage counts, score distribution and daily series (precomputed rollups)"""
+    campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+    
+    return analytics.campaign_analytics(db, campaign_id, days)
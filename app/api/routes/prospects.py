@@ -1,17 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import asyncio
+import logging
+import time
 import uuid
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.api.response_cache import cached_response
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.models import User, Campaign, Prospect
-from app.models.schemas import ProspectDetail
-from app.services.llm_service import LLMService
-from app.utils.encryption import decrypt_data
+from app.models.schemas import ProspectDetail, RankedProspect, SearchProspectsRequest, SearchProspectsResponse
+from app.services import analytics, scoring_queue
+from app.services.embedding_index import rank_campaign_prospects
+from app.services.prospect_prefilter import prefilter_prospects
+from app.services.prospect_search import search_prospects
+from app.utils.profiles import normalize_profile_url
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Long-poll interval of GET /{prospect_id}/score-status
+SCORE_STATUS_POLL_SECONDS = 0.25
+# score_status values that will still turn into scored / failed
+SCORE_WAITING = ("queued", "pending")
+
 
 class AddProspectRequest(BaseModel):
     user_id: str
@@ -30,7 +45,10 @@ async def add_prospect(
     db: Session = Depends(get_db)
 ):
     """
-    Add a prospect to a campaign and score with AI
+    Add a prospect to a campaign
+    Returns right after the insert: clear matches/rejects are scored locally,
+    ambiguous prospects are queued for LLM scoring (score_status "queued",
+    see GET /{prospect_id}/score-status; "pending" if the queue was unreachable)
     """
     # Verify user and campaign exist
     user = db.query(User).filter(User.user_id == req.user_id).first()
@@ -44,68 +62,72 @@ async def add_prospect(
     # Generate prospect ID
     prospect_id = f"prospect_{uuid.uuid4().hex[:12]}"
     
+    # Clear matches / rejects get a local score, only ambiguous ones go to the LLM
+    local = None
+    if settings.PREFILTER_ENABLED:
+        local = prefilter_prospects([{
+            "full_name": req.full_name,
+            "title": req.title,
+            "company": req.company,
+            "headline": req.headline
+        }], campaign.target_filters)[0]
+    
+    if local and local["decision"] != "ambiguous":
+        scoring = {"ai_score": local["score"], "score_reasoning": local["reasoning"], "score_status": "scored"}
+    else:
+        scoring = {"score_status": "queued", "score_job_id": f"score_{uuid.uuid4().hex[:12]}"}
+    
     # Create prospect
     prospect = Prospect(
         prospect_id=prospect_id,
         user_id=req.user_id,
         campaign_id=req.campaign_id,
         linkedin_url=req.linkedin_url,
+        linkedin_url_normalized=normalize_profile_url(req.linkedin_url),
         full_name=req.full_name,
         title=req.title,
         company=req.company,
         headline=req.headline,
         location=req.location,
         stage="new",
-        connection_status="not_sent"
+        connection_status="not_sent",
+        **scoring
     )
     
     try:
         db.add(prospect)
+        analytics.record(db, req.campaign_id, prospects_added=1)
+        analytics.stage_changed(db, req.campaign_id, None, "new")
+        analytics.score_changed(db, req.campaign_id, None, prospect.ai_score)
         db.commit()
         db.refresh(prospect)
     except Exception as e:
         db.rollback()
+        logger.exception("Adding prospect failed", extra={"user_id": req.user_id, "campaign_id": req.campaign_id})
         raise HTTPException(500, f"Database error: {str(e)}")
     
-    # Score with AI (async task in production, sync for now)
-    ai_error = None
-    try:
-        llm_config = decrypt_data(user.llm_config_encrypted)
-        llm_service = LLMService(llm_config)
-        
-        prospect_data = {
-            "full_name": req.full_name,
-            "title": req.title,
-            "company": req.company,
-            "headline": req.headline
-        }
-        
-        score_result = await llm_service.score_prospect(
-            prospect_data,
-            campaign.target_filters
-        )
-        
-        prospect.ai_score = score_result.get("score", 5)
-        prospect.score_reasoning = score_result.get("reasoning", "")
-        
-        db.commit()
-    except Exception as e:
-        # Don't fail if AI scoring fails, but inform user
-        ai_error = str(e)
-        print(f"AI scoring failed: {e}")
+    if prospect.score_status == "queued":
+        try:
+            if settings.SYNC_MODE:
+                scoring_queue.enqueue(prospect.prospect_id)
+            else:
+                from app.tasks.linkedin_tasks import score_prospect
+                score_prospect.delay(prospect.prospect_id)
+        except Exception:
+            # The prospect is already committed - answer success (so an Idempotency-Key
+            # retry replays it) and leave the score to the enqueue-pending-scores beat job
+            logger.exception("Queueing prospect scoring failed", extra={"prospect_id": prospect.prospect_id})
+            prospect.score_status = "pending"
+            db.commit()
     
-    response = {
+    return {
         "status": "success",
         "prospect_id": prospect.prospect_id,
         "ai_score": prospect.ai_score,
+        "score_status": prospect.score_status,
+        "score_job_id": prospect.score_job_id,
         "message": "Prospect added successfully"
     }
-    
-    if ai_error:
-        response["ai_scoring_error"] = f"AI scoring failed: {ai_error}"
-        response["message"] = "Prospect added (AI scoring failed)"
-    
-    return response
 
 
 @router.get("/campaign/{campaign_id}/list", response_model=List[ProspectDetail])
@@ -128,31 +150,151 @@ async def list_prospects(campaign_id: str, db: Session = Depends(get_db)):
     ]
 
 
-@router.get("/{prospect_id}")
-async def get_prospect(prospect_id: str, db: Session = Depends(get_db)):
-    """Get detailed prospect info"""
-    prospect = db.query(Prospect).filter(Prospect.prospect_id == prospect_id).first()
-    if not prospect:
+@router.post("/search", response_model=SearchProspectsResponse)
+async def search(req: SearchProspectsRequest, db: Session = Depends(get_db)):
+    """
+    Search a user's prospects (optionally within one campaign) by stage,
+    connection status, score range, company and title/headline text.
+    Newest first; pass next_cursor back as cursor for the following page.
+    """
+    user = db.query(User).filter(User.user_id == req.user_id).first()
+    if not user:
+        raise HTTPException(404, "User not found")
+    
+    try:
+        prospects, next_cursor = search_prospects(
+            db, req.user_id, req.campaign_id, req.filters.model_dump(), req.limit, req.cursor
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    
+    return SearchProspectsResponse(
+        prospects=[
+            ProspectDetail(
+                prospect_id=p.prospect_id,
+                full_name=p.full_name,
+                title=p.title,
+                company=p.company,
+                linkedin_url=p.linkedin_url,
+                ai_score=p.ai_score,
+                stage=p.stage,
+                connection_status=p.connection_status
+            )
+            for p in prospects
+        ],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/campaign/{campaign_id}/ranked", response_model=List[RankedProspect])
+def rank_prospects(campaign_id: str, limit: int = 50, db: Session = Depends(get_db)):
+    """
+    Campaign prospects ranked by similarity to the campaign's ideal profile (local embeddings)
+    Plain def: the index sync (file lock, embedding, DB reads) runs in the threadpool, not on the event loop
+    """
+    campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(404, "Campaign not found")
+    
+    ranked = rank_campaign_prospects(db, campaign_id, campaign.target_filters, min(limit, 1000))
+    if not ranked:
+        return []
+    
+    prospects = {
+        p.id: p for p in db.query(Prospect).filter(Prospect.id.in_([pk for pk, _ in ranked])).all()
+    }
+    
+    return [
+        RankedProspect(
+            prospect_id=p.prospect_id,
+            full_name=p.full_name,
+            title=p.title,
+            company=p.company,
+            linkedin_url=p.linkedin_url,
+            ai_score=p.ai_score,
+            stage=p.stage,
+            connection_status=p.connection_status,
+            similarity=round(similarity, 4)
+        )
+        for pk, similarity in ranked
+        if (p := prospects.get(pk))
+    ]
+
+
+@router.get("/{prospect_id}/score-status")
+async def get_score_status(
+    prospect_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for a queued score"),
+):
+    """
+    AI scoring status of a prospect; with `wait`, long-polls until scored/failed or timeout
+    Every poll opens its own short-lived session, so waiting clients don't hold pooled connections
+    """
+    status = _score_status(prospect_id)
+    if not status:
         raise HTTPException(404, "Prospect not found")
     
+    deadline = time.monotonic() + wait
+    while status["score_status"] in SCORE_WAITING and time.monotonic() < deadline:
+        await asyncio.sleep(SCORE_STATUS_POLL_SECONDS)
+        status = _score_status(prospect_id) or status
+    
+    return status
+
+
+def _score_status(prospect_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        row = db.query(
+            Prospect.prospect_id, Prospect.score_job_id, Prospect.score_status,
+            Prospect.ai_score, Prospect.score_reasoning, Prospect.score_error
+        ).filter(Prospect.prospect_id == prospect_id).first()
+    finally:
+        db.close()
+    
+    if not row:
+        return None
     return {
-        "prospect_id": prospect.prospect_id,
-        "linkedin_url": prospect.linkedin_url,
-        "full_name": prospect.full_name,
-        "title": prospect.title,
-        "company": prospect.company,
-        "headline": prospect.headline,
-        "location": prospect.location,
-        "ai_score": prospect.ai_score,
-        "score_reasoning": prospect.score_reasoning,
-        "stage": prospect.stage,
-        "connection_status": prospect.connection_status,
-        "conversation_history": prospect.conversation_history,
-        "last_interaction_at": prospect.last_interaction_at,
-        "created_at": prospect.created_at
+        "prospect_id": row.prospect_id,
+        "score_job_id": row.score_job_id,
+        "score_status": row.score_status or ("scored" if row.ai_score is not None else "unscored"),
+        "ai_score": row.ai_score,
+        "score_reasoning": row.score_reasoning,
+        "score_error": row.score_error
     }
 
 
+@router.get("/{prospect_id}")
+async def get_prospect(prospect_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get detailed prospect info (ETag / If-None-Match supported)"""
+    def load():
+        prospect = db.query(Prospect).filter(Prospect.prospect_id == prospect_id).first()
+        if not prospect:
+            raise HTTPException(404, "Prospect not found")
+        
+        return prospect.updated_at, {
+            "prospect_id": prospect.prospect_id,
+            "linkedin_url": prospect.linkedin_url,
+            "full_name": prospect.full_name,
+            "title": prospect.title,
+            "company": prospect.company,
+            "headline": prospect.headline,
+            "location": prospect.location,
+            "ai_score": prospect.ai_score,
+            "score_reasoning": prospect.score_reasoning,
+            "stage": prospect.stage,
+            "connection_status": prospect.connection_status,
+            "conversation_history": prospect.conversation_history,
+            "last_interaction_at": prospect.last_interaction_at,
+            "created_at": prospect.created_at
+        }
+    
+    return cached_response(
+        request, "prospect", prospect_id, load,
+        lambda: db.query(Prospect.updated_at).filter(Prospect.prospect_id == prospect_id).scalar()
+    )
+
+
 @router.post("/{prospect_id}/update-stage")
 async def update_prospect_stage(
     prospect_id: str,
@@ -164,12 +306,14 @@ async def update_prospect_stage(
     if not prospect:
         raise HTTPException(404, "Prospect not found")
     
+    analytics.stage_changed(db, prospect.campaign_id, prospect.stage, stage)
     prospect.stage = stage
     
     try:
         db.commit()
     except Exception as e:
         db.rollback()
+        logger.exception("Prospect stage update failed", extra={"prospect_id": prospect_id})
         raise HTTPException(500, f"Database error: {str(e)}")
     
     return {"status": "success", "stage": stage}
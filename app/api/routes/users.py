@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+import json
 
+from app.api.response_cache import cached_response
 from app.database import get_db
 from app.models.db_models import User
 from app.models.schemas import ConfigureUserRequest, ConfigureUserResponse
+from app.services import events, llm_metrics
+from app.services.credential_cache import invalidate_user
 from app.utils.encryption import encrypt_data, decrypt_data
 
 router = APIRouter()
 
+# SSE: comment line every N idle seconds keeps proxies from closing the stream
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 5000
+
 
 @router.post("/configure", response_model=ConfigureUserResponse)
 async def configure_user(req: ConfigureUserRequest, db: Session = Depends(get_db)):
@@ -58,6 +67,9 @@ async def configure_user(req: ConfigureUserRequest, db: Session = Depends(get_db
         db.rollback()
         raise HTTPException(500, f"Database commit error: {str(e)}")
     
+    # Workers drop their cached decrypted copy
+    invalidate_user(req.user_id)
+    
     return ConfigureUserResponse(
         status="success",
         user_id=req.user_id,
@@ -66,27 +78,73 @@ async def configure_user(req: ConfigureUserRequest, db: Session = Depends(get_db
 
 
 @router.get("/{user_id}")
-async def get_user_info(user_id: str, db: Session = Depends(get_db)):
-    """Get user info (without sensitive data)"""
+async def get_user_info(user_id: str, request: Request, db: Session = Depends(get_db)):
+    """Get user info (without sensitive data; ETag / If-None-Match supported)"""
+    def load():
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user:
+            raise HTTPException(404, "User not found")
+        
+        # Verify we can decrypt config (validation)
+        try:
+            llm_config = decrypt_data(user.llm_config_encrypted)
+            llm_provider = llm_config.get("type", "unknown")
+        except Exception:
+            llm_provider = "error_decrypting"
+        
+        return user.updated_at, {
+            "user_id": user.user_id,
+            "linkedin_email": user.linkedin_email,
+            "automation_enabled": user.automation_enabled,
+            "daily_limits": user.daily_limits,
+            "llm_provider": llm_provider,
+            "created_at": user.created_at
+        }
+    
+    return cached_response(
+        request, "user", user_id, load,
+        lambda: db.query(User.updated_at).filter(User.user_id == user_id).scalar()
+    )
+
+
+@router.get("/{user_id}/events")
+async def stream_user_events(user_id: str, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events stream of the user's action status, prospect stage/score
+    and campaign stats changes (replaces polling /api/actions/*)
+    """
     user = db.query(User).filter(User.user_id == user_id).first()
     if not user:
         raise HTTPException(404, "User not found")
+    db.close()  # Long-lived stream - don't hold a DB connection
     
-    # Verify we can decrypt config (validation)
-    try:
-        llm_config = decrypt_data(user.llm_config_encrypted)
-        llm_provider = llm_config.get("type", "unknown")
-    except Exception:
-        llm_provider = "error_decrypting"
+    async def stream():
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        async for message in events.subscribe(user_id, heartbeat=SSE_HEARTBEAT_SECONDS):
+            if message is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{user_id}/llm-usage")
+async def get_user_llm_usage(
+    user_id: str,
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_db)
+):
+    """LLM latency (p50/p95) and token usage for a user, per feature and per campaign"""
+    user = db.query(User).filter(User.user_id == user_id).first()
+    if not user:
+        raise HTTPException(404, "User not found")
     
-    return {
-        "user_id": user.user_id,
-        "linkedin_email": user.linkedin_email,
-        "automation_enabled": user.automation_enabled,
-        "daily_limits": user.daily_limits,
-        "llm_provider": llm_provider,
-        "created_at": user.created_at
-    }
+    return {"user_id": user_id, **llm_metrics.usage_report(db, days, user_id=user_id)}
 
 
 @router.get("/{user_id}/credentials")
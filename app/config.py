@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -10,6 +12,19 @@ class Settings(BaseSettings):
 
     # Encryption
     ENCRYPTION_KEY: str = ""
+    ENCRYPTION_OLD_KEYS: str = ""  # Comma-separated, decrypt-only (during key rotation)
+    KEY_ROTATION_CHECKPOINT: str = "./key_rotation_checkpoint.json"
+    KEY_ROTATION_BATCH_SIZE: int = 500
+
+    # Decrypted user secrets cached per worker process (invalidated via Redis on /configure)
+    CREDENTIAL_CACHE_TTL_SECONDS: int = 300
+    CREDENTIAL_CACHE_MAX_ENTRIES: int = 1000
+
+    # Cached GET responses (campaign, campaign stats, user, prospect) served with ETags
+    RESPONSE_CACHE_TTL_SECONDS: int = 60  # Then re-checked against updated_at
+    RESPONSE_CACHE_MAX_ENTRIES: int = 5000  # Per process
+    # Share entries/invalidations between processes via REDIS_URL; unset = on unless SYNC_MODE
+    RESPONSE_CACHE_REDIS: Optional[bool] = None
 
     # Server
     HOST: str = "0.0.0.0"
@@ -19,6 +34,83 @@ class Settings(BaseSettings):
     # Sync mode (for testing without Celery/Redis)
     SYNC_MODE: bool = False
 
+    # LinkedIn connection sync
+    CONNECTION_SYNC_MAX_PAGES: int = 25  # 40 connections/page, only used until a watermark exists
+
+    # LLM provider endpoints (point at scripts/mock_llm_server.py for offline testing)
+    ANTHROPIC_BASE_URL: str = "https://api.anthropic.com"
+    OPENAI_BASE_URL: str = "https://api.openai.com"
+
+    # Offline bulk scoring (provider batch APIs)
+    SCORING_BATCH_MAX_SIZE: int = 10000  # Prospects per provider batch
+
+    # Local embedding index (memory-mapped vectors per campaign)
+    EMBEDDING_DIR: str = "./embeddings"
+
+    # Local keyword pre-filter: exact title matches / prospects with no target word skip the LLM
+    # (off by default: those prospects get a fixed local score instead of an LLM score)
+    PREFILTER_ENABLED: bool = False
+
+    # Idempotency-Key records (replayed responses) are kept this long
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    # Retries get 409 while the first request runs; a claim this old is from a crashed
+    # process and is taken over (keep well above the slowest request, e.g. big queue-bulk)
+    IDEMPOTENCY_IN_PROGRESS_TIMEOUT_MINUTES: int = 30
+
+    # Default daily send window for bulk-queued actions (override per user in preferences.send_window)
+    SEND_WINDOW_START_HOUR: int = 9
+    SEND_WINDOW_END_HOUR: int = 18
+    SEND_WINDOW_TIMEZONE: str = "UTC"
+
+    # Background LLM scoring of added prospects (in-process workers when SYNC_MODE)
+    SCORING_WORKERS: int = 4
+
+    # LLM rate limiting (per API key, adapts to provider rate-limit headers)
+    LLM_MAX_CONCURRENCY_PER_KEY: int = 8
+    LLM_MAX_RETRIES: int = 4  # Retries on 429/529/5xx
+
+    # LLM failover (llm_config fallbacks)
+    LLM_HEDGE_DEFAULT_MS: int = 8000  # Hedge deadline until enough latency samples for a p95
+    LLM_HEDGE_MIN_MS: int = 1000
+    LLM_BREAKER_FAILURES: int = 5  # Consecutive provider failures that open the breaker
+    LLM_BREAKER_RESET_SECONDS: int = 60  # Open time before a trial call is let through
+
+    # Ahead-of-time LLM generation for scheduled connect/message actions
+    PREGENERATE_LEAD_MINUTES: int = 30  # Generate this long before scheduled_for
+    PREGENERATE_CONCURRENCY_PER_KEY: int = 3  # In-flight LLM calls per API key
+    PREGENERATE_BATCH_SIZE: int = 200  # Actions per run
+
+    # LinkedIn inbox polling (interval doubles while idle, resets on new activity)
+    INBOX_POLL_MIN_SECONDS: int = 300  # 5 minutes
+    INBOX_POLL_MAX_SECONDS: int = 21600  # 6 hours
+
+    # LLM call metrics (buffered in memory, flushed to llm_calls in batches)
+    LLM_METRICS_FLUSH_SECONDS: int = 10
+    LLM_METRICS_FLUSH_SIZE: int = 200  # Flush early once this many calls are buffered
+    LLM_METRICS_MAX_BUFFER: int = 10000  # Oldest records dropped beyond this (DB unavailable)
+
+    # Prometheus: shared directory for multiprocess metrics (API workers + Celery), empty = single process
+    PROMETHEUS_MULTIPROC_DIR: str = ""
+
+    # Tracing: none, console, file (JSON lines to TRACING_FILE), otlp, or package.module:ExporterClass
+    TRACING_EXPORTER: str = "none"
+    TRACING_FILE: str = "./traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0  # Share of new traces recorded (children follow their parent)
+
+    # Logging (JSON to stdout via a background queue listener)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = "httpx=WARNING"  # Per-logger overrides: "app.services.linkedin_service=DEBUG,sqlalchemy.engine=WARNING"
+    LOG_FORMAT: str = "json"  # json, text
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0  # Share of DEBUG records kept
+
+    # Profiling (pyinstrument, speedscope reports in PROFILE_DIR)
+    PROFILING_TOKEN: str = ""  # X-Profile-Token for ?__profile=1 / X-Profile requests, empty = off
+    PROFILE_SAMPLE_RATE: int = 0  # Profile 1 in N API requests in the background, 0 = off
+    PROFILE_TASKS: str = ""  # Comma-separated Celery task names profiled on every run (execute_action, ...)
+    PROFILE_DIR: str = "./profiles"
+    PROFILE_MAX_FILES: int = 200  # Oldest reports deleted beyond this
+    PROFILE_INTERVAL_MS: float = 1.0  # Sampling interval
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
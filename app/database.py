@@ -1,6 +1,13 @@
+import logging
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from app.config import settings
+from app.services import tracing
+from app.services.metrics import instrument_engine
+from app.services.response_cache import track_session_writes
+
+logger = logging.getLogger(__name__)
 
 # SQLite fallback if PostgreSQL not available
 try:
@@ -8,15 +15,26 @@ try:
     # Test connection
     with engine.connect() as conn:
         pass
-    print("✓ Connected to PostgreSQL")
+    logger.info("Connected to PostgreSQL")
 except Exception as e:
-    print(f"⚠️  PostgreSQL not available ({e}), falling back to SQLite")
+    logger.warning("PostgreSQL not available (%s), falling back to SQLite", e)
     engine = create_engine(
         "sqlite:///./linkedin_agent.db",
         connect_args={"check_same_thread": False}
     )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine)
+
+class TracedSession(Session):
+    """Session whose commits show up as spans in traces"""
+
+    def commit(self):
+        with tracing.span("db.commit"):
+            super().commit()
+
+
+SessionLocal = sessionmaker(class_=TracedSession, autocommit=False, autoflush=False, bind=engine)
+track_session_writes(SessionLocal)
 Base = declarative_base()
 
 
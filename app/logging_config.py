@@ -0,0 +1,154 @@
+"""
+Logging setup: JSON records with request/task context, written off the hot path
+
+- Every record is a JSON object: ts, level, logger, msg, plus the bound
+  context (action_id, user_id, campaign_id, ...), the current trace/span id
+  when tracing is on, anything passed via extra={...}, and the traceback
+- Handlers only enqueue (QueueHandler); a listener thread does the
+  formatting and I/O, so logging never blocks the event loop or a task
+- LOG_LEVEL sets the root level, LOG_LEVELS overrides per logger
+  ("app.services.linkedin_service=DEBUG,sqlalchemy.engine=WARNING")
+- DEBUG records are sampled (LOG_DEBUG_SAMPLE_RATE) so high-volume debug
+  logging can stay on in production
+
+Context is bound with log_context(...) / bind_log_context(...); it lives in a
+ContextVar, so it follows asyncio tasks and asyncio.to_thread.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.config import settings
+
+_context: ContextVar[dict] = ContextVar("log_context", default={})
+
+# LogRecord attributes that are not user-supplied extra={...} fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "log_context"}
+
+_queue_handler = None
+_listener = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach fields (action_id, user_id, campaign_id, ...) to records logged inside the block"""
+    token = _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bind_log_context(**fields):
+    """Attach fields for the rest of the current context (an asyncio task, a to_thread call)"""
+    _context.set({**_context.get(), **{k: v for k, v in fields.items() if v is not None}})
+
+
+class ContextFilter(logging.Filter):
+    """Captures the caller's context on the record (runs in the calling thread, before queueing)"""
+
+    def filter(self, record):
+        record.log_context = _context.get()
+        try:
+            from opentelemetry import trace
+            span_context = trace.get_current_span().get_span_context()
+            if span_context.is_valid:
+                record.trace_id = format(span_context.trace_id, "032x")
+                record.span_id = format(span_context.span_id, "016x")
+        except ImportError:
+            pass
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps DEBUG records with probability `rate`; other levels always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+class _QueueHandler(QueueHandler):
+    """Enqueues the record with its message and traceback rendered but fields kept (for JsonFormatter)"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **getattr(record, "log_context", {}),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def setup_logging():
+    """Configure the root logger for this process (idempotent)"""
+    global _queue_handler, _listener
+    if _queue_handler is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    _queue_handler = _QueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+    _queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for item in settings.LOG_LEVELS.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_stop_listener)
+    # Forked workers (Celery prefork) don't inherit the listener thread
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _restart_listener():
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()  # Drains what is queued
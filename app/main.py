@@ -1,16 +1,44 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.logging_config import setup_logging
+
+setup_logging()  # Before the other app imports - app.database logs while connecting
+
 from app.database import engine, Base
+from app.api.idempotency import IdempotencyMiddleware
+from app.api.metrics import MetricsMiddleware, router as metrics_router
+from app.api.profiling import ProfilingMiddleware
+from app.api.tracing import TracingMiddleware
 from app.api.routes import users, campaigns, prospects, actions
+from app.config import settings
+from app.schema_upgrades import upgrade_schema
+from app.services import scoring_queue
+from app.services.prospect_search import setup_search_index
+from app.services.tracing import setup_tracing
+
+setup_tracing("linkedin-agent-api")
 
-# Create tables
+# Create tables, then add columns/indexes that existing tables are missing
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+setup_search_index(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SYNC_MODE:
+        scoring_queue.requeue_pending()  # In-process scoring queue doesn't survive restarts
+    yield
+
 
 app = FastAPI(
     title="LinkedIn AI Agent API",
     version="1.0.0",
-    description="AI-powered LinkedIn automation. Users provide credentials + LLM key, we handle automation."
+    description="AI-powered LinkedIn automation. Users provide credentials + LLM key, we handle automation.",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -19,12 +47,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Routes
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(campaigns.router, prefix="/api/campaigns", tags=["Campaigns"])
 app.include_router(prospects.router, prefix="/api/prospects", tags=["Prospects"])
 app.include_router(actions.router, prefix="/api/actions", tags=["Actions"])
+app.include_router(metrics_router)
 
 
 @app.get("/")
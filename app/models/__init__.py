@@ -1,3 +1,9 @@
-from app.models.db_models import User, Campaign, Prospect, Action
+from app.models.db_models import (
+    User, Campaign, Prospect, Action, SyncState, ScoringBatch, LLMCall, IdempotencyKey,
+    CampaignDailyStats, CampaignCounter
+)
 
-__all__ = ["User", "Campaign", "Prospect", "Action"]
+__all__ = [
+    "User", "Campaign", "Prospect", "Action", "SyncState", "ScoringBatch", "LLMCall", "IdempotencyKey",
+    "CampaignDailyStats", "CampaignCounter"
+]
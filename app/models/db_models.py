@@ -1,4 +1,7 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import (
+    Column, String, Integer, Boolean, Date, DateTime, Text, ForeignKey, JSON,
+    Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.database import Base
@@ -69,6 +72,7 @@ class Prospect(Base):
     
     # LinkedIn data
     linkedin_url = Column(Text, nullable=False)
+    linkedin_url_normalized = Column(String(255))  # linkedin.com/in/<slug>, for matching sync results
     full_name = Column(String(255))
     headline = Column(String(500))
     company = Column(String(255))
@@ -78,6 +82,9 @@ class Prospect(Base):
     # AI scoring
     ai_score = Column(Integer)  # 1-10
     score_reasoning = Column(Text)
+    score_status = Column(String(20))  # pending (not yet enqueued), queued, scored, failed (background scoring)
+    score_job_id = Column(String(64))
+    score_error = Column(Text)
     
     # Status
     stage = Column(String(50), default="new")  # new, contacted, connected, replied, cold
@@ -93,6 +100,15 @@ class Prospect(Base):
 
     campaign = relationship("Campaign", back_populates="prospects")
 
+    __table_args__ = (
+        # Connection sync: all of a user's pending prospects in one lookup
+        Index("ix_prospects_user_connection_status", "user_id", "connection_status"),
+        # Sync results are matched by profile URL
+        Index("ix_prospects_user_url_normalized", "user_id", "linkedin_url_normalized"),
+        # Prospect search: keyset pages (newest first) within a user / campaign
+        Index("ix_prospects_user_campaign_id", "user_id", "campaign_id", "id"),
+    )
+
 
 class Action(Base):
     __tablename__ = "actions"
@@ -109,6 +125,7 @@ class Action(Base):
     
     # Scheduling
     scheduled_for = Column(DateTime, nullable=False)
+    pregenerated_at = Column(DateTime)  # Ahead-of-time generation attempted (text in action_data unless it failed)
     executed_at = Column(DateTime)
     
     # Status
@@ -117,3 +134,133 @@ class Action(Base):
     error_message = Column(Text)
     
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class SyncState(Base):
+    """Per-user watermark for incremental LinkedIn syncs (connections, inbox)"""
+    __tablename__ = "sync_states"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(255), ForeignKey("users.user_id"), nullable=False)
+    sync_type = Column(String(50), nullable=False)  # connections, inbox
+
+    # Newest item already processed - next sync stops paginating here
+    watermark = Column(DateTime)
+    state = Column(JSON, default=dict)  # Sync-specific bookkeeping
+    last_synced_at = Column(DateTime)
+    next_sync_at = Column(DateTime)  # Adaptive polling (inbox)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "sync_type", name="uq_sync_states_user_type"),
+    )
+
+
+class ScoringBatch(Base):
+    """Provider batch (Anthropic Message Batches / OpenAI Batch API) of prospect scoring requests"""
+    __tablename__ = "scoring_batches"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    batch_id = Column(String(255), unique=True, nullable=False, index=True)
+    provider_batch_id = Column(String(255), nullable=False)
+    user_id = Column(String(255), ForeignKey("users.user_id"), nullable=False)
+    campaign_id = Column(String(255), ForeignKey("campaigns.campaign_id"), nullable=False)
+
+    provider = Column(String(50), nullable=False)  # anthropic, openai
+    status = Column(String(50), default="submitted", index=True)  # submitted, completed, failed
+    request_count = Column(Integer, default=0)
+    scored_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    error_message = Column(Text)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    completed_at = Column(DateTime)
+
+
+class LLMCall(Base):
+    """One LLM request (metrics: latency, tokens), written in batches by app.services.llm_metrics"""
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(255))
+    campaign_id = Column(String(255))
+
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100))
+    feature = Column(String(50), nullable=False)  # note, message, template_slot, score
+    latency_ms = Column(Integer, nullable=False)
+    success = Column(Boolean, default=True)
+
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    cache_read_tokens = Column(Integer, default=0)
+    cache_creation_tokens = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    __table_args__ = (
+        Index("ix_llm_calls_campaign_created", "campaign_id", "created_at"),
+        Index("ix_llm_calls_user_created", "user_id", "created_at"),
+    )
+
+
+class IdempotencyKey(Base):
+    """First response to a write request carrying an Idempotency-Key header, replayed for retries"""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(255), nullable=False, server_default="")  # Keys are scoped per user ("" if the body has none)
+    key = Column(String(255), nullable=False)
+    endpoint = Column(String(255), nullable=False)  # "POST /api/prospects/add"
+    request_hash = Column(String(64), nullable=False)  # sha256 of the body - same key, different body is rejected
+
+    status = Column(String(20), default="in_progress")  # in_progress, completed
+    response_status = Column(Integer)
+    response_body = Column(Text)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", "endpoint", name="uq_idempotency_keys_user_key_endpoint"),
+    )
+
+
+class CampaignDailyStats(Base):
+    """Per-campaign, per-day (UTC) activity counters, incremented by app.services.analytics"""
+    __tablename__ = "campaign_daily_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(255), ForeignKey("campaigns.campaign_id"), nullable=False)
+    day = Column(Date, nullable=False)
+
+    prospects_added = Column(Integer, default=0, nullable=False)
+    connections_sent = Column(Integer, default=0, nullable=False)
+    accepted = Column(Integer, default=0, nullable=False)
+    messages_sent = Column(Integer, default=0, nullable=False)
+    replied = Column(Integer, default=0, nullable=False)
+    profile_views = Column(Integer, default=0, nullable=False)
+    actions_failed = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "day", name="uq_campaign_daily_stats_campaign_day"),
+    )
+
+
+class CampaignCounter(Base):
+    """
+    Per-campaign running counters, incremented by app.services.analytics
+    Names: total:<daily metric>, stage:<stage>, score:<1-10>
+    """
+    __tablename__ = "campaign_counters"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    campaign_id = Column(String(255), ForeignKey("campaigns.campaign_id"), nullable=False)
+    name = Column(String(100), nullable=False)
+    value = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("campaign_id", "name", name="uq_campaign_counters_campaign_name"),
+    )
@@ -1,16 +1,21 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 
 # --- User Schemas ---
 
-class LLMConfig(BaseModel):
+class LLMProviderConfig(BaseModel):
     type: str = "anthropic"  # anthropic, openai
     model: str = "claude-sonnet-4-5"
     api_key: str
 
 
+class LLMConfig(LLMProviderConfig):
+    # Tried in order when the primary is slow (hedged) or failing
+    fallbacks: List[LLMProviderConfig] = []
+
+
 class LinkedInCredentials(BaseModel):
     email: str
     password: str
@@ -34,8 +39,10 @@ class ConfigureUserResponse(BaseModel):
 class CampaignSequenceStep(BaseModel):
     day: int
     action: str  # "connect", "message"
-    template: str
+    template: str  # Placeholders: {first_name}, {company}, ... and one AI slot like {ai_note}
     condition: Optional[str] = None  # "if_accepted", "if_no_reply"
+    # How text is produced; None infers it from the template (AI slot -> llm_personalize_template)
+    mode: Optional[Literal["template", "llm", "llm_personalize_template"]] = None
 
 
 class CreateCampaignRequest(BaseModel):
@@ -83,11 +90,30 @@ class ProspectDetail(BaseModel):
     connection_status: Optional[str]
 
 
+class RankedProspect(ProspectDetail):
+    similarity: float  # Cosine similarity to the campaign's ideal profile
+
+
+class ProspectSearchFilters(BaseModel):
+    stage: Optional[List[str]] = None
+    connection_status: Optional[List[str]] = None
+    min_score: Optional[int] = Field(None, ge=1, le=10)
+    max_score: Optional[int] = Field(None, ge=1, le=10)
+    company: Optional[str] = None
+    text: Optional[str] = None  # Words matched (as prefixes) against title and headline
+
+
 class SearchProspectsRequest(BaseModel):
     user_id: str
     campaign_id: Optional[str] = None
-    filters: Optional[dict] = {}
-    limit: int = 50
+    filters: ProspectSearchFilters = ProspectSearchFilters()
+    limit: int = Field(50, ge=1, le=500)
+    cursor: Optional[str] = None  # next_cursor from the previous page
+
+
+class SearchProspectsResponse(BaseModel):
+    prospects: List[ProspectDetail]
+    next_cursor: Optional[str]
 
 
 # --- Action Schemas ---
@@ -100,6 +126,18 @@ class QueueActionRequest(BaseModel):
     scheduled_for: Optional[datetime] = None
 
 
+class BulkActionItem(BaseModel):
+    prospect_id: str
+    action_type: str
+    action_data: dict = {}
+    scheduled_for: Optional[datetime] = None  # Default: spread over the send window
+
+
+class QueueBulkActionsRequest(BaseModel):
+    user_id: str
+    items: List[BulkActionItem] = Field(..., min_length=1, max_length=5000)
+
+
 class ActionResponse(BaseModel):
     action_id: str
     status: str
@@ -0,0 +1,56 @@
+"""
+In-place upgrades for databases created by an older version of the app
+
+Base.metadata.create_all creates missing tables but never touches existing
+ones, so columns and indexes added to an existing model would be missing on
+a deployed database. upgrade_schema() runs right after create_all and adds
+them: ALTER TABLE ... ADD COLUMN for every model column the table lacks, and
+CREATE INDEX for every declared index that doesn't exist yet. Every step
+checks first, so it is a no-op on a fresh or already upgraded database.
+
+Only nullable columns (or ones with a server default) can be added this
+way; anything else is logged and has to be migrated by hand.
+"""
+
+import logging
+
+from sqlalchemy import inspect, text
+
+from app.database import Base
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade_schema(engine):
+    """Add missing columns and indexes to existing tables"""
+    import app.models  # noqa: F401 - registers every table on Base.metadata
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = engine.dialect.identifier_preparer
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue  # Just created by create_all, complete already
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.error("Cannot add NOT NULL column %s.%s automatically - migrate it manually",
+                                 table.name, column.name)
+                    continue
+                ddl = (f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                       f"{preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}")
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                logger.info("Added column %s.%s", table.name, column.name)
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn, checkfirst=True)
+                    logger.info("Added index %s on %s", index.name, table.name)
@@ -0,0 +1,201 @@
+"""
+Campaign analytics rollups
+
+Producers increment counters inside their own transaction as things happen
+(prospect added, action completed, stage or score changed), with atomic
+upserts - no read-modify-write, so concurrent workers don't lose updates.
+The analytics endpoint then reads a handful of rollup rows instead of
+scanning prospects and actions.
+
+- campaign_daily_stats: one row per campaign per UTC day (DAILY_METRICS)
+- campaign_counters: lifetime totals (total:<metric>), current stage counts
+  (stage:<stage>) and the score histogram (score:<n>)
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models import Action, CampaignCounter, CampaignDailyStats, Prospect
+
+DAILY_METRICS = (
+    "prospects_added", "connections_sent", "accepted", "messages_sent",
+    "replied", "profile_views", "actions_failed"
+)
+
+STAGES = ("new", "contacted", "connected", "messaged", "replied", "cold")
+
+# Completed action type -> daily metric
+ACTION_METRICS = {"connect": "connections_sent", "message": "messages_sent", "visit_profile": "profile_views"}
+
+
+def record(db: Session, campaign_id: Optional[str], day: date = None, **deltas):
+    """Add deltas (DAILY_METRICS names) to the campaign's day row and lifetime totals"""
+    deltas = {metric: n for metric, n in deltas.items() if n}
+    if not campaign_id or not deltas:
+        return
+    day = day or datetime.now(timezone.utc).date()
+
+    _upsert_add(db, CampaignDailyStats, {"campaign_id": campaign_id, "day": day}, deltas)
+    for metric, n in deltas.items():
+        _add_counter(db, campaign_id, f"total:{metric}", n)
+
+
+def stage_changed(db: Session, campaign_id: Optional[str], old: Optional[str], new: Optional[str], count: int = 1):
+    if not campaign_id or old == new:
+        return
+    if old:
+        _add_counter(db, campaign_id, f"stage:{old}", -count)
+    if new:
+        _add_counter(db, campaign_id, f"stage:{new}", count)
+
+
+def score_changed(db: Session, campaign_id: Optional[str], old: Optional[int], new: Optional[int]):
+    if not campaign_id or old == new:
+        return
+    if old is not None:
+        _add_counter(db, campaign_id, f"score:{old}", -1)
+    if new is not None:
+        _add_counter(db, campaign_id, f"score:{new}", 1)
+
+
+def rebuild_scores(db: Session, campaign_id: str):
+    """Recount the score histogram with one GROUP BY (after bulk rescoring)"""
+    db.query(CampaignCounter).filter(
+        CampaignCounter.campaign_id == campaign_id,
+        CampaignCounter.name.like("score:%")
+    ).delete(synchronize_session=False)
+
+    rows = db.query(Prospect.ai_score, func.count()).filter(
+        Prospect.campaign_id == campaign_id,
+        Prospect.ai_score.isnot(None)
+    ).group_by(Prospect.ai_score).all()
+    for score, n in rows:
+        _add_counter(db, campaign_id, f"score:{score}", n)
+
+
+def rebuild_campaign(db: Session, campaign_id: str):
+    """
+    Recompute a campaign's rollups from prospects and actions (backfill for
+    campaigns created before analytics existed). Accepted/replied days are
+    approximated by the prospect's last interaction.
+    """
+    db.query(CampaignDailyStats).filter(CampaignDailyStats.campaign_id == campaign_id).delete(synchronize_session=False)
+    db.query(CampaignCounter).filter(CampaignCounter.campaign_id == campaign_id).delete(synchronize_session=False)
+
+    for created_at, n in db.query(func.date(Prospect.created_at), func.count()).filter(
+        Prospect.campaign_id == campaign_id
+    ).group_by(func.date(Prospect.created_at)).all():
+        record(db, campaign_id, _as_date(created_at), prospects_added=n)
+
+    for action_type, status, executed_day, n in db.query(
+        Action.action_type, Action.status, func.date(Action.executed_at), func.count()
+    ).filter(
+        Action.campaign_id == campaign_id,
+        Action.status.in_(["completed", "failed"])
+    ).group_by(Action.action_type, Action.status, func.date(Action.executed_at)).all():
+        day = _as_date(executed_day)
+        if status == "failed":
+            record(db, campaign_id, day, actions_failed=n)
+        elif action_type in ACTION_METRICS:
+            record(db, campaign_id, day, **{ACTION_METRICS[action_type]: n})
+
+    for metric, condition in (("accepted", Prospect.connection_status == "accepted"),
+                              ("replied", Prospect.stage == "replied")):
+        for interaction_day, n in db.query(func.date(Prospect.last_interaction_at), func.count()).filter(
+            Prospect.campaign_id == campaign_id, condition
+        ).group_by(func.date(Prospect.last_interaction_at)).all():
+            record(db, campaign_id, _as_date(interaction_day), **{metric: n})
+
+    for stage, n in db.query(Prospect.stage, func.count()).filter(
+        Prospect.campaign_id == campaign_id
+    ).group_by(Prospect.stage).all():
+        stage_changed(db, campaign_id, None, stage or "new", n)
+
+    rebuild_scores(db, campaign_id)
+
+
+def campaign_analytics(db: Session, campaign_id: str, days: int = 30) -> dict:
+    """Funnel, rates, stage counts, score distribution and daily series from the rollups"""
+    counters = dict(db.query(CampaignCounter.name, CampaignCounter.value).filter(
+        CampaignCounter.campaign_id == campaign_id
+    ).all())
+    totals = {metric: counters.get(f"total:{metric}", 0) for metric in DAILY_METRICS}
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = {
+        row.day: row
+        for row in db.query(CampaignDailyStats).filter(
+            CampaignDailyStats.campaign_id == campaign_id,
+            CampaignDailyStats.day >= since
+        ).all()
+    }
+    daily = [
+        {"day": (since + timedelta(days=i)).isoformat(),
+         **{metric: getattr(rows.get(since + timedelta(days=i)), metric, 0) for metric in DAILY_METRICS}}
+        for i in range(days)
+    ]
+
+    return {
+        "campaign_id": campaign_id,
+        "funnel": {
+            "prospects": totals["prospects_added"],
+            "connections_sent": totals["connections_sent"],
+            "accepted": totals["accepted"],
+            "messages_sent": totals["messages_sent"],
+            "replied": totals["replied"]
+        },
+        "rates": {
+            "acceptance_rate": _rate(totals["accepted"], totals["connections_sent"]),
+            "reply_rate": _rate(totals["replied"], totals["accepted"] or totals["messages_sent"])
+        },
+        "totals": totals,
+        "stages": {stage: counters.get(f"stage:{stage}", 0) for stage in STAGES},
+        "score_distribution": {str(score): counters.get(f"score:{score}", 0) for score in range(1, 11)},
+        "daily": daily
+    }
+
+
+def _add_counter(db: Session, campaign_id: str, name: str, n: int):
+    _upsert_add(db, CampaignCounter, {"campaign_id": campaign_id, "name": name}, {"value": n})
+
+
+def _upsert_add(db: Session, model, keys: dict, deltas: dict):
+    """INSERT keys+deltas, or add deltas to the existing row (atomic on Postgres and SQLite)"""
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**keys, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={column: table.c[column] + stmt.excluded[column] for column in deltas}
+        )
+        db.execute(stmt)
+        return
+
+    # Other databases: update, insert if missing
+    conditions = [table.c[k] == v for k, v in keys.items()]
+    result = db.execute(update(table).where(*conditions).values(
+        {column: table.c[column] + n for column, n in deltas.items()}
+    ))
+    if result.rowcount == 0:
+        db.execute(table.insert().values(**keys, **deltas))
+
+
+def _rate(numerator: int, denominator: int) -> Optional[float]:
+    return round(numerator / denominator, 4) if denominator else None
+
+
+def _as_date(value):
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])  # SQLite returns DATE() as text
+    return value
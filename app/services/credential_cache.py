@@ -0,0 +1,124 @@
+"""
+Per-process cache of decrypted user secrets (LinkedIn credentials + LLM config)
+
+Entries are keyed by user_id and tagged with the user's updated_at:
+- within CREDENTIAL_CACHE_TTL_SECONDS an entry is used without touching the DB
+- after that, one small query re-checks updated_at; if unchanged the entry is
+  renewed without decrypting again
+- /api/users/configure calls invalidate_user(), which drops the local entry and
+  publishes the user_id on Redis so every worker drops it too (if Redis is down,
+  the TTL bounds staleness)
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import redis
+
+from app.config import settings
+from app.models import User
+from app.utils.encryption import decrypt_data
+
+INVALIDATION_CHANNEL = "linkedin_agent:credentials_invalidated"
+
+logger = logging.getLogger(__name__)
+
+UserSecrets = namedtuple("UserSecrets", ["linkedin_creds", "llm_config"])
+_Entry = namedtuple("_Entry", ["updated_at", "expires_at", "secrets"])
+
+_cache = OrderedDict()  # user_id -> _Entry, least recently used first
+_lock = threading.Lock()
+_subscriber = None
+
+
+def get_user_secrets(db, user_id: str):
+    """Decrypted secrets for a user (None if the user doesn't exist)"""
+    _ensure_subscriber()
+    now = time.monotonic()
+
+    entry = _get(user_id)
+    if entry and entry.expires_at > now:
+        return entry.secrets
+
+    row = db.query(
+        User.updated_at, User.linkedin_credentials_encrypted, User.llm_config_encrypted
+    ).filter(User.user_id == user_id).first()
+    if not row:
+        return None
+    return _store(user_id, row, entry, now)
+
+
+def secrets_for(user: User) -> UserSecrets:
+    """Decrypted secrets for an already loaded User row (skips decryption if cached)"""
+    _ensure_subscriber()
+    return _store(user.user_id, user, _get(user.user_id), time.monotonic())
+
+
+def invalidate_user(user_id: str):
+    """Drop a user's entry here and (via Redis) in every other process"""
+    _drop(user_id)
+    try:
+        redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1).publish(INVALIDATION_CHANNEL, user_id)
+    except redis.RedisError as e:
+        logger.warning("Credential cache invalidation not published (%s) - other workers refresh within TTL", e)
+
+
+def _get(user_id: str):
+    with _lock:
+        entry = _cache.get(user_id)
+        if entry:
+            _cache.move_to_end(user_id)
+        return entry
+
+
+def _store(user_id: str, row, entry, now: float) -> UserSecrets:
+    if entry and entry.updated_at == row.updated_at:
+        secrets = entry.secrets  # Unchanged - no need to decrypt again
+    else:
+        secrets = UserSecrets(
+            decrypt_data(row.linkedin_credentials_encrypted),
+            decrypt_data(row.llm_config_encrypted)
+        )
+
+    with _lock:
+        _cache[user_id] = _Entry(row.updated_at, now + settings.CREDENTIAL_CACHE_TTL_SECONDS, secrets)
+        _cache.move_to_end(user_id)
+        while len(_cache) > settings.CREDENTIAL_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return secrets
+
+
+def _drop(user_id: str):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def _ensure_subscriber():
+    global _subscriber
+    if _subscriber and _subscriber.is_alive():
+        return
+    with _lock:
+        if _subscriber and _subscriber.is_alive():
+            return
+        _subscriber = threading.Thread(target=_listen, name="credential-cache-invalidation", daemon=True)
+        _subscriber.start()
+
+
+def _listen():
+    """Drop entries invalidated by other processes; reconnects with backoff"""
+    delay = 1
+    while True:
+        try:
+            pubsub = redis.Redis.from_url(settings.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were disconnected is lost - start clean
+            with _lock:
+                _cache.clear()
+            delay = 1
+            for message in pubsub.listen():
+                _drop(message["data"].decode())
+        except redis.RedisError:
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
@@ -0,0 +1,229 @@
+"""
+Local embedding index for ranking a campaign's prospects against its ideal profile
+
+CPU-only, no model download: prospect text (title/headline/company) is embedded
+with feature hashing of words and character trigrams into a fixed-size,
+L2-normalized float32 vector. Each campaign's vectors live in a file that is
+memory-mapped for queries, so ranking tens of thousands of prospects is one
+matrix-vector product. New prospects are appended; prospects edited since the
+last sync (Prospect.updated_at) are re-embedded in place.
+
+Several API workers / Celery processes may sync the same campaign at once, so
+sync holds an exclusive flock on <campaign_id>.lock and queries a shared one.
+"""
+
+import fcntl
+import json
+import os
+import re
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Prospect
+
+DIM = 256
+TRIGRAM_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def embed_texts(texts: list) -> np.ndarray:
+    """Embed texts into an (n, DIM) float32 matrix of unit vectors"""
+    vectors = np.zeros((len(texts), DIM), dtype=np.float32)
+
+    for row, text in enumerate(texts):
+        words = _WORD_RE.findall((text or "").lower())
+        for word in words:
+            _add_feature(vectors[row], word, 1.0)
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                _add_feature(vectors[row], padded[i:i + 3], TRIGRAM_WEIGHT)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def prospect_text(title, headline, company) -> str:
+    return " ".join(part for part in (title, title, headline, company) if part)  # Title counts double
+
+
+def profile_text(target_filters: dict) -> str:
+    """Ideal-customer-profile text from campaign target_filters"""
+    parts = []
+    for key in ("ideal_profile", "title", "industry", "company", "keywords"):
+        value = target_filters.get(key)
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+class CampaignEmbeddingIndex:
+    """
+    On-disk index for one campaign
+    <dir>/<campaign_id>.f32 holds the vectors, <campaign_id>.ids the Prospect.id of
+    each row (ascending), <campaign_id>.meta the newest updated_at already embedded
+    """
+
+    def __init__(self, campaign_id: str, directory: str = None):
+        self.directory = directory or settings.EMBEDDING_DIR
+        self.vectors_path = os.path.join(self.directory, f"{campaign_id}.f32")
+        self.ids_path = os.path.join(self.directory, f"{campaign_id}.ids")
+        self.meta_path = os.path.join(self.directory, f"{campaign_id}.meta")
+        self.lock_path = os.path.join(self.directory, f"{campaign_id}.lock")
+        self.campaign_id = campaign_id
+
+    def __len__(self) -> int:
+        if not os.path.exists(self.ids_path):
+            return 0
+        rows_by_vectors = os.path.getsize(self.vectors_path) // (DIM * 4)
+        rows_by_ids = os.path.getsize(self.ids_path) // 8
+        return min(rows_by_vectors, rows_by_ids)
+
+    def last_id(self) -> int:
+        n = len(self)
+        if n == 0:
+            return 0
+        return int(np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))[-1])
+
+    def sync(self, db: Session, chunk_size: int = 5000) -> dict:
+        """
+        Re-embed prospects edited since the last sync and append new ones
+        Returns {"added": n, "updated": n}
+        """
+        with self._locked(fcntl.LOCK_EX):
+            self._truncate_partial_writes()
+            last_id = self.last_id()
+            # No watermark yet (new index, or one built before edits were tracked): re-embed every row once
+            watermark = self._read_watermark() or datetime.min
+            newest = watermark
+
+            updated = 0
+            after_id = 0
+            while last_id:
+                rows = db.query(
+                    Prospect.id, Prospect.title, Prospect.headline, Prospect.company, Prospect.updated_at
+                ).filter(
+                    Prospect.campaign_id == self.campaign_id,
+                    Prospect.id > after_id,
+                    Prospect.id <= last_id,
+                    Prospect.updated_at >= watermark  # >=: an edit in the same instant as the watermark isn't lost
+                ).order_by(Prospect.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                updated += self._overwrite(rows)
+                newest = max(newest, max((r.updated_at for r in rows if r.updated_at), default=newest))
+                after_id = rows[-1].id
+
+            added = 0
+            while True:
+                rows = db.query(
+                    Prospect.id, Prospect.title, Prospect.headline, Prospect.company, Prospect.updated_at
+                ).filter(
+                    Prospect.campaign_id == self.campaign_id,
+                    Prospect.id > last_id
+                ).order_by(Prospect.id).limit(chunk_size).all()
+                if not rows:
+                    break
+
+                vectors = embed_texts([prospect_text(r.title, r.headline, r.company) for r in rows])
+                ids = np.array([r.id for r in rows], dtype=np.int64)
+
+                # Vectors first: a crash between the writes leaves extra vectors,
+                # which __len__ ignores and the next sync truncates
+                with open(self.vectors_path, "ab") as f:
+                    vectors.tofile(f)
+                with open(self.ids_path, "ab") as f:
+                    ids.tofile(f)
+
+                newest = max(newest, max((r.updated_at for r in rows if r.updated_at), default=newest))
+                last_id = int(ids[-1])
+                added += len(rows)
+
+            if newest != watermark or not os.path.exists(self.meta_path):
+                self._write_watermark(newest)
+
+        return {"added": added, "updated": updated}
+
+    def _overwrite(self, rows) -> int:
+        """Re-embed already indexed rows in place; returns rows written"""
+        n = len(self)
+        ids = np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,))
+        wanted = np.array([r.id for r in rows], dtype=np.int64)
+        positions = np.searchsorted(ids, wanted)
+        found = (positions < n) & (ids[np.minimum(positions, n - 1)] == wanted)
+        if not found.any():
+            return 0
+
+        texts = [prospect_text(r.title, r.headline, r.company) for r, ok in zip(rows, found) if ok]
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(n, DIM))
+        vectors[positions[found]] = embed_texts(texts)
+        vectors.flush()
+        return int(found.sum())
+
+    def _read_watermark(self):
+        try:
+            with open(self.meta_path) as f:
+                return datetime.fromisoformat(json.load(f)["updated_at"])
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+
+    def _write_watermark(self, value: datetime):
+        tmp_path = f"{self.meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"updated_at": value.isoformat()}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    @contextmanager
+    def _locked(self, mode: int):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _truncate_partial_writes(self):
+        """Drop rows present in only one of the two files (interrupted sync)"""
+        n = len(self)
+        for path, row_bytes in ((self.vectors_path, DIM * 4), (self.ids_path, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != n * row_bytes:
+                with open(path, "r+b") as f:
+                    f.truncate(n * row_bytes)
+
+    def top_k(self, query: np.ndarray, k: int) -> list:
+        """[(prospect pk, cosine similarity)] of the k best rows, best first"""
+        if k <= 0:
+            return []
+        with self._locked(fcntl.LOCK_SH):
+            n = len(self)
+            if n == 0:
+                return []
+            vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, DIM))
+            ids = np.array(np.memmap(self.ids_path, dtype=np.int64, mode="r", shape=(n,)))
+            scores = vectors @ query.astype(np.float32)
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+
+def rank_campaign_prospects(db: Session, campaign_id: str, target_filters: dict, k: int) -> list:
+    """Sync the campaign's index and return its top-k [(prospect pk, similarity)]"""
+    index = CampaignEmbeddingIndex(campaign_id)
+    index.sync(db)
+    return index.top_k(embed_texts([profile_text(target_filters)])[0], k)
+
+
+def _add_feature(vector: np.ndarray, feature: str, weight: float):
+    h = zlib.crc32(feature.encode())
+    vector[h % DIM] += weight if (h >> 16) & 1 else -weight
@@ -0,0 +1,101 @@
+"""
+Per-user event stream (action status, prospect stage, campaign stats)
+
+Producers call emit(db, ...) while they change rows; events are published
+only after that session commits (dropped on rollback), so a client that
+reacts to an event always finds the change in the DB.
+
+Transport: Redis pub/sub channel per user (API + Celery workers), or an
+in-process broadcaster in SYNC_MODE (single node, no Redis).
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "linkedin_agent:events:"
+_PENDING_KEY = "pending_events"
+
+# SYNC_MODE broadcaster: user_id -> {(loop, asyncio.Queue)}
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+_redis = None
+
+
+def emit(db: Session, user_id: str, event_type: str, **data):
+    """Queue an event for publishing when `db` commits"""
+    db.info.setdefault(_PENDING_KEY, []).append({
+        "user_id": user_id,
+        "type": event_type,
+        "data": data,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    })
+
+
+def publish(message: dict):
+    """Publish right away (best effort - a lost event only means a client refreshes later)"""
+    if settings.SYNC_MODE:
+        with _subscribers_lock:
+            targets = list(_subscribers.get(message["user_id"], ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+        return
+
+    global _redis
+    try:
+        if _redis is None:
+            _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=1)
+        _redis.publish(CHANNEL_PREFIX + message["user_id"], json.dumps(message, default=str))
+    except redis.RedisError as e:
+        logger.warning("Event not published (%s): %s", message["type"], e)
+
+
+async def subscribe(user_id: str, heartbeat: float):
+    """Yield a user's events as they arrive; yields None every `heartbeat` idle seconds"""
+    if settings.SYNC_MODE:
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with _subscribers_lock:
+            _subscribers.setdefault(user_id, set()).add(entry)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(entry[1].get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with _subscribers_lock:
+                _subscribers.get(user_id, set()).discard(entry)
+        return
+
+    client = aioredis.Redis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(CHANNEL_PREFIX + user_id)
+        while True:
+            message = await pubsub.get_message(timeout=heartbeat)
+            yield json.loads(message["data"]) if message else None
+    finally:
+        await pubsub.close()
+        await client.close()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for message in session.info.pop(_PENDING_KEY, []):
+        publish(message)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_pending(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,86 @@
+"""
+Re-encrypt stored credentials with the current primary key
+
+Walks the users table in id order, BATCH rows at a time, rotating every
+encrypted column with MultiFernet. Each row is written with a compare-and-set
+on its old ciphertext, so a concurrent /users/configure is never overwritten
+and no table lock is taken. Progress (last user id) is checkpointed to a
+file after every committed batch; a rerun resumes there unless the primary
+key has changed since.
+"""
+
+import json
+import logging
+import os
+
+from cryptography.fernet import InvalidToken
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User
+from app.utils.encryption import primary_key_id, rotate_data
+
+logger = logging.getLogger(__name__)
+
+ENCRYPTED_COLUMNS = ("linkedin_credentials_encrypted", "linkedin_session", "llm_config_encrypted")
+
+
+def reencrypt_users(db: Session, batch_size: int = None, checkpoint_path: str = None) -> dict:
+    batch_size = batch_size or settings.KEY_ROTATION_BATCH_SIZE
+    checkpoint_path = checkpoint_path or settings.KEY_ROTATION_CHECKPOINT
+
+    key_id = primary_key_id()
+    checkpoint = _load_checkpoint(checkpoint_path)
+    last_id = checkpoint["last_id"] if checkpoint.get("key_id") == key_id else 0
+    stats = {"rotated": 0, "skipped": 0, "failed": 0, "resumed_from": last_id}
+
+    while True:
+        rows = db.query(User.id, *(getattr(User, c) for c in ENCRYPTED_COLUMNS)).filter(
+            User.id > last_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        for row in rows:
+            values = {}
+            for column in ENCRYPTED_COLUMNS:
+                old = getattr(row, column)
+                if not old:
+                    continue
+                try:
+                    values[column] = rotate_data(old)
+                except InvalidToken:
+                    logger.warning("Key rotation: user #%s %s matches no configured key", row.id, column)
+                    stats["failed"] += 1
+
+            if not values:
+                continue
+
+            # Compare-and-set: skip the row if it changed since we read it
+            conditions = [User.id == row.id]
+            conditions += [getattr(User, c) == getattr(row, c) for c in values]
+            result = db.execute(update(User).where(*conditions).values(**values))
+            stats["rotated" if result.rowcount else "skipped"] += 1
+
+        db.commit()
+        last_id = rows[-1].id
+        _save_checkpoint(checkpoint_path, {"key_id": key_id, "last_id": last_id})
+
+    _save_checkpoint(checkpoint_path, {"key_id": key_id, "last_id": last_id, "completed": True})
+    return stats
+
+
+def _load_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_checkpoint(path: str, checkpoint: dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)  # Atomic - never a half-written checkpoint
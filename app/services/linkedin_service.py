@@ -4,9 +4,19 @@ Uses user's LinkedIn credentials to perform actions
 """
 
 import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
 from playwright.async_api import async_playwright
 import random
 
+from app.services import metrics, tracing
+from app.utils.profiles import profile_url_from_identifier
+
+logger = logging.getLogger(__name__)
+
+VOYAGER_API = "https://www.linkedin.com/voyager/api"
+
 
 class LinkedInService:
     def __init__(self, credentials: dict):
@@ -14,27 +24,31 @@ class LinkedInService:
         self.password = credentials["password"]
         self.session = credentials.get("session")  # Cookies if already logged in
         self.browser = None
+        self.context = None
         self.page = None
 
+    @tracing.traced("linkedin.login")
     async def login(self):
         """Login to LinkedIn"""
         try:
             playwright = await async_playwright().start()
             self.browser = await playwright.chromium.launch(headless=True)
+            metrics.BROWSERS_OPEN.inc()
             context = await self.browser.new_context(
                 user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             )
+            self.context = context
             
             # Load existing session if available
             if self.session:
                 try:
                     await context.add_cookies(self.session)
                 except Exception as e:
-                    print(f"Could not restore session: {e}")
+                    logger.warning("Could not restore LinkedIn session: %s", e)
                     self.session = None
             
             self.page = await context.new_page()
-            await self.page.goto('https://www.linkedin.com/login', timeout=30000)
+            await self._goto('https://www.linkedin.com/login', timeout=30000)
             
             # If not logged in, perform login
             if not self.session or '/login' in self.page.url:
@@ -62,14 +76,13 @@ class LinkedInService:
                 self.session = await context.cookies()
                 
         except Exception as e:
-            if self.browser:
-                await self.browser.close()
+            await self.close()
             raise ValueError(f"LinkedIn login failed: {str(e)}")
 
     async def send_connection_request(self, profile_url: str, note: str = "") -> dict:
         """Send connection request to prospect"""
         try:
-            await self.page.goto(profile_url)
+            await self._goto(profile_url)
             await self._random_delay(2, 4)
             
             # Find Connect button
@@ -107,7 +120,7 @@ class LinkedInService:
     async def send_message(self, profile_url: str, message: str) -> dict:
         """Send message to connection"""
         try:
-            await self.page.goto(profile_url)
+            await self._goto(profile_url)
             await self._random_delay(2, 4)
             
             # Click Message button
@@ -139,7 +152,7 @@ class LinkedInService:
     async def visit_profile(self, profile_url: str) -> dict:
         """Visit a profile (for engagement/visibility)"""
         try:
-            await self.page.goto(profile_url)
+            await self._goto(profile_url)
             await self._random_delay(3, 6)  # Simulate reading profile
             
             # Scroll down a bit (human-like)
@@ -151,12 +164,204 @@ class LinkedInService:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    async def fetch_sent_invitations(self, page_size: int = 100) -> set:
+        """
+        Get normalized profile URLs of all outstanding sent connection invitations
+        One API call per page instead of one profile visit per prospect
+        """
+        pending = set()
+        start = 0
+
+        while True:
+            data = await self._voyager_get("/relationships/sentInvitationViewsV2", {
+                "invitationType": "CONNECTION",
+                "q": "invitationType",
+                "start": start,
+                "count": page_size
+            })
+            elements = data.get("elements", [])
+
+            for element in elements:
+                identifier = _find_public_identifier(element)
+                if identifier:
+                    pending.add(profile_url_from_identifier(identifier))
+
+            if len(elements) < page_size:
+                break
+
+            start += page_size
+            await self._random_delay(1, 2)
+
+        return pending
+
+    async def fetch_connections(
+        self,
+        since: Optional[datetime] = None,
+        page_size: int = 40,
+        max_pages: int = 25
+    ) -> list:
+        """
+        Get connections newest-first, stopping at the first one made at or before `since`
+        Returns [{profile_url, connected_at}] with normalized profile URLs
+        """
+        connections = []
+        since_ms = int(since.replace(tzinfo=since.tzinfo or timezone.utc).timestamp() * 1000) if since else None
+
+        for page_num in range(max_pages):
+            data = await self._voyager_get("/relationships/dash/connections", {
+                "decorationId": "com.linkedin.voyager.dash.deco.web.mynetwork.ConnectionListWithProfile-16",
+                "q": "search",
+                "sortType": "RECENTLY_ADDED",
+                "start": page_num * page_size,
+                "count": page_size
+            })
+            elements = data.get("elements", [])
+
+            for element in elements:
+                created_ms = element.get("createdAt")
+                if since_ms is not None and created_ms is not None and created_ms <= since_ms:
+                    return connections
+
+                identifier = _find_public_identifier(element)
+                if not identifier:
+                    continue
+
+                connections.append({
+                    "profile_url": profile_url_from_identifier(identifier),
+                    "connected_at": datetime.fromtimestamp(created_ms / 1000, tz=timezone.utc) if created_ms else None
+                })
+
+            if len(elements) < page_size:
+                break
+
+            await self._random_delay(1, 2)
+
+        return connections
+
+    async def fetch_inbox_messages(
+        self,
+        since: Optional[datetime] = None,
+        max_pages: int = 10
+    ) -> dict:
+        """
+        Get inbound messages newer than `since` from 1:1 messaging threads
+        Walks conversations by last activity (newest first) and stops at `since`
+        Returns {messages: [{profile_url, message, sent_at}], newest_activity_at}
+        """
+        since_ms = int(since.replace(tzinfo=since.tzinfo or timezone.utc).timestamp() * 1000) if since else 0
+        me = await self._voyager_get("/me", {})
+        my_identifier = _find_public_identifier(me)
+
+        messages = []
+        newest_ms = None
+        created_before = None
+
+        for _ in range(max_pages):
+            params = {"keyVersion": "LEGACY_INBOX"}
+            if created_before:
+                params["createdBefore"] = created_before
+            data = await self._voyager_get("/messaging/conversations", params)
+            conversations = data.get("elements", [])
+
+            reached_watermark = False
+            for conversation in conversations:
+                last_activity_ms = conversation.get("lastActivityAt") or 0
+                if last_activity_ms <= since_ms:
+                    reached_watermark = True
+                    break
+                newest_ms = max(newest_ms or 0, last_activity_ms)
+
+                participants = conversation.get("participants", [])
+                if len(participants) != 1:
+                    continue  # Group threads aren't prospect replies
+                identifier = _find_public_identifier(participants[0])
+                if not identifier:
+                    continue
+
+                conversation_id = conversation.get("entityUrn", "").split(":")[-1]
+                events = await self._voyager_get(f"/messaging/conversations/{conversation_id}/events", {})
+                for event in events.get("elements", []):
+                    created_ms = event.get("createdAt") or 0
+                    if created_ms <= since_ms:
+                        continue
+                    if _find_public_identifier(event.get("from", {})) in (None, my_identifier):
+                        continue  # Our own outbound message
+                    text = (
+                        event.get("eventContent", {})
+                        .get("com.linkedin.voyager.messaging.event.MessageEvent", {})
+                        .get("attributedBody", {})
+                        .get("text")
+                    )
+                    if text:
+                        messages.append({
+                            "profile_url": profile_url_from_identifier(identifier),
+                            "message": text,
+                            "sent_at": datetime.fromtimestamp(created_ms / 1000, tz=timezone.utc)
+                        })
+                await self._random_delay(0.5, 1)
+
+            if reached_watermark or not conversations:
+                break
+            created_before = conversations[-1].get("lastActivityAt")
+            await self._random_delay(1, 2)
+
+        return {
+            "messages": messages,
+            "newest_activity_at": datetime.fromtimestamp(newest_ms / 1000, tz=timezone.utc) if newest_ms else None
+        }
+
+    async def _voyager_get(self, path: str, params: dict) -> dict:
+        """Call LinkedIn's internal API with the logged-in browser session"""
+        cookies = await self.context.cookies("https://www.linkedin.com")
+        csrf_token = next(
+            (c["value"].strip('"') for c in cookies if c["name"] == "JSESSIONID"),
+            ""
+        )
+
+        resp = await self.context.request.get(
+            f"{VOYAGER_API}{path}",
+            params=params,
+            headers={
+                "csrf-token": csrf_token,
+                "accept": "application/json",
+                "x-restli-protocol-version": "2.0.0"
+            },
+            timeout=30000
+        )
+        if not resp.ok:
+            raise ValueError(f"LinkedIn API error: {resp.status} on {path}")
+        return await resp.json()
+
     async def close(self):
         """Close browser"""
         if self.browser:
-            await self.browser.close()
+            browser, self.browser = self.browser, None
+            metrics.BROWSERS_OPEN.dec()
+            await browser.close()
+
+    async def _goto(self, url: str, **kwargs):
+        with tracing.span("linkedin.page.goto", url=url):
+            return await self.page.goto(url, **kwargs)
 
     async def _random_delay(self, min_sec: float, max_sec: float):
         """Human-like random delay"""
         delay = random.uniform(min_sec, max_sec)
-        await asyncio.sleep(delay)
+        with tracing.span("linkedin.delay", seconds=round(delay, 2)):
+            await asyncio.sleep(delay)
+
+
+def _find_public_identifier(obj) -> Optional[str]:
+    """Find the first `publicIdentifier` in a nested LinkedIn API element"""
+    if isinstance(obj, dict):
+        if isinstance(obj.get("publicIdentifier"), str):
+            return obj["publicIdentifier"]
+        for value in obj.values():
+            found = _find_public_identifier(value)
+            if found:
+                return found
+    elif isinstance(obj, list):
+        for value in obj:
+            found = _find_public_identifier(value)
+            if found:
+                return found
+    return None
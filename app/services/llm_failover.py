@@ -0,0 +1,108 @@
+"""
+Provider failover for LLM calls
+
+- CircuitBreaker: per provider and API key (one tenant's broken or revoked key
+  doesn't cut off everyone else), opens after LLM_BREAKER_FAILURES consecutive
+  provider failures (5xx, overloaded, timeouts - not 429s, which only say this
+  key is over its limit) and lets one trial call through after
+  LLM_BREAKER_RESET_SECONDS
+- Hedge deadline: p95 of recent successful latencies per provider/model/feature,
+  after which LLMService starts the next provider in the fallback chain
+"""
+
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.llm_limiter import hash_key
+
+# Successful-call latencies kept per provider/model/feature
+LATENCY_WINDOW = 200
+# Samples needed before the p95 replaces LLM_HEDGE_DEFAULT_MS
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None  # time.monotonic()
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go to this provider now - only ask right before
+        making the call: in half-open state this claims the single trial, which
+        the call's outcome (or release_trial) must resolve
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()  # (Re)open - a failed trial restarts the timer
+
+    def release_trial(self):
+        """Trial call was cancelled without an outcome"""
+        self.trial_in_flight = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+_breakers = {}
+_latencies = {}
+
+
+def get_breaker(provider: str, api_key: str) -> CircuitBreaker:
+    """Breaker for one provider/API key pair (keyed by hash, never the raw key)"""
+    key = (provider, hash_key(api_key))
+    if key not in _breakers:
+        _breakers[key] = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+    return _breakers[key]
+
+
+def breaker_stats() -> dict:
+    """{"<provider>:<key id>": {state, consecutive_failures}} for every breaker in this process"""
+    return {f"{provider}:{key_id}": breaker.stats() for (provider, key_id), breaker in _breakers.items()}
+
+
+def observe_latency(provider: str, model: str, feature: str, latency_ms: int):
+    key = (provider, model, feature)
+    if key not in _latencies:
+        _latencies[key] = deque(maxlen=LATENCY_WINDOW)
+    _latencies[key].append(latency_ms)
+
+
+def hedge_delay(provider: str, model: str, feature: str) -> float:
+    """Seconds to wait for this provider before hedging to the next one"""
+    samples = _latencies.get((provider, model, feature))
+    if not samples or len(samples) < MIN_LATENCY_SAMPLES:
+        delay_ms = settings.LLM_HEDGE_DEFAULT_MS
+    else:
+        delay_ms = max(settings.LLM_HEDGE_MIN_MS, float(np.percentile(samples, 95)))
+    return delay_ms / 1000
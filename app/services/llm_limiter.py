@@ -0,0 +1,153 @@
+"""
+Per-API-key concurrency limiter for LLM calls
+
+Adapts in-flight concurrency to the provider's rate-limit headers:
+- 429/529 halve the limit and pause the key for `retry-after`
+- Low remaining requests/tokens shrink the limit
+- Successful calls with headroom grow it back by one (AIMD)
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import Optional
+
+from app.config import settings
+
+# Remaining/limit below this fraction counts as "nearly exhausted"
+LOW_HEADROOM = 0.1
+
+
+class KeyLimiter:
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self.waiting = 0
+        self.blocked_until = 0.0  # time.monotonic()
+        self._waiters = deque()
+
+    async def acquire(self):
+        """Wait for a free slot (and for any retry-after pause to pass)"""
+        self.waiting += 1
+        try:
+            while True:
+                pause = self.blocked_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def observe(self, status_code: int, headers) -> Optional[float]:
+        """
+        Adapt the limit to a response
+        Returns the provider's retry-after in seconds, if any
+        """
+        retry_after = _parse_retry_after(headers.get("retry-after"))
+
+        if status_code in (429, 529):
+            self.limit = max(1, self.limit // 2)
+            pause = retry_after if retry_after is not None else 1.0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            return retry_after
+
+        if status_code >= 400:
+            return retry_after
+
+        headroom = _headroom(headers)
+        if headroom is not None and headroom < LOW_HEADROOM:
+            self.limit = max(1, self.limit - 1)
+        elif self.limit < self.max_concurrency:
+            self.limit += 1
+            self._wake()
+
+        return retry_after
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "paused_for": max(0.0, round(self.blocked_until - time.monotonic(), 2))
+        }
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+                free -= 1
+
+
+_limiters = {}
+
+
+def get_limiter(api_key: str) -> KeyLimiter:
+    """Shared limiter for an API key (keyed by hash, never the raw key)"""
+    key_id = hash_key(api_key)
+    if key_id not in _limiters:
+        _limiters[key_id] = KeyLimiter(settings.LLM_MAX_CONCURRENCY_PER_KEY)
+    return _limiters[key_id]
+
+
+def limiter_stats() -> dict:
+    """Stats for every key seen by this process: {key_id: {limit, in_flight, queue_depth, paused_for}}"""
+    return {key_id: limiter.stats() for key_id, limiter in _limiters.items()}
+
+
+def hash_key(api_key: str) -> str:
+    """Stable id for an API key, safe to log and use as a label"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form - fall back to our own backoff
+
+
+def _headroom(headers) -> Optional[float]:
+    """Lowest remaining/limit ratio across request and token budgets (Anthropic + OpenAI)"""
+    pairs = [
+        ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-limit"),
+        ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-limit"),
+        ("x-ratelimit-remaining-requests", "x-ratelimit-limit-requests"),
+        ("x-ratelimit-remaining-tokens", "x-ratelimit-limit-tokens"),
+    ]
+    ratios = []
+    for remaining_header, limit_header in pairs:
+        try:
+            remaining = float(headers.get(remaining_header))
+            limit = float(headers.get(limit_header))
+        except (TypeError, ValueError):
+            continue
+        if limit > 0:
+            ratios.append(remaining / limit)
+    return min(ratios) if ratios else None
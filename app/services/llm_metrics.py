@@ -0,0 +1,138 @@
+"""
+LLM call metrics sink
+
+LLMService records one row per call (provider, model, feature, latency, tokens,
+user/campaign). Rows are buffered in memory and written to the llm_calls table
+in batches by a background thread, so the call path never waits on the DB.
+"""
+
+import atexit
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_buffer = []
+_lock = threading.Lock()
+_wake = threading.Event()
+_flusher = None
+
+
+def record(**fields):
+    """Queue one call record (non-blocking)"""
+    fields.setdefault("created_at", datetime.now(timezone.utc))
+
+    with _lock:
+        _buffer.append(fields)
+        if len(_buffer) > settings.LLM_METRICS_MAX_BUFFER:
+            del _buffer[:len(_buffer) - settings.LLM_METRICS_MAX_BUFFER]  # DB down - drop oldest
+        full = len(_buffer) >= settings.LLM_METRICS_FLUSH_SIZE
+
+    _ensure_flusher()
+    if full:
+        _wake.set()
+
+
+def flush():
+    """Write buffered records in one bulk insert"""
+    global _buffer
+    with _lock:
+        pending, _buffer = _buffer, []
+    if not pending:
+        return  # Before importing app.database: an idle process exiting must not create the engine / DB file
+
+    from app.database import SessionLocal
+    from app.models import LLMCall
+
+    db = SessionLocal()
+    try:
+        db.bulk_insert_mappings(LLMCall, pending)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error("LLM metrics flush failed (%d records): %s", len(pending), e)
+        with _lock:
+            _buffer = pending + _buffer  # Retry next round (capped by record())
+    finally:
+        db.close()
+
+
+def summarize(rows: list, group_keys: tuple = ("feature", "model")) -> list:
+    """
+    Aggregate call rows (objects with latency_ms, token columns and group_keys)
+    into [{<group keys>, calls, errors, p50/p95 latency, token totals}]
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(getattr(row, k) for k in group_keys), []).append(row)
+
+    summary = []
+    for key, calls in sorted(groups.items(), key=lambda item: -len(item[1])):
+        latencies = np.array([c.latency_ms for c in calls], dtype=np.float64)
+        summary.append({
+            **dict(zip(group_keys, key)),
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if not c.success),
+            "p50_latency_ms": round(float(np.percentile(latencies, 50)), 1),
+            "p95_latency_ms": round(float(np.percentile(latencies, 95)), 1),
+            "input_tokens": sum(c.input_tokens or 0 for c in calls),
+            "output_tokens": sum(c.output_tokens or 0 for c in calls),
+            "cache_read_tokens": sum(c.cache_read_tokens or 0 for c in calls),
+            "cache_creation_tokens": sum(c.cache_creation_tokens or 0 for c in calls)
+        })
+    return summary
+
+
+def usage_report(db, days: int = 7, campaign_id: str = None, user_id: str = None) -> dict:
+    """
+    p50/p95 latency and token totals per feature/model over the last `days`
+    User-level reports (no campaign_id) are also broken down per campaign
+    """
+    from app.models import LLMCall
+
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    query = db.query(
+        LLMCall.campaign_id, LLMCall.feature, LLMCall.provider, LLMCall.model,
+        LLMCall.latency_ms, LLMCall.success, LLMCall.input_tokens, LLMCall.output_tokens,
+        LLMCall.cache_read_tokens, LLMCall.cache_creation_tokens
+    ).filter(LLMCall.created_at >= since)
+    if campaign_id:
+        query = query.filter(LLMCall.campaign_id == campaign_id)
+    if user_id:
+        query = query.filter(LLMCall.user_id == user_id)
+
+    rows = query.all()
+    report = {
+        "days": days,
+        "total_calls": len(rows),
+        "by_feature": summarize(rows, ("feature", "provider", "model"))
+    }
+    if not campaign_id:
+        report["by_campaign"] = summarize(rows, ("campaign_id",))
+    return report
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_run, name="llm-metrics-flusher", daemon=True)
+        _flusher.start()
+
+
+def _run():
+    while True:
+        _wake.wait(settings.LLM_METRICS_FLUSH_SECONDS)
+        _wake.clear()
+        flush()
+
+
+atexit.register(flush)
@@ -2,38 +2,149 @@
 LLM Service — User's own API key for personalization
 """
 
+import asyncio
 import httpx
 import json
-import re
+import random
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+from app.config import settings
+from app.services import llm_failover, llm_metrics, metrics, tracing
+from app.services.llm_limiter import get_limiter
+
+# Rate limited (429), overloaded (529) and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504, 529}
+
+
+class LLMRateLimitError(ValueError):
+    """Provider kept rate limiting (429) / overloaded (529) after all retries"""
+
+    def __init__(self, message: str, status_code: int = 429):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMAPIError(ValueError):
+    """Non-retryable error response from the provider"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Static prompt prefixes - identical across calls so providers can cache them.
+# Anthropic only caches a prefix of at least ANTHROPIC_CACHE_MIN_TOKENS (shorter
+# cache_control markers are ignored), so the marker is only sent once the prefix
+# - instructions + campaign criteria - is long enough; these instructions alone
+# (~60-90 tokens) are not. OpenAI caches automatically from 1024 tokens.
+ANTHROPIC_CACHE_MIN_TOKENS = 1024
+ANTHROPIC_HAIKU_CACHE_MIN_TOKENS = 2048
+CHARS_PER_TOKEN = 4  # Conservative for English prose; JSON criteria tokenize denser
+
+CONNECTION_NOTE_INSTRUCTIONS = """You are a friendly professional reaching out on LinkedIn.
+
+Write a brief, genuine connection request note (max 300 characters) that:
+- Mentions something specific about their profile
+- Is friendly and conversational
+- Doesn't sound salesy or AI-generated"""
+
+FIRST_MESSAGE_INSTRUCTIONS = """You are a friendly professional following up with a new LinkedIn connection.
+
+Write a friendly first message (max 500 characters) that:
+- Thanks them for connecting
+- Asks an open-ended question related to their work
+- Is conversational, not formal"""
+
+TEMPLATE_SLOT_INSTRUCTIONS = """You personalize LinkedIn outreach templates written by the sender.
+
+Write ONE short sentence (max 150 characters) to fill the template's AI slot:
+- References something specific about the prospect
+- Reads naturally in the template around it
+- No greeting or sign-off, the template already has them"""
+
+SCORING_INSTRUCTIONS = """Score LinkedIn prospects as leads against the campaign's target criteria.
+
+Return ONLY valid JSON (no markdown):
+{
+  "score": 1-10,
+  "reasoning": "One sentence why",
+  "recommended_hook": "Conversation starter"
+}"""
+
+class ProspectScore(BaseModel):
+    """Validated result of score_prospect"""
+    score: int = Field(..., ge=1, le=10)
+    reasoning: str
+    recommended_hook: str = ""
+
+
+# Structured output for scoring: Anthropic forced tool call / OpenAI strict JSON schema
+SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer", "description": "Lead score from 1 (poor fit) to 10 (perfect fit)"},
+        "reasoning": {"type": "string", "description": "One sentence why"},
+        "recommended_hook": {"type": "string", "description": "Conversation starter"}
+    },
+    "required": ["score", "reasoning", "recommended_hook"],
+    "additionalProperties": False
+}
+
+SCORE_TOOL = {
+    "name": "record_prospect_score",
+    "description": "Record the lead score for this prospect",
+    "input_schema": SCORE_SCHEMA
+}
+
+SCORE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "prospect_score", "strict": True, "schema": SCORE_SCHEMA}
+}
+
+# Token usage of the call in progress (per asyncio task, so concurrent calls
+# on one LLMService don't mix their numbers)
+_call_usage: ContextVar[Optional[dict]] = ContextVar("llm_call_usage", default=None)
 
 
 class LLMService:
-    def __init__(self, llm_config: dict):
+    def __init__(self, llm_config: dict, user_id: str = None, campaign_id: str = None):
         self.provider = llm_config["type"]
         self.model = llm_config["model"]
         self.api_key = llm_config["api_key"]
+        
+        # Attribution for call metrics (llm_calls table)
+        self.user_id = user_id
+        self.campaign_id = campaign_id
+        
+        # Optional fallback chain (llm_config["fallbacks"]), hedged by _generate
+        self.fallbacks = [
+            LLMService(fallback, user_id, campaign_id)
+            for fallback in llm_config.get("fallbacks") or []
+        ]
+        
+        # Token usage: {input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens}
+        self.last_usage = {}
+        self.usage_totals = {}
 
     async def generate_connection_note(self, prospect: dict) -> str:
         """Generate personalized connection request"""
         
         prompt = f"""
-You are a friendly professional reaching out on LinkedIn.
-
 Prospect information:
 - Name: {prospect.get('full_name', 'Unknown')}
 - Title: {prospect.get('title', 'Unknown')}
 - Company: {prospect.get('company', 'Unknown')}
 - Headline: {prospect.get('headline', '')}
 
-Write a brief, genuine connection request note (max 300 characters) that:
-- Mentions something specific about their profile
-- Is friendly and conversational
-- Doesn't sound salesy or AI-generated
-
 Just the note, no extra text:
 """
         
-        return await self._generate(prompt, max_tokens=100)
+        return await self._generate(prompt, max_tokens=100, system=CONNECTION_NOTE_INSTRUCTIONS, feature="note")
 
     async def generate_first_message(self, prospect: dict) -> str:
         """Generate first message after connection accepted"""
@@ -45,99 +156,667 @@ Their profile:
 - Title: {prospect.get('title', 'Unknown')}
 - Company: {prospect.get('company', 'Unknown')}
 
-Write a friendly first message (max 500 characters) that:
-- Thanks them for connecting
-- Asks an open-ended question related to their work
-- Is conversational, not formal
-
 Just the message:
 """
         
-        return await self._generate(prompt, max_tokens=150)
+        return await self._generate(prompt, max_tokens=150, system=FIRST_MESSAGE_INSTRUCTIONS, feature="message")
 
-    async def score_prospect(self, prospect: dict, target_criteria: dict) -> dict:
-        """Score prospect as a lead (1-10)"""
+    async def generate_template_slot(self, prospect: dict, template: str) -> str:
+        """Fill the single AI slot of a campaign template (one short sentence)"""
         
         prompt = f"""
-Score this LinkedIn prospect as a lead.
+Template: {template}
 
 Prospect:
-- {prospect.get('full_name')}, {prospect.get('title')} at {prospect.get('company')}
-- Headline: {prospect.get('headline', 'N/A')}
-
-Target criteria:
-- Looking for: {target_criteria.get('title', 'professionals')}
-- Industry: {target_criteria.get('industry', 'any')}
+- Name: {prospect.get('full_name', 'Unknown')}
+- Title: {prospect.get('title', 'Unknown')}
+- Company: {prospect.get('company', 'Unknown')}
+- Headline: {prospect.get('headline', '')}
 
-Return ONLY valid JSON (no markdown):
-{{
-  "score": 1-10,
-  "reasoning": "One sentence why",
-  "recommended_hook": "Conversation starter"
-}}
+Just the sentence:
 """
         
-        response = await self._generate(prompt, max_tokens=200)
-        return _parse_json(response)
+        return (await self._generate(prompt, max_tokens=60, system=TEMPLATE_SLOT_INSTRUCTIONS, feature="template_slot")).strip()
 
-    async def _generate(self, prompt: str, max_tokens: int = 500) -> str:
-        if self.provider == "anthropic":
-            return await self._call_anthropic(prompt, max_tokens)
-        elif self.provider == "openai":
-            return await self._call_openai(prompt, max_tokens)
-        else:
-            raise ValueError(f"Unsupported provider: {self.provider}")
+    async def score_prospect(self, prospect: dict, target_criteria: dict) -> dict:
+        """
+        Score prospect as a lead (1-10)
+        Uses provider-native structured output; models without it (HTTP 400)
+        fall back to a streamed text answer parsed incrementally
+        """
+        prompt = _scoring_prompt(prospect)
+        system = _scoring_prefix(target_criteria)
+        
+        try:
+            raw = await self._generate(prompt, max_tokens=200, system=system, structured=True, feature="score")
+            mode = "structured"
+        except LLMAPIError as e:
+            if e.status_code != 400:
+                raise
+            raw = await self._stream_json(prompt, max_tokens=200, system=system, feature="score")
+            mode = "stream"
+        
+        try:
+            if isinstance(raw, str):
+                raw = json.loads(raw)
+            result = ProspectScore.model_validate(raw)
+        except (ValueError, TypeError, ValidationError) as e:
+            metrics.observe_score_parse(mode, ok=False)
+            raise ValueError(f"LLM returned an invalid score: {e}")
+        
+        metrics.observe_score_parse(mode, ok=True)
+        return result.model_dump()
 
-    async def _call_anthropic(self, prompt, max_tokens):
+    @tracing.traced("llm.generate")
+    async def _generate(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        system: Optional[str] = None,
+        structured: bool = False,
+        feature: str = "other"
+    ):
+        """
+        `system` is the static part of the prompt (instructions + campaign context)
+        It goes first and, on Anthropic, is marked cacheable once it is long
+        enough to be cached (_cache_min_tokens), so repeated calls with the same
+        prefix only pay for the prospect-specific `prompt`
+        `structured` requests a score object (SCORE_SCHEMA) instead of free text
+        `feature` labels the call in the metrics (note, message, score, ...)
+        
+        With fallbacks configured, a provider that hasn't answered within its
+        p95 latency (or has failed) is hedged with the next one in the chain;
+        the first answer wins and the other calls are cancelled. Providers with
+        an open circuit breaker are skipped; a breaker is only consulted when
+        its provider is actually about to be called.
+        """
+        tracing.annotate(feature=feature, structured=structured)
+        if not self.fallbacks:
+            if not self._breaker().allow():
+                raise LLMAPIError(f"{self.provider} unavailable (circuit open) and no fallback available", 503)
+            return await self._generate_once(prompt, max_tokens, system, structured, feature)
+        
+        tasks = {}
+        trials = set()  # Tasks holding a half-open breaker's trial
+        errors = []
+        remaining = iter([self, *self.fallbacks])
+        
+        def launch():
+            for svc in remaining:
+                breaker = svc._breaker()
+                trial = breaker.state == "half_open"
+                if not breaker.allow():
+                    continue
+                task = asyncio.create_task(svc._generate_once(prompt, max_tokens, system, structured, feature))
+                tasks[task] = svc
+                if trial:
+                    trials.add(task)
+                return svc
+            return None
+        
+        current = launch()
+        if current is None:
+            raise LLMAPIError(f"{self.provider} unavailable (circuit open) and no fallback available", 503)
         try:
-            async with httpx.AsyncClient(timeout=60) as client:
-                resp = await client.post(
-                    "https://api.anthropic.com/v1/messages",
-                    headers={
-                        "x-api-key": self.api_key,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "max_tokens": max_tokens,
-                        "messages": [{"role": "user", "content": prompt}]
-                    }
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                if "content" not in data or len(data["content"]) == 0:
-                    raise ValueError("Empty response from Anthropic API")
-                return data["content"][0]["text"]
+            while tasks:
+                deadline = llm_failover.hedge_delay(current.provider, current.model, feature)
+                done, _ = await asyncio.wait(tasks, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    current = launch() or current  # Slow - hedge with the next provider
+                    continue
+                
+                for task in done:
+                    tasks.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                    current = launch() or current  # Failed - fail over immediately
+            
+            raise errors[0]
+        finally:
+            for task, svc in tasks.items():
+                task.cancel()
+                if task in trials:
+                    svc._breaker().release_trial()  # A task cancelled before it started never reaches _track
+
+    async def _generate_once(self, prompt, max_tokens, system, structured, feature):
+        """One call to this service's own provider"""
+        with tracing.span("llm.call", provider=self.provider, model=self.model, feature=feature):
+            async with self._track(feature):
+                if self.provider == "anthropic":
+                    return await self._call_anthropic(prompt, max_tokens, system, structured)
+                elif self.provider == "openai":
+                    return await self._call_openai(prompt, max_tokens, system, structured)
+                else:
+                    raise ValueError(f"Unsupported provider: {self.provider}")
+
+    async def _call_anthropic(self, prompt, max_tokens, system=None, structured=False):
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if system:
+            payload["system"] = _anthropic_system(system, self.model)
+        if structured:
+            payload["tools"] = [SCORE_TOOL]
+            payload["tool_choice"] = {"type": "tool", "name": SCORE_TOOL["name"]}
+        
+        try:
+            data = await self._post(
+                f"{settings.ANTHROPIC_BASE_URL}/v1/messages",
+                headers=self._headers(),
+                payload=payload
+            )
+            if "content" not in data or len(data["content"]) == 0:
+                raise ValueError("Empty response from Anthropic API")
+            
+            usage = data.get("usage", {})
+            self._record_usage({
+                "input_tokens": usage.get("input_tokens", 0),
+                "output_tokens": usage.get("output_tokens", 0),
+                "cache_read_tokens": usage.get("cache_read_input_tokens", 0) or 0,
+                "cache_creation_tokens": usage.get("cache_creation_input_tokens", 0) or 0
+            })
+            if structured:
+                return next((b["input"] for b in data["content"] if b.get("type") == "tool_use"), None)
+            return data["content"][0]["text"]
+        except (LLMRateLimitError, LLMAPIError):
+            raise
+        except httpx.HTTPStatusError as e:
+            raise LLMAPIError(
+                f"Anthropic API error: {e.response.status_code} - {e.response.text}",
+                e.response.status_code
+            )
+        except Exception as e:
+            raise ValueError(f"LLM generation failed: {str(e)}")
+
+    async def _call_openai(self, prompt, max_tokens, system=None, structured=False):
+        # OpenAI caches long shared prefixes automatically - system message goes first
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+        
+        payload = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": messages
+        }
+        if structured:
+            payload["response_format"] = SCORE_RESPONSE_FORMAT
+        
+        try:
+            data = await self._post(
+                f"{settings.OPENAI_BASE_URL}/v1/chat/completions",
+                headers=self._headers(),
+                payload=payload
+            )
+            if "choices" not in data or len(data["choices"]) == 0:
+                raise ValueError("Empty response from OpenAI API")
+            
+            usage = data.get("usage", {})
+            self._record_usage({
+                "input_tokens": usage.get("prompt_tokens", 0),
+                "output_tokens": usage.get("completion_tokens", 0),
+                "cache_read_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0,
+                "cache_creation_tokens": 0
+            })
+            return data["choices"][0]["message"]["content"]
+        except (LLMRateLimitError, LLMAPIError):
+            raise
         except httpx.HTTPStatusError as e:
-            raise ValueError(f"Anthropic API error: {e.response.status_code} - {e.response.text}")
+            raise LLMAPIError(
+                f"OpenAI API error: {e.response.status_code} - {e.response.text}",
+                e.response.status_code
+            )
         except Exception as e:
             raise ValueError(f"LLM generation failed: {str(e)}")
 
-    async def _call_openai(self, prompt, max_tokens):
+    async def _stream_json(
+        self,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str] = None,
+        feature: str = "other"
+    ) -> dict:
+        """
+        Stream a free-text completion and stop reading as soon as the first
+        complete JSON object has arrived - trailing chatter is never downloaded
+        """
+        async with self._track(feature):
+            return await self._stream_json_call(prompt, max_tokens, system)
+
+    async def _stream_json_call(self, prompt: str, max_tokens: int, system: Optional[str]) -> dict:
+        usage = {"input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "cache_creation_tokens": 0}
+        
+        if self.provider == "anthropic":
+            url = f"{settings.ANTHROPIC_BASE_URL}/v1/messages"
+            payload = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "stream": True,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+            if system:
+                payload["system"] = _anthropic_system(system, self.model)
+        elif self.provider == "openai":
+            url = f"{settings.OPENAI_BASE_URL}/v1/chat/completions"
+            messages = [{"role": "user", "content": prompt}]
+            if system:
+                messages.insert(0, {"role": "system", "content": system})
+            payload = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "stream": True,
+                "stream_options": {"include_usage": True},
+                "messages": messages
+            }
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+        
+        parser = JSONObjectParser()
+        limiter = get_limiter(self.api_key)
+        await limiter.acquire()
         try:
             async with httpx.AsyncClient(timeout=60) as client:
-                resp = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
+                async with client.stream("POST", url, headers=self._headers(), json=payload) as resp:
+                    limiter.observe(resp.status_code, resp.headers)
+                    if resp.status_code >= 400:
+                        await resp.aread()
+                        raise LLMAPIError(
+                            f"{self.provider} API error: {resp.status_code} - {resp.text}",
+                            resp.status_code
+                        )
+                    
+                    async for line in resp.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        chunk = line[5:].strip()
+                        if chunk == "[DONE]":
+                            break
+                        if parser.feed(_stream_delta(self.provider, json.loads(chunk), usage)):
+                            break  # Object complete - stop reading
+        finally:
+            limiter.release()
+        
+        self._record_usage(usage)
+        if parser.result is None:
+            metrics.observe_score_parse("stream", ok=False)
+            raise ValueError("LLM did not return valid JSON")
+        return parser.result
+
+    def _record_usage(self, usage: dict):
+        """Keep the last call's token usage and running totals for this service"""
+        self.last_usage = usage
+        for key, value in usage.items():
+            self.usage_totals[key] = self.usage_totals.get(key, 0) + value
+        
+        current = _call_usage.get()
+        if current is not None:
+            current.update(usage)
+
+    @asynccontextmanager
+    async def _track(self, feature: str):
+        """
+        Time one logical call (including limiter wait and retries), queue its
+        metrics and feed the provider's circuit breaker and hedge latency
+        Calls cancelled by a hedge record nothing
+        """
+        usage = {}
+        token = _call_usage.set(usage)
+        started = time.perf_counter()
+        breaker = self._breaker()
+        try:
+            yield
+        except asyncio.CancelledError:
+            _call_usage.reset(token)
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            _call_usage.reset(token)
+            if _is_provider_failure(e):
+                breaker.record_failure()
+            elif _is_rate_limited(e):
+                breaker.release_trial()  # Only this key is over its limit - says nothing about the provider
+            else:
+                breaker.record_success()  # Provider answered (e.g. 400) - it's up
+            self._record_call(feature, started, usage, success=False)
+            raise
+        
+        _call_usage.reset(token)
+        breaker.record_success()
+        latency_ms = self._record_call(feature, started, usage, success=True)
+        llm_failover.observe_latency(self.provider, self.model, feature, latency_ms)
+
+    def _breaker(self) -> llm_failover.CircuitBreaker:
+        return llm_failover.get_breaker(self.provider, self.api_key)
+
+    def _record_call(self, feature: str, started: float, usage: dict, success: bool) -> int:
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        llm_metrics.record(
+            provider=self.provider,
+            model=self.model,
+            feature=feature,
+            user_id=self.user_id,
+            campaign_id=self.campaign_id,
+            latency_ms=latency_ms,
+            success=success,
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            cache_read_tokens=usage.get("cache_read_tokens", 0),
+            cache_creation_tokens=usage.get("cache_creation_tokens", 0)
+        )
+        metrics.observe_llm(self.provider, feature, success, latency_ms / 1000)
+        return latency_ms
+
+    async def _post(self, url: str, headers: dict, payload: dict) -> dict:
+        resp = await self._request("POST", url, headers, json=payload)
+        return resp.json()
+
+    async def _request(self, method: str, url: str, headers: dict, **kwargs) -> httpx.Response:
+        """
+        Send through the per-key limiter, retrying 429/529/5xx with backoff
+        Honors retry-after; raises LLMRateLimitError when retries run out on 429/529
+        """
+        limiter = get_limiter(self.api_key)
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            await limiter.acquire()
+            try:
+                async with httpx.AsyncClient(timeout=60) as client:
+                    resp = await client.request(method, url, headers=headers, **kwargs)
+                retry_after = limiter.observe(resp.status_code, resp.headers)
+            finally:
+                limiter.release()
+
+            if resp.status_code not in RETRYABLE_STATUS:
+                resp.raise_for_status()
+                return resp
+
+            if attempt == settings.LLM_MAX_RETRIES:
+                break
+
+            # Exponential backoff with jitter, unless the provider told us how long
+            delay = retry_after if retry_after is not None else min(30, 2 ** attempt) + random.uniform(0, 1)
+            await asyncio.sleep(delay)
+
+        if resp.status_code in (429, 529):
+            raise LLMRateLimitError(
+                f"{self.provider} rate limited ({resp.status_code}) after {settings.LLM_MAX_RETRIES} retries",
+                resp.status_code
+            )
+        resp.raise_for_status()
+
+    def _headers(self) -> dict:
+        if self.provider == "anthropic":
+            return {
+                "x-api-key": self.api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            }
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    # --- Batch mode (offline bulk scoring, Anthropic Message Batches / OpenAI Batch API) ---
+
+    async def submit_scoring_batch(self, prospects: dict, target_criteria: dict) -> str:
+        """
+        Submit one scoring request per prospect as a provider batch
+        `prospects` maps custom_id -> prospect dict; returns the provider batch id
+        """
+        system = _scoring_prefix(target_criteria)
+        
+        if self.provider == "anthropic":
+            requests = [
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": 200,
+                        "system": _anthropic_system(system, self.model),
+                        "messages": [{"role": "user", "content": _scoring_prompt(prospect)}],
+                        "tools": [SCORE_TOOL],
+                        "tool_choice": {"type": "tool", "name": SCORE_TOOL["name"]}
+                    }
+                }
+                for custom_id, prospect in prospects.items()
+            ]
+            data = await self._post(
+                f"{settings.ANTHROPIC_BASE_URL}/v1/messages/batches",
+                headers=self._headers(),
+                payload={"requests": requests}
+            )
+            return data["id"]
+        
+        elif self.provider == "openai":
+            lines = [
+                json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
                         "model": self.model,
-                        "max_tokens": max_tokens,
-                        "messages": [{"role": "user", "content": prompt}]
+                        "max_tokens": 200,
+                        "messages": [
+                            {"role": "system", "content": system},
+                            {"role": "user", "content": _scoring_prompt(prospect)}
+                        ],
+                        "response_format": SCORE_RESPONSE_FORMAT
                     }
-                )
+                })
+                for custom_id, prospect in prospects.items()
+            ]
+            upload = await self._request(
+                "POST",
+                f"{settings.OPENAI_BASE_URL}/v1/files",
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                data={"purpose": "batch"},
+                files={"file": ("scoring.jsonl", "\n".join(lines).encode(), "application/jsonl")}
+            )
+            data = await self._post(
+                f"{settings.OPENAI_BASE_URL}/v1/batches",
+                headers=self._headers(),
+                payload={
+                    "input_file_id": upload.json()["id"],
+                    "endpoint": "/v1/chat/completions",
+                    "completion_window": "24h"
+                }
+            )
+            return data["id"]
+        
+        raise ValueError(f"Unsupported provider: {self.provider}")
+
+    async def get_batch_status(self, batch_id: str) -> dict:
+        """
+        Returns {status: in_progress | ended | failed, results_ref}
+        `results_ref` is what fetch_batch_results needs once the batch has ended
+        """
+        if self.provider == "anthropic":
+            resp = await self._request(
+                "GET", f"{settings.ANTHROPIC_BASE_URL}/v1/messages/batches/{batch_id}", self._headers()
+            )
+            data = resp.json()
+            status = "ended" if data.get("processing_status") == "ended" else "in_progress"
+            return {"status": status, "results_ref": data.get("results_url")}
+        
+        elif self.provider == "openai":
+            resp = await self._request(
+                "GET", f"{settings.OPENAI_BASE_URL}/v1/batches/{batch_id}", self._headers()
+            )
+            data = resp.json()
+            if data.get("status") == "completed":
+                return {"status": "ended", "results_ref": data.get("output_file_id")}
+            if data.get("status") in ("failed", "expired", "cancelled"):
+                return {"status": "failed", "results_ref": data.get("output_file_id")}
+            return {"status": "in_progress", "results_ref": None}
+        
+        raise ValueError(f"Unsupported provider: {self.provider}")
+
+    async def fetch_batch_results(self, results_ref: str):
+        """
+        Stream (custom_id, score dict | None) pairs from a finished batch
+        Results are read line by line, never loaded whole
+        """
+        if self.provider == "anthropic":
+            url = results_ref
+        elif self.provider == "openai":
+            url = f"{settings.OPENAI_BASE_URL}/v1/files/{results_ref}/content"
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+        
+        async with httpx.AsyncClient(timeout=300) as client:
+            async with client.stream("GET", url, headers=self._headers()) as resp:
                 resp.raise_for_status()
-                data = resp.json()
-                if "choices" not in data or len(data["choices"]) == 0:
-                    raise ValueError("Empty response from OpenAI API")
-                return data["choices"][0]["message"]["content"]
-        except httpx.HTTPStatusError as e:
-            raise ValueError(f"OpenAI API error: {e.response.status_code} - {e.response.text}")
-        except Exception as e:
-            raise ValueError(f"LLM generation failed: {str(e)}")
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    yield record.get("custom_id"), _batch_result_score(self.provider, record)
+
+
+def _is_provider_failure(error: Exception) -> bool:
+    """
+    Errors that say the provider is unhealthy (vs. a bad request or a key over
+    its rate limit) - these trip the breaker
+    """
+    if isinstance(error, (LLMRateLimitError, LLMAPIError)):
+        return error.status_code >= 500 or error.status_code == 408
+    # Timeouts / connection errors (raised directly or wrapped by _call_*)
+    return isinstance(error, httpx.TransportError) or isinstance(error.__context__, httpx.TransportError)
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """429 - this API key is over its limit"""
+    return isinstance(error, (LLMRateLimitError, LLMAPIError)) and error.status_code == 429
+
+
+def _scoring_prompt(prospect: dict) -> str:
+    """Variable, per-prospect suffix of the scoring prompt"""
+    return f"""
+Prospect:
+- {prospect.get('full_name')}, {prospect.get('title')} at {prospect.get('company')}
+- Headline: {prospect.get('headline', 'N/A')}
+"""
+
+
+def _batch_result_score(provider: str, record: dict):
+    """Validated score from one batch result line, or None if that request failed"""
+    try:
+        if provider == "anthropic":
+            result = record.get("result", {})
+            if result.get("type") != "succeeded":
+                return None
+            content = result["message"]["content"]
+            raw = next((b["input"] for b in content if b.get("type") == "tool_use"), None)
+            if raw is None:
+                raw = _parse_json(content[0]["text"])
+        else:
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                return None
+            raw = json.loads(response["body"]["choices"][0]["message"]["content"])
+        score = ProspectScore.model_validate(raw).model_dump()
+    except (KeyError, IndexError, TypeError, ValueError, ValidationError):
+        metrics.observe_score_parse("batch", ok=False)
+        return None
+    
+    metrics.observe_score_parse("batch", ok=True)
+    return score
+
+
+def _stream_delta(provider: str, event: dict, usage: dict) -> str:
+    """Text carried by one streaming event; token usage is collected into `usage`"""
+    if provider == "anthropic":
+        if event.get("type") == "message_start":
+            start_usage = event.get("message", {}).get("usage", {})
+            usage["input_tokens"] = start_usage.get("input_tokens", 0)
+            usage["cache_read_tokens"] = start_usage.get("cache_read_input_tokens", 0) or 0
+            usage["cache_creation_tokens"] = start_usage.get("cache_creation_input_tokens", 0) or 0
+        elif event.get("type") == "message_delta":
+            usage["output_tokens"] = event.get("usage", {}).get("output_tokens", 0)
+        elif event.get("type") == "content_block_delta":
+            return event.get("delta", {}).get("text", "")
+        return ""
+    
+    if event.get("usage"):
+        usage["input_tokens"] = event["usage"].get("prompt_tokens", 0)
+        usage["output_tokens"] = event["usage"].get("completion_tokens", 0)
+    choices = event.get("choices") or []
+    return (choices[0].get("delta", {}).get("content") or "") if choices else ""
+
+
+class JSONObjectParser:
+    """
+    Incremental scanner for the first complete top-level JSON object in a text stream
+    Single pass over the input (no regex backtracking); feed() returns True once
+    an object has been parsed into `result`
+    """
+
+    def __init__(self):
+        self.result = None
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> bool:
+        if self.result is not None:
+            return True
+        
+        for ch in text:
+            if self._depth == 0:
+                if ch == "{":
+                    self._buffer = [ch]
+                    self._depth = 1
+                continue
+            
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        self.result = json.loads("".join(self._buffer))
+                        return True
+                    except json.JSONDecodeError:
+                        self._buffer = []  # Braces in prose - keep scanning
+        
+        return False
+
+
+def _scoring_prefix(target_criteria: dict) -> str:
+    """Scoring instructions + campaign criteria, byte-identical for every prospect in a campaign"""
+    return f"""{SCORING_INSTRUCTIONS}
+
+Target criteria:
+- Looking for: {target_criteria.get('title', 'professionals')}
+- Industry: {target_criteria.get('industry', 'any')}
+- All campaign filters: {json.dumps(target_criteria, sort_keys=True)}"""
+
+
+def _cache_min_tokens(model: str) -> int:
+    """Shortest prefix Anthropic will cache for `model`"""
+    return ANTHROPIC_HAIKU_CACHE_MIN_TOKENS if "haiku" in model.lower() else ANTHROPIC_CACHE_MIN_TOKENS
+
+
+def _anthropic_system(system: str, model: str) -> list:
+    """System block, marked cacheable only when the prefix reaches the model's minimum"""
+    block = {"type": "text", "text": system}
+    if len(system) // CHARS_PER_TOKEN >= _cache_min_tokens(model):
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
 
 
 def _parse_json(text: str) -> dict:
@@ -145,8 +824,8 @@ def _parse_json(text: str) -> dict:
     try:
         return json.loads(text)
     except json.JSONDecodeError:
-        # Try to find JSON in response
-        match = re.search(r'\{.*\}', text, re.DOTALL)
-        if match:
-            return json.loads(match.group())
+        # Find the first complete object in the response
+        parser = JSONObjectParser()
+        if parser.feed(text):
+            return parser.result
         raise ValueError("LLM did not return valid JSON")
@@ -0,0 +1,203 @@
+"""
+Prometheus metrics
+
+Metric objects are module-level and updated in place (cheap: a lock and an
+add). The API serves them on /metrics. Celery workers record into the same
+metrics; with PROMETHEUS_MULTIPROC_DIR set, every process (API workers,
+Celery prefork children) writes to shared mmap files there and /metrics
+aggregates them.
+
+Queue depth and the LLM limiter state are read at scrape time rather than
+tracked. The limiter lives in each process's memory, so in multiprocess mode
+/metrics shows the API process's keys only.
+"""
+
+import os
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, func
+
+from app.config import settings
+
+# prometheus_client picks its value storage at import, so the multiprocess
+# directory has to be in the environment first
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(settings.PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "API request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the SQLAlchemy pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use", "Pooled DB connections currently checked out",
+    multiprocess_mode="livesum"
+)
+ACTION_DURATION = Histogram(
+    "action_execution_duration_seconds", "execute_action wall time by action type and outcome",
+    ["action_type", "outcome"],
+    buckets=(1, 2.5, 5, 10, 20, 30, 60, 90, 120, 300)
+)
+BROWSERS_OPEN = Gauge(
+    "linkedin_browsers_open", "Playwright browsers currently launched",
+    multiprocess_mode="livesum"
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "LLM call latency by provider and feature",
+    ["provider", "feature", "success"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+SCORE_PARSE_RESULTS = Counter(
+    "llm_score_parse_total", "Prospect score responses by how they were parsed and whether they validated",
+    ["mode", "outcome"]
+)
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds", "Celery task run time by task and final state",
+    ["task", "state"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+)
+
+# Action.status after execute_action -> outcome label
+ACTION_OUTCOMES = {"completed": "completed", "failed": "failed", "pending": "retry"}
+
+
+def observe_action(action_type: str, status: str, seconds: float):
+    ACTION_DURATION.labels(action_type, ACTION_OUTCOMES.get(status, status or "unknown")).observe(seconds)
+
+
+def observe_llm(provider: str, feature: str, success: bool, seconds: float):
+    LLM_LATENCY.labels(provider, feature, "true" if success else "false").observe(seconds)
+
+
+def observe_score_parse(mode: str, ok: bool):
+    """mode: structured, stream or batch"""
+    SCORE_PARSE_RESULTS.labels(mode, "ok" if ok else "failed").inc()
+
+
+def instrument_engine(engine):
+    """Track pool checkout wait and connections in use for this engine"""
+    pool = engine.pool
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    event.listen(pool, "checkout", lambda *args: DB_POOL_IN_USE.inc())
+    event.listen(pool, "checkin", lambda *args: DB_POOL_IN_USE.dec())
+
+
+class QueueDepthCollector:
+    """Pending/due actions (DB) and this process's background scoring queue, read at scrape time"""
+
+    def describe(self):
+        # Lets the registry learn the names without running collect() (a DB query) on register
+        yield GaugeMetricFamily("actions_queue_depth", "Pending actions", labels=["state"])
+        yield GaugeMetricFamily("scoring_queue_depth", "Prospects waiting for in-process background scoring")
+
+    def collect(self):
+        from app.database import SessionLocal
+        from app.models import Action
+        from app.services import scoring_queue
+
+        actions = GaugeMetricFamily("actions_queue_depth", "Pending actions", labels=["state"])
+        db = SessionLocal()
+        try:
+            pending = db.query(func.count(Action.id)).filter(Action.status == "pending").scalar()
+            due = db.query(func.count(Action.id)).filter(
+                Action.status == "pending",
+                Action.scheduled_for <= datetime.now(timezone.utc)
+            ).scalar()
+            actions.add_metric(["pending"], pending)
+            actions.add_metric(["due"], due)
+        except Exception:
+            pass  # DB down - the scrape still returns everything else
+        finally:
+            db.close()
+        yield actions
+
+        yield GaugeMetricFamily(
+            "scoring_queue_depth", "Prospects waiting for in-process background scoring",
+            value=scoring_queue.queue_depth()
+        )
+
+
+class LLMLimiterCollector:
+    """Adaptive per-API-key LLM limiter state of this process (keys appear as hashes)"""
+
+    GAUGES = (
+        ("llm_key_concurrency_limit", "Current adaptive (AIMD) concurrency limit", "limit"),
+        ("llm_key_in_flight", "LLM calls in flight", "in_flight"),
+        ("llm_key_queue_depth", "LLM calls waiting for a slot", "queue_depth"),
+        ("llm_key_paused_seconds", "Remaining retry-after pause", "paused_for"),
+    )
+
+    def describe(self):
+        for name, documentation, _ in self.GAUGES:
+            yield GaugeMetricFamily(name, documentation, labels=["key"])
+
+    def collect(self):
+        from app.services.llm_limiter import limiter_stats
+
+        stats = limiter_stats()
+        for name, documentation, field in self.GAUGES:
+            family = GaugeMetricFamily(name, documentation, labels=["key"])
+            for key_id, values in stats.items():
+                family.add_metric([key_id], values[field])
+            yield family
+
+
+def render() -> tuple:
+    """(body, content type) for /metrics"""
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(QueueDepthCollector())
+        registry.register(LLMLimiterCollector())
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def install_celery_hooks():
+    """Record task durations from Celery signals; clean up this process's files on shutdown"""
+    from celery.signals import task_postrun, task_prerun, worker_process_shutdown
+
+    started = {}
+
+    @task_prerun.connect(weak=False)
+    def _task_started(task_id=None, **kwargs):
+        started[task_id] = time.perf_counter()
+
+    @task_postrun.connect(weak=False)
+    def _task_finished(task_id=None, task=None, state=None, **kwargs):
+        began = started.pop(task_id, None)
+        if began is None or task is None:
+            return
+        CELERY_TASK_DURATION.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - began)
+
+    @worker_process_shutdown.connect(weak=False)
+    def _process_shutdown(**kwargs):
+        if MULTIPROCESS:
+            multiprocess.mark_process_dead(os.getpid())
+
+
+if not MULTIPROCESS:
+    REGISTRY.register(QueueDepthCollector())
+    REGISTRY.register(LLMLimiterCollector())
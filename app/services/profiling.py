@@ -0,0 +1,102 @@
+"""
+On-demand profiling with a sampling profiler (pyinstrument)
+
+Reports are speedscope JSON (open in https://www.speedscope.app or any
+flame-graph viewer that reads it) kept in PROFILE_DIR, oldest deleted beyond
+PROFILE_MAX_FILES. Three ways in:
+- API: one request, asked for explicitly (see app.api.profiling)
+- API: 1 in PROFILE_SAMPLE_RATE requests, stored in the background
+- Celery: every run of the tasks named in PROFILE_TASKS, or a single call
+  sent with headers={"profile": "1"}
+"""
+
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+_rotate_lock = threading.Lock()
+
+
+def new_profiler() -> Profiler:
+    return Profiler(interval=settings.PROFILE_INTERVAL_MS / 1000, async_mode="enabled")
+
+
+def render(profiler: Profiler) -> str:
+    return profiler.output(renderer=SpeedscopeRenderer())
+
+
+def sampled() -> bool:
+    """True for 1 in PROFILE_SAMPLE_RATE calls (never when 0)"""
+    rate = settings.PROFILE_SAMPLE_RATE
+    return rate > 0 and random.randrange(rate) == 0
+
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def store(profiler: Profiler, kind: str, name: str, profile_id: str) -> str:
+    """Write the report to PROFILE_DIR and drop the oldest beyond PROFILE_MAX_FILES; returns the path"""
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = _SLUG_RE.sub("_", name).strip("_")[:80]
+    path = os.path.join(
+        settings.PROFILE_DIR,
+        f"{time.strftime('%Y%m%dT%H%M%S')}_{kind}_{slug}_{profile_id}.speedscope.json"
+    )
+    with open(path, "w") as f:
+        f.write(render(profiler))
+
+    with _rotate_lock:
+        reports = sorted(
+            (entry for entry in os.scandir(settings.PROFILE_DIR) if entry.name.endswith(".speedscope.json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in reports[:max(0, len(reports) - settings.PROFILE_MAX_FILES)]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # Another process rotated it already
+    return path
+
+
+def install_celery_hooks():
+    """Profile tasks named in PROFILE_TASKS, or single calls sent with a "profile" header"""
+    from celery.signals import task_postrun, task_prerun
+
+    always = {name.strip() for name in settings.PROFILE_TASKS.split(",") if name.strip()}
+    active = {}
+
+    def requested(task) -> bool:
+        flag = getattr(task.request, "profile", None) or (getattr(task.request, "headers", None) or {}).get("profile")
+        return str(flag).lower() in ("1", "true")
+
+    @task_prerun.connect(weak=False)
+    def _start(task_id=None, task=None, **kwargs):
+        if task.name.rsplit(".", 1)[-1] not in always and not requested(task):
+            return
+        profiler = new_profiler()
+        profiler.start()
+        active[task_id] = profiler
+
+    @task_postrun.connect(weak=False)
+    def _stop(task_id=None, task=None, **kwargs):
+        profiler = active.pop(task_id, None)
+        if profiler is None:
+            return
+        profiler.stop()
+        try:
+            store(profiler, "task", task.name.rsplit(".", 1)[-1], task_id.replace("-", "")[:12])
+        except OSError as e:
+            logger.warning("Could not store task profile: %s", e)
@@ -0,0 +1,174 @@
+"""
+Deterministic local pre-filter for prospect scoring
+
+Matches prospect title/headline/company tokens against the campaign's
+target_filters with one vectorized pass over all prospects. Clear matches
+and clear rejects get a local score; only ambiguous prospects need the LLM.
+
+Deliberately conservative - anything in between goes to the LLM:
+- match: the title *is* a target title (normalized: "Chief Executive
+  Officer" = "CEO"), give or take seniority words like "Senior" or "Co-";
+  "Assistant to the CEO" contains the target but is not a match
+- reject: neither title nor headline shares a single token with any target
+  title (a title alone, e.g. "Managing Director" for "CEO", is not enough)
+"""
+
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Local scores for decided prospects (LLM scale 1-10)
+MATCH_SCORE = 8
+REJECT_SCORE = 2
+
+# Similarity at or below this (title and headline) is a clear reject
+REJECT_AT = 0.0
+
+# Extra title words that don't change which role it is
+QUALIFIERS = {"co", "senior", "sr", "founding", "interim", "acting", "global", "group"}
+
+# Headline hits count less than title hits
+HEADLINE_WEIGHT = 0.6
+
+STOPWORDS = {"a", "an", "and", "at", "for", "in", "of", "on", "the", "to", "with", "&", "-", "|"}
+
+# Spelled-out titles are normalized to their abbreviation
+ALIASES = {
+    "ceo": {"chief", "executive", "officer"},
+    "cto": {"chief", "technology", "officer"},
+    "cfo": {"chief", "financial", "officer"},
+    "coo": {"chief", "operating", "officer"},
+    "cmo": {"chief", "marketing", "officer"},
+    "vp": {"vice", "president"},
+    "founder": {"cofounder"},
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text) -> set:
+    if not text:
+        return set()
+    tokens = {t for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS}
+    for alias, words in ALIASES.items():
+        if words <= tokens:
+            tokens -= words
+            tokens.add(alias)
+    return tokens
+
+
+class CampaignKeywords:
+    """Keyword sets compiled once per distinct target_filters"""
+
+    def __init__(self, target_filters: dict):
+        self.title_phrases = [tokenize(p) for p in _as_list(target_filters.get("title"))]
+        self.title_phrases = [p for p in self.title_phrases if p]
+        self.companies = [tokenize(c) for c in _as_list(target_filters.get("company"))]
+        self.companies = [c for c in self.companies if c]
+
+        # Vocabulary + phrase/token incidence matrix (phrases x vocab)
+        self.vocab = sorted(set().union(*self.title_phrases)) if self.title_phrases else []
+        self.index = {token: i for i, token in enumerate(self.vocab)}
+        self.phrase_matrix = np.zeros((len(self.title_phrases), len(self.vocab)), dtype=np.float32)
+        for row, phrase in enumerate(self.title_phrases):
+            for token in phrase:
+                self.phrase_matrix[row, self.index[token]] = 1.0
+        self.phrase_sizes = self.phrase_matrix.sum(axis=1)
+
+    @property
+    def active(self) -> bool:
+        return bool(self.title_phrases)
+
+    def token_matrix(self, texts: list) -> np.ndarray:
+        """prospects x vocab incidence matrix for one text field"""
+        matrix = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text) & self.index.keys():
+                matrix[row, self.index[token]] = 1.0
+        return matrix
+
+
+@lru_cache(maxsize=256)
+def _compiled(filters_key: str) -> CampaignKeywords:
+    return CampaignKeywords(json.loads(filters_key))
+
+
+def compile_filters(target_filters: dict) -> CampaignKeywords:
+    return _compiled(json.dumps(target_filters or {}, sort_keys=True, default=str))
+
+
+def prefilter_prospects(prospects: list, target_filters: dict) -> list:
+    """
+    Classify prospects (dicts with title/headline/company) against campaign filters
+    Returns one entry per prospect: {"decision": "match" | "reject" | "ambiguous",
+    "score", "reasoning"}; score is None for ambiguous prospects
+    """
+    keywords = compile_filters(target_filters)
+    if not keywords.active or not prospects:
+        return [_ambiguous() for _ in prospects]
+
+    titles = keywords.token_matrix([p.get("title") for p in prospects])
+    headlines = keywords.token_matrix([p.get("headline") for p in prospects])
+
+    # Fraction of each target phrase present, best phrase per prospect
+    title_overlap = titles @ keywords.phrase_matrix.T
+    title_sim = (title_overlap / keywords.phrase_sizes).max(axis=1)
+    headline_sim = (headlines @ keywords.phrase_matrix.T / keywords.phrase_sizes).max(axis=1)
+    similarity = np.maximum(title_sim, HEADLINE_WEIGHT * headline_sim)
+
+    has_title = np.array([bool(p.get("title")) for p in prospects])
+    has_headline = np.array([bool(p.get("headline")) for p in prospects])
+
+    # Title tokens covered by the target phrases it fully contains
+    contained = title_overlap >= keywords.phrase_sizes
+    covered = (contained.astype(np.float32) @ keywords.phrase_matrix) > 0
+
+    # Company filter (if any) must also match for a clear match
+    if keywords.companies:
+        company_ok = np.array([
+            any(c <= tokenize(p.get("company")) for c in keywords.companies)
+            for p in prospects
+        ])
+    else:
+        company_ok = np.ones(len(prospects), dtype=bool)
+
+    # Clear match: nothing in the title besides target phrases and qualifiers
+    match = has_title & company_ok & contained.any(axis=1)
+    for i in np.flatnonzero(match):
+        covered_tokens = {keywords.vocab[j] for j in np.flatnonzero(covered[i])}
+        if tokenize(prospects[i].get("title")) - covered_tokens - QUALIFIERS:
+            match[i] = False
+
+    reject = has_title & has_headline & (similarity <= REJECT_AT)
+
+    results = []
+    for i in range(len(prospects)):
+        if match[i]:
+            results.append({
+                "decision": "match",
+                "score": MATCH_SCORE,
+                "reasoning": "Title is a campaign target title (local pre-filter)"
+            })
+        elif reject[i]:
+            results.append({
+                "decision": "reject",
+                "score": REJECT_SCORE,
+                "reasoning": "Neither title nor headline mentions a campaign target title (local pre-filter)"
+            })
+        else:
+            results.append(_ambiguous())
+    return results
+
+
+def _ambiguous() -> dict:
+    return {"decision": "ambiguous", "score": None, "reasoning": None}
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [str(v) for v in value]
+    return [str(value)]
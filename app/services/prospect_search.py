@@ -0,0 +1,171 @@
+"""
+Indexed prospect search
+
+Structured filters (stage, connection_status, score range) use the regular
+B-tree indexes on prospects. The text filter (word-prefix matching on title +
+headline) uses a dialect-specific index, created by setup_search_index() at
+startup:
+- PostgreSQL: full-text GIN index over title + headline
+- SQLite: an external-content FTS5 table kept in sync by triggers
+- anything else (or FTS5 unavailable): plain LIKE scans
+The company filter is a case-insensitive substring match on every backend;
+on PostgreSQL a pg_trgm GIN index serves it, elsewhere it filters the rows
+the other conditions select.
+
+Results are newest first with keyset pagination on prospects.id, so deep
+pages cost the same as the first one.
+"""
+
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import column, or_, table, text
+from sqlalchemy.orm import Session
+
+from app.models import Prospect
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 500
+
+# Must match the expression of ix_prospects_search_text exactly for Postgres to use the index
+TEXT_VECTOR_SQL = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(headline, ''))"
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS ix_prospects_search_text ON prospects USING gin ({TEXT_VECTOR_SQL})",
+    "CREATE INDEX IF NOT EXISTS ix_prospects_company_trgm ON prospects USING gin (company gin_trgm_ops)",
+]
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS prospects_fts USING fts5(
+        title, headline, company,
+        content='prospects', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS prospects_fts_ai AFTER INSERT ON prospects BEGIN
+        INSERT INTO prospects_fts(rowid, title, headline, company)
+        VALUES (new.id, new.title, new.headline, new.company);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS prospects_fts_ad AFTER DELETE ON prospects BEGIN
+        INSERT INTO prospects_fts(prospects_fts, rowid, title, headline, company)
+        VALUES ('delete', old.id, old.title, old.headline, old.company);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS prospects_fts_au AFTER UPDATE OF title, headline, company ON prospects BEGIN
+        INSERT INTO prospects_fts(prospects_fts, rowid, title, headline, company)
+        VALUES ('delete', old.id, old.title, old.headline, old.company);
+        INSERT INTO prospects_fts(rowid, title, headline, company)
+        VALUES (new.id, new.title, new.headline, new.company);
+    END""",
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Text index available per dialect, set by setup_search_index()
+_text_index = {}
+
+
+def setup_search_index(engine):
+    """Create the text search index for this database (idempotent)"""
+    dialect = engine.dialect.name
+
+    try:
+        if dialect == "postgresql":
+            with engine.begin() as conn:
+                for statement in POSTGRES_DDL:
+                    conn.execute(text(statement))
+        elif dialect == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prospects_fts'"
+                )).first()
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index prospects added before the FTS table existed
+                    conn.execute(text("INSERT INTO prospects_fts(prospects_fts) VALUES ('rebuild')"))
+        else:
+            return
+        _text_index[dialect] = True
+    except Exception as e:
+        _text_index[dialect] = False
+        logger.warning("Prospect search index unavailable on %s (%s), text filters will scan", dialect, e)
+
+
+def search_prospects(
+    db: Session,
+    user_id: str,
+    campaign_id: Optional[str] = None,
+    filters: dict = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> tuple:
+    """
+    One page of matching prospects, newest first: (prospects, next_cursor)
+
+    filters: stage / connection_status (value or list), min_score, max_score,
+    company (substring), text (words matched against title and headline)
+    """
+    filters = filters or {}
+    limit = max(1, min(limit, MAX_LIMIT))
+    dialect = db.get_bind().dialect.name
+    indexed = _text_index.get(dialect, False)
+
+    query = db.query(Prospect).filter(Prospect.user_id == user_id)
+    if campaign_id:
+        query = query.filter(Prospect.campaign_id == campaign_id)
+
+    for field in ("stage", "connection_status"):
+        value = filters.get(field)
+        if value:
+            values = value if isinstance(value, list) else [value]
+            query = query.filter(getattr(Prospect, field).in_(values))
+
+    if filters.get("min_score") is not None:
+        query = query.filter(Prospect.ai_score >= filters["min_score"])
+    if filters.get("max_score") is not None:
+        query = query.filter(Prospect.ai_score <= filters["max_score"])
+
+    order_key = Prospect.id
+    words = _TOKEN_RE.findall((filters.get("text") or "").lower())
+    company = (filters.get("company") or "").strip()
+
+    if words and indexed and dialect == "sqlite":
+        # Drive the query from the FTS table in rowid order, so SQLite stops
+        # after one page instead of materializing every match
+        fts = table("prospects_fts", column("rowid"))
+        query = query.join(fts, fts.c.rowid == Prospect.id).filter(
+            text("prospects_fts MATCH :match").bindparams(
+                match="{title headline} : (" + " ".join(f'"{w}"*' for w in words) + ")"
+            )
+        )
+        order_key = fts.c.rowid
+    elif words and indexed and dialect == "postgresql":
+        query = query.filter(text(f"{TEXT_VECTOR_SQL} @@ to_tsquery('simple', :tsquery)").bindparams(
+            tsquery=" & ".join(f"{w}:*" for w in words)
+        ))
+    else:
+        for w in words:
+            pattern = f"%{_escape_like(w)}%"
+            query = query.filter(or_(
+                Prospect.title.ilike(pattern, escape="/"),
+                Prospect.headline.ilike(pattern, escape="/")
+            ))
+
+    # Same substring semantics everywhere (pg_trgm index on PostgreSQL)
+    if company:
+        query = query.filter(Prospect.company.ilike(f"%{_escape_like(company)}%", escape="/"))
+
+    if cursor:
+        try:
+            query = query.filter(order_key < int(cursor))
+        except ValueError:
+            raise ValueError("Invalid cursor") from None
+
+    prospects = query.order_by(order_key.desc()).limit(limit + 1).all()
+    next_cursor = str(prospects[limit - 1].id) if len(prospects) > limit else None
+    return prospects[:limit], next_cursor
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
@@ -0,0 +1,261 @@
+"""
+Cache of rendered GET responses for campaigns, campaign stats, users and prospects
+
+Entries are keyed by (kind, id) and tagged with the row's updated_at:
+- with Redis (RESPONSE_CACHE_REDIS, on by default unless SYNC_MODE), entries
+  are shared between processes and every write publishes an invalidation, so
+  within RESPONSE_CACHE_TTL_SECONDS an entry is served (or answered with 304)
+  without touching the DB or decrypting anything - but only while this
+  process's invalidation subscriber is connected
+- without Redis (or while the subscriber is disconnected), writes by other
+  processes (Celery workers, other API workers) go unannounced, so every hit
+  first re-checks updated_at with one small query - never a stale 304 - and
+  only skips rebuilding the response
+- a stale entry whose updated_at is unchanged is renewed, not rebuilt
+
+Committed ORM changes to User/Campaign/Prospect rows invalidate their entries
+automatically (track_session_writes); bulk UPDATEs, which the session doesn't
+see, call invalidate_after_commit(). Local entries are dropped at once; the
+Redis delete + publish is handed to a background thread so commits never wait
+on Redis (best effort - if it fails, other processes revalidate once their
+subscriber notices the outage, or after the TTL).
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+import redis
+from sqlalchemy import event
+
+from app.config import settings
+
+INVALIDATION_CHANNEL = "linkedin_agent:response_cache_invalidated"
+REDIS_PREFIX = "linkedin_agent:response_cache:"
+
+# Table -> (cached kinds rendered from its rows, column holding the id used in URLs)
+TRACKED_TABLES = {
+    "users": (("user",), "user_id"),
+    "campaigns": (("campaign", "campaign_stats"), "campaign_id"),
+    "prospects": (("prospect",), "prospect_id"),
+}
+
+logger = logging.getLogger(__name__)
+
+Entry = namedtuple("Entry", ["version", "etag", "body"])
+_Local = namedtuple("_Local", ["expires_at", "entry"])
+
+_cache = OrderedDict()  # (kind, key) -> _Local, least recently used first
+_lock = threading.Lock()
+_redis = None
+_subscriber = None
+_subscribed = threading.Event()  # Set while _listen() receives invalidations
+_publisher = None
+_outbox = queue.SimpleQueue()  # (kind, keys) waiting for _publish()
+_unpublished = Counter()  # (kind, key) -> queued invalidations; Redis still holds the old entry
+
+
+def shared() -> bool:
+    """Whether entries and invalidations go through Redis (only then can a fresh entry skip the version check)"""
+    if settings.RESPONSE_CACHE_REDIS is None:
+        return not settings.SYNC_MODE
+    return settings.RESPONSE_CACHE_REDIS
+
+
+def trusted() -> bool:
+    """Whether a fresh entry can skip the version check: Redis on and invalidations arriving"""
+    if not shared():
+        return False
+    _ensure_subscriber()
+    return _subscribed.is_set()
+
+
+def get(kind: str, key: str):
+    """(entry, fresh) - a stale entry may only be served after its version is re-checked"""
+    now = time.monotonic()
+    with _lock:
+        local = _cache.get((kind, key))
+        if local:
+            _cache.move_to_end((kind, key))
+        unpublished = _unpublished[(kind, key)] > 0
+    if local and local.expires_at > now:
+        return local.entry, trusted()
+
+    if shared() and not unpublished:
+        try:
+            raw = _client().get(REDIS_PREFIX + f"{kind}:{key}")
+        except redis.RedisError as e:
+            logger.debug("Response cache read from Redis failed: %s", e)
+            raw = None
+        if raw:
+            entry = Entry(*json.loads(raw))
+            _put_local(kind, key, entry, now)
+            return entry, trusted()
+
+    return (local.entry if local else None), False
+
+
+def put(kind: str, key: str, version, body: bytes) -> Entry:
+    """Cache a rendered response body for the row version it was built from"""
+    entry = Entry(str(version), f'"{hashlib.sha1(body).hexdigest()}"', body)
+    _put_local(kind, key, entry, time.monotonic())
+    if shared():
+        try:
+            _client().set(
+                REDIS_PREFIX + f"{kind}:{key}",
+                json.dumps([entry.version, entry.etag, body.decode()]),
+                ex=settings.RESPONSE_CACHE_TTL_SECONDS
+            )
+        except redis.RedisError as e:
+            logger.debug("Response cache write to Redis failed: %s", e)
+    return entry
+
+
+def renew(kind: str, key: str, entry: Entry) -> Entry:
+    """Keep serving a stale entry whose version turned out unchanged"""
+    _put_local(kind, key, entry, time.monotonic())
+    return entry
+
+
+def invalidate(kind: str, *keys: str):
+    """Drop entries here now; in Redis and (via Redis) every other process from the publisher thread"""
+    _drop(kind, keys)
+    if not shared() or not keys:
+        return
+    with _lock:
+        _unpublished.update((kind, key) for key in keys)
+    _ensure_publisher()
+    _outbox.put((kind, keys))
+
+
+def invalidate_after_commit(session, kind: str, keys):
+    """Invalidate once the session commits (for bulk UPDATEs the session doesn't track)"""
+    session.info.setdefault("response_cache_changed", set()).update((kind, key) for key in keys)
+
+
+def track_session_writes(session_factory):
+    """Invalidate entries for User/Campaign/Prospect rows that sessions from this factory commit"""
+
+    @event.listens_for(session_factory, "before_flush")
+    def _collect(session, flush_context, instances):
+        changed = session.info.setdefault("response_cache_changed", set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            tracked = TRACKED_TABLES.get(getattr(obj, "__tablename__", None))
+            if tracked:
+                kinds, column = tracked
+                key = getattr(obj, column)
+                changed.update((kind, key) for kind in kinds)
+
+    @event.listens_for(session_factory, "after_commit")
+    def _invalidate(session):
+        by_kind = {}
+        for kind, key in session.info.pop("response_cache_changed", ()):
+            by_kind.setdefault(kind, []).append(key)
+        for kind, keys in by_kind.items():
+            invalidate(kind, *keys)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def _discard(session):
+        session.info.pop("response_cache_changed", None)
+
+
+def _put_local(kind: str, key: str, entry: Entry, now: float):
+    with _lock:
+        _cache[(kind, key)] = _Local(now + settings.RESPONSE_CACHE_TTL_SECONDS, entry)
+        _cache.move_to_end((kind, key))
+        while len(_cache) > settings.RESPONSE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _drop(kind: str, keys):
+    with _lock:
+        for key in keys:
+            _cache.pop((kind, key), None)
+
+
+def _client():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+    return _redis
+
+
+def _ensure_publisher():
+    global _publisher
+    if _publisher and _publisher.is_alive():
+        return
+    with _lock:
+        if _publisher and _publisher.is_alive():
+            return
+        _publisher = threading.Thread(target=_publish_forever, name="response-cache-publisher", daemon=True)
+        _publisher.start()
+
+
+def _publish_forever():
+    while True:
+        _publish(*_outbox.get())
+
+
+def _publish(kind: str, keys):
+    """Delete the shared entries and tell other processes (best effort, short timeouts)"""
+    try:
+        pipe = _client().pipeline(transaction=False)
+        pipe.delete(*(REDIS_PREFIX + f"{kind}:{key}" for key in keys))
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps([kind, list(keys)]))
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Response cache invalidation not published (%s) - other workers refresh within TTL", e)
+    finally:
+        with _lock:
+            _unpublished.subtract((kind, key) for key in keys)
+            for key in keys:
+                if _unpublished[(kind, key)] <= 0:
+                    del _unpublished[(kind, key)]
+
+
+def _ensure_subscriber():
+    global _subscriber
+    if _subscriber and _subscriber.is_alive():
+        return
+    with _lock:
+        if _subscriber and _subscriber.is_alive():
+            return
+        _subscribed.clear()  # A previous listener died without clearing it
+        _subscriber = threading.Thread(target=_listen, name="response-cache-invalidation", daemon=True)
+        _subscriber.start()
+
+
+def _listen():
+    """
+    Drop entries invalidated by other processes; reconnects with backoff
+    The idle connection is pinged (health_check_interval), so a dead Redis is
+    noticed within seconds and entries are revalidated until it is back
+    """
+    delay = 1
+    while True:
+        try:
+            pubsub = redis.Redis.from_url(
+                settings.REDIS_URL, health_check_interval=5, socket_connect_timeout=1, socket_keepalive=True
+            ).pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were disconnected is lost - start clean
+            with _lock:
+                _cache.clear()
+            _subscribed.set()
+            delay = 1
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message:
+                    try:
+                        kind, keys = json.loads(message["data"])
+                    except (ValueError, TypeError):
+                        continue
+                    _drop(kind, keys)
+        except redis.RedisError:
+            _subscribed.clear()
+            time.sleep(delay)
+            delay = min(delay * 2, 60)
@@ -0,0 +1,130 @@
+"""
+Spread queued actions across the user's daily send window
+
+The window comes from User.preferences["send_window"]
+({"start_hour": 9, "end_hour": 18, "timezone": "Europe/Berlin"}), falling
+back to the SEND_WINDOW_* settings. Connects and messages respect the
+user's daily_limits, counting actions already pending or sent on each day;
+overflow moves to the next day's window. A missing limit means unlimited, a
+limit of 0 means that type is never scheduled.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, func, or_
+
+from app.config import settings
+from app.models import Action
+
+# daily_limits key per action type (types not listed are unlimited)
+DAILY_LIMIT_KEYS = {"connect": "connections", "message": "messages"}
+
+# Earliest slot, like the single /queue endpoint's safety delay
+MIN_LEAD = timedelta(minutes=5)
+
+
+def send_window(user) -> tuple:
+    """(start_hour, end_hour, tzinfo) for a user"""
+    window = (user.preferences or {}).get("send_window") or {}
+    start = int(window.get("start_hour", settings.SEND_WINDOW_START_HOUR))
+    end = int(window.get("end_hour", settings.SEND_WINDOW_END_HOUR))
+    try:
+        tz = ZoneInfo(window.get("timezone") or settings.SEND_WINDOW_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = timezone.utc
+    if not 0 <= start < end <= 24:
+        start, end = settings.SEND_WINDOW_START_HOUR, settings.SEND_WINDOW_END_HOUR
+    return start, end, tz
+
+
+def spread_schedule(action_types: list, user, db=None, now: datetime = None) -> list:
+    """
+    scheduled_for (UTC) for each action type, in input order: each day's
+    actions are evenly spaced over that day's window with random jitter
+    With `db`, the user's pending and sent actions count against each day's
+    limits. Types with a daily limit of 0 get None (never scheduled).
+    """
+    now = now or datetime.now(timezone.utc)
+    start_hour, end_hour, tz = send_window(user)
+    limits = user.daily_limits or {}
+
+    # Day 0 is today's remaining window, or tomorrow's if it has passed
+    earliest = now + MIN_LEAD
+    local_today = earliest.astimezone(tz).date()
+    if _window(local_today, start_hour, end_hour, tz)[1] <= earliest:
+        local_today += timedelta(days=1)
+
+    booked = _booked_counts(db, user.user_id, local_today, tz) if db is not None else {}
+
+    # Assign each action to the first day with capacity left for its type
+    day_counts = []  # day offset -> {action_type: count} of the actions scheduled here
+    day_of = []
+    for action_type in action_types:
+        limit = limits.get(DAILY_LIMIT_KEYS.get(action_type))
+        if limit is not None and limit <= 0:
+            day_of.append(None)
+            continue
+        day = 0
+        while True:
+            if day == len(day_counts):
+                day_counts.append({})
+            used = day_counts[day].get(action_type, 0) + booked.get((day, action_type), 0)
+            if limit is None or used < limit:
+                break
+            day += 1
+        day_counts[day][action_type] = day_counts[day].get(action_type, 0) + 1
+        day_of.append(day)
+
+    windows = []
+    for day in range(len(day_counts)):
+        window_start, window_end = _window(local_today + timedelta(days=day), start_hour, end_hour, tz)
+        windows.append((max(window_start, earliest), window_end))
+
+    # Evenly spaced slots per day, jittered within each slot
+    per_day = [sum(counts.values()) for counts in day_counts]
+    position = [0] * len(day_counts)
+    schedule = []
+    for day in day_of:
+        if day is None:
+            schedule.append(None)
+            continue
+        window_start, window_end = windows[day]
+        slot = (window_end - window_start) / per_day[day]
+        offset = slot * (position[day] + random.uniform(0.1, 0.9))
+        position[day] += 1
+        schedule.append(window_start + offset)
+    return schedule
+
+
+def _booked_counts(db, user_id: str, local_today, tz) -> dict:
+    """
+    {(day offset, action_type): count} of the user's limited actions that are
+    pending (by scheduled_for, overdue ones on day 0) or were sent from day 0 on
+    """
+    day_start = datetime(local_today.year, local_today.month, local_today.day, tzinfo=tz).astimezone(timezone.utc)
+    rows = db.query(
+        Action.action_type, func.coalesce(Action.executed_at, Action.scheduled_for)
+    ).filter(
+        Action.user_id == user_id,
+        Action.action_type.in_(DAILY_LIMIT_KEYS),
+        or_(
+            Action.status.in_(("pending", "executing")),
+            and_(Action.status == "completed", Action.executed_at >= day_start)
+        )
+    ).all()
+
+    counts = {}
+    for action_type, at in rows:
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)  # Stored as naive UTC
+        day = max(0, (at.astimezone(tz).date() - local_today).days)
+        counts[(day, action_type)] = counts.get((day, action_type), 0) + 1
+    return counts
+
+
+def _window(day, start_hour: int, end_hour: int, tz) -> tuple:
+    start = datetime(day.year, day.month, day.day, tzinfo=tz) + timedelta(hours=start_hour)
+    end = datetime(day.year, day.month, day.day, tzinfo=tz) + timedelta(hours=end_hour)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
@@ -0,0 +1,70 @@
+"""
+In-process background scoring for SYNC_MODE (no Celery worker)
+
+A fixed pool of asyncio workers on the API's event loop drains a queue of
+prospect ids, running the same scoring body as the score_prospect task.
+The queue lives in memory, so on startup requeue_pending() puts back every
+prospect a previous process left at score_status "queued" (or "pending",
+if enqueueing failed).
+"""
+
+import asyncio
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_queue = None
+_workers = []
+
+
+def enqueue(prospect_id: str):
+    """Queue a prospect for scoring (must be called from the running event loop)"""
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue()
+    if not _workers:
+        _workers.extend(asyncio.create_task(_worker()) for _ in range(settings.SCORING_WORKERS))
+    _queue.put_nowait(prospect_id)
+
+
+def requeue_pending() -> int:
+    """Queue every prospect still waiting for a score (run once on API startup)"""
+    from app.database import SessionLocal
+    from app.models import Prospect
+
+    db = SessionLocal()
+    try:
+        prospects = db.query(Prospect).filter(
+            Prospect.score_status.in_(("queued", "pending"))
+        ).order_by(Prospect.id).all()
+        for prospect in prospects:
+            prospect.score_status = "queued"
+        db.commit()
+        prospect_ids = [prospect.prospect_id for prospect in prospects]
+    finally:
+        db.close()
+
+    for prospect_id in prospect_ids:
+        enqueue(prospect_id)
+    if prospect_ids:
+        logger.info("Re-queued %d prospects awaiting scoring", len(prospect_ids))
+    return len(prospect_ids)
+
+
+def queue_depth() -> int:
+    return _queue.qsize() if _queue else 0
+
+
+async def _worker():
+    from app.tasks.linkedin_tasks import _score_prospect
+
+    while True:
+        prospect_id = await _queue.get()
+        try:
+            await _score_prospect(prospect_id)
+        except Exception:
+            logger.exception("Background scoring failed", extra={"prospect_id": prospect_id})
+        finally:
+            _queue.task_done()
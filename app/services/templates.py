@@ -0,0 +1,91 @@
+"""
+Campaign message templates
+
+Templates use placeholders like {first_name} or {{company}}. They are compiled
+once (cached per template string) into literal/field parts, so rendering is a
+single join. One AI slot ({ai}, {ai_note}, {ai_intro}) can be left for the LLM
+to fill in llm_personalize_template mode.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+PLACEHOLDER_RE = re.compile(r"\{\{?\s*(\w+)\s*\}?\}")
+
+FIELDS = {"first_name", "last_name", "full_name", "title", "company", "headline", "location"}
+AI_SLOTS = {"ai", "ai_note", "ai_intro", "ai_line"}
+
+# Step modes (CampaignSequenceStep.mode)
+MODES = {"template", "llm", "llm_personalize_template"}
+
+
+class CompiledTemplate:
+    def __init__(self, template: str):
+        self.source = template
+        self.parts = []  # str literals and (name,) placeholders
+        self.ai_slot = None
+
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(template):
+            name = match.group(1).lower()
+            if name not in FIELDS and name not in AI_SLOTS:
+                continue  # Unknown placeholder - keep as literal text
+            self.parts.append(template[pos:match.start()])
+            self.parts.append((name,))
+            if name in AI_SLOTS:
+                self.ai_slot = name
+            pos = match.end()
+        self.parts.append(template[pos:])
+        self.parts = [p for p in self.parts if p != ""]
+
+        self.fields = frozenset(p[0] for p in self.parts if isinstance(p, tuple) and p[0] in FIELDS)
+
+    def render(self, values: dict, ai_text: Optional[str] = None) -> Optional[str]:
+        """Rendered text, or None if a placeholder has no value (caller falls back to the LLM)"""
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            name = part[0]
+            value = ai_text if name in AI_SLOTS else values.get(name)
+            if not value:
+                return None
+            out.append(value)
+        return "".join(out).strip()
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template)
+
+
+def template_values(prospect: dict) -> dict:
+    """Placeholder values from prospect fields"""
+    full_name = (prospect.get("full_name") or "").strip()
+    names = full_name.split()
+    return {
+        "first_name": names[0] if names else None,
+        "last_name": names[-1] if len(names) > 1 else None,
+        "full_name": full_name or None,
+        "title": prospect.get("title"),
+        "company": prospect.get("company"),
+        "headline": prospect.get("headline"),
+        "location": prospect.get("location"),
+    }
+
+
+def resolve_mode(step: Optional[dict]) -> str:
+    """
+    Explicit step mode, or inferred: a template with an AI slot is personalized
+    by the LLM, any other template is rendered as-is, no template means LLM
+    """
+    if not step:
+        return "llm"
+    if step.get("mode") in MODES:
+        return step["mode"]
+    template = (step.get("template") or "").strip()
+    if not template:
+        return "llm"
+    return "llm_personalize_template" if compile_template(template).ai_slot else "template"
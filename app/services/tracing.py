@@ -0,0 +1,155 @@
+"""
+Distributed tracing (OpenTelemetry)
+
+One trace follows an action from the API request through the Celery task
+into execute_action, with child spans for LinkedIn login, page loads,
+human-like delays, LLM generation and DB commits. The trace context travels
+to workers in Celery message headers (W3C traceparent).
+
+TRACING_EXPORTER picks where spans go:
+- none: tracing off (spans are no-ops)
+- console: printed as JSON
+- file: JSON lines appended to TRACING_FILE (works offline)
+- otlp: OTLP/HTTP collector (needs opentelemetry-exporter-otlp-proto-http,
+  configured with the standard OTEL_EXPORTER_OTLP_* variables)
+- package.module:ExporterClass - any SpanExporter
+"""
+
+import functools
+import importlib
+import json
+import threading
+from contextlib import contextmanager
+
+from opentelemetry import context as otel_context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from app.config import settings
+
+tracer = trace.get_tracer("linkedin_agent")
+
+_configured = False
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Append finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> SpanExportResult:
+        lines = "".join(json.dumps(json.loads(span.to_json())) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a") as f:
+                f.write(lines)
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+
+def setup_tracing(service_name: str):
+    """Install the tracer provider for this process (first call wins)"""
+    global _configured
+    if _configured or settings.TRACING_EXPORTER == "none":
+        return
+    _configured = True
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO))
+    )
+    # Batched: export runs on a background thread, off the request/task path
+    provider.add_span_processor(BatchSpanProcessor(_exporter(settings.TRACING_EXPORTER)))
+    trace.set_tracer_provider(provider)
+
+
+def _exporter(name: str) -> SpanExporter:
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return JsonFileSpanExporter(settings.TRACING_FILE)
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if ":" in name:
+        module, cls = name.split(":", 1)
+        return getattr(importlib.import_module(module), cls)()
+    raise ValueError(f"Unknown TRACING_EXPORTER: {name}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Child span of whatever is current (no-op when tracing is off)"""
+    with tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def traced(name: str):
+    """Decorator: run an async function inside a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attributes):
+    """Set attributes on the current span"""
+    trace.get_current_span().set_attributes(_clean(attributes))
+
+
+def _clean(attributes: dict) -> dict:
+    return {k: v for k, v in attributes.items() if v is not None}
+
+
+class _RequestGetter:
+    """Reads propagation headers off a Celery task request"""
+
+    def get(self, carrier, key):
+        # Worker requests carry custom message headers as attributes, eager ones under .headers
+        value = getattr(carrier, key, None) or (getattr(carrier, "headers", None) or {}).get(key)
+        return [value] if isinstance(value, str) else value
+
+    def keys(self, carrier):
+        return []
+
+
+def install_celery_hooks():
+    """Propagate the trace into Celery messages and run each task in a span"""
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    active = {}
+    getter = _RequestGetter()
+
+    @before_task_publish.connect(weak=False)
+    def _inject(headers=None, **kwargs):
+        if headers is not None:
+            propagate.inject(headers)
+
+    @task_prerun.connect(weak=False)
+    def _start(task_id=None, task=None, **kwargs):
+        parent = propagate.extract(task.request, getter=getter)
+        current = tracer.start_span(f"celery.task {task.name}", context=parent, kind=SpanKind.CONSUMER,
+                                    attributes={"celery.task_id": task_id})
+        token = otel_context.attach(trace.set_span_in_context(current))
+        active[task_id] = (current, token)
+
+    @task_postrun.connect(weak=False)
+    def _end(task_id=None, state=None, **kwargs):
+        current, token = active.pop(task_id, (None, None))
+        if current is None:
+            return
+        current.set_attribute("celery.state", state or "UNKNOWN")
+        if state == "FAILURE":
+            current.set_status(Status(StatusCode.ERROR))
+        current.end()
+        otel_context.detach(token)
@@ -2,18 +2,47 @@
 Celery tasks for LinkedIn automation
 """
 
+import asyncio
+import logging
+import time
+import uuid
+from collections import Counter
 from celery import Celery
-from datetime import datetime, timezone
+from celery.signals import setup_logging as celery_setup_logging
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.logging_config import bind_log_context, setup_logging
+
+setup_logging()  # Before app.database, which logs while connecting
+
 from app.database import SessionLocal
-from app.models import User, Prospect, Action, Campaign
+from app.models import User, Prospect, Action, Campaign, SyncState, ScoringBatch, IdempotencyKey
 from app.services.linkedin_service import LinkedInService
+from app.services import analytics, metrics, profiling, response_cache, tracing
+from app.services.credential_cache import get_user_secrets, secrets_for
+from app.services.events import emit
+from app.services.key_rotation import reencrypt_users
 from app.services.llm_service import LLMService
-from app.utils.encryption import decrypt_data
+from app.services.prospect_prefilter import prefilter_prospects
+from app.services.templates import compile_template, resolve_mode, template_values
+from app.utils.profiles import normalize_profile_url
+
+logger = logging.getLogger(__name__)
+
+# Where generated text is stored in Action.action_data, per action type
+CONTENT_KEYS = {"connect": "note", "message": "message"}
 
 # Initialize Celery (Redis broker)
 celery_app = Celery('linkedin_agent', broker='redis://localhost:6379/0')
+# Keep our logging setup instead of Celery's (a receiver on this signal stops Celery configuring logging)
+celery_setup_logging.connect(lambda **kwargs: setup_logging(), weak=False)
+metrics.install_celery_hooks()
+tracing.install_celery_hooks()
+profiling.install_celery_hooks()
+tracing.setup_tracing("linkedin-agent-worker")
 
 
 @celery_app.task
@@ -36,7 +65,7 @@ def execute_pending_actions():
                 # Execute action
                 execute_action.delay(action.action_id)
             except Exception as e:
-                print(f"Failed to queue action {action.action_id}: {e}")
+                logger.error("Failed to queue action: %s", e, extra={"action_id": action.action_id})
     
     finally:
         db.close()
@@ -47,86 +76,96 @@ def execute_action(action_id: str):
     """
     Execute a single LinkedIn action
     """
+    return asyncio.run(_execute_action(action_id))
+
+
+@tracing.traced("execute_action")
+async def _execute_action(action_id: str):
     db = SessionLocal()
+    action = None
+    started = time.perf_counter()
     
     try:
         action = db.query(Action).filter(Action.action_id == action_id).first()
         if not action:
             return {"error": "Action not found"}
+        tracing.annotate(
+            action_id=action.action_id,
+            action_type=action.action_type,
+            user_id=action.user_id,
+            campaign_id=action.campaign_id
+        )
+        bind_log_context(action_id=action.action_id, user_id=action.user_id, campaign_id=action.campaign_id)
         
         # Update status
         action.status = "executing"
+        _emit_action(db, action)
         db.commit()
         
-        # Get user and decrypt credentials
-        user = db.query(User).filter(User.user_id == action.user_id).first()
-        linkedin_creds = decrypt_data(user.linkedin_credentials_encrypted)
-        llm_config = decrypt_data(user.llm_config_encrypted)
+        # Decrypted credentials (cached per worker)
+        linkedin_creds, llm_config = get_user_secrets(db, action.user_id)
         
         # Get prospect
         prospect = db.query(Prospect).filter(Prospect.prospect_id == action.prospect_id).first()
+        campaign = db.query(Campaign).filter(Campaign.campaign_id == action.campaign_id).first()
         
         # Execute based on action type
         linkedin_service = LinkedInService(linkedin_creds)
         
         try:
+            # Pre-generated by pregenerate_action_content; inline generation is the
+            # fallback and runs before login so no browser waits on the LLM
+            content = await _action_content(action, prospect, campaign, llm_config)
+            
             await linkedin_service.login()
             
             if action.action_type == "connect":
-                # Generate personalized note with LLM
-                llm_service = LLMService(llm_config)
-                note = await llm_service.generate_connection_note({
-                    "full_name": prospect.full_name,
-                    "title": prospect.title,
-                    "company": prospect.company,
-                    "headline": prospect.headline
-                })
-                
                 # Send connection request
                 result = await linkedin_service.send_connection_request(
                     prospect.linkedin_url,
-                    note
+                    content
                 )
                 
                 if result["success"]:
                     action.status = "completed"
                     prospect.connection_status = "pending"
+                    analytics.stage_changed(db, prospect.campaign_id, prospect.stage, "contacted")
+                    analytics.record(db, action.campaign_id, connections_sent=1)
                     prospect.stage = "contacted"
+                    _emit_stage(db, prospect)
                     
                     # Update campaign stats
                     campaign = db.query(Campaign).filter(
                         Campaign.campaign_id == action.campaign_id
                     ).first()
                     if campaign:
-                        campaign.stats["sent"] = campaign.stats.get("sent", 0) + 1
+                        stats = dict(campaign.stats or {})
+                        stats["sent"] = stats.get("sent", 0) + 1
+                        campaign.stats = stats
+                        emit(db, action.user_id, "campaign.stats", campaign_id=campaign.campaign_id, delta={"sent": 1})
                 else:
                     raise Exception(result.get("error", "Unknown error"))
             
             elif action.action_type == "message":
-                # Generate personalized message
-                llm_service = LLMService(llm_config)
-                message = await llm_service.generate_first_message({
-                    "full_name": prospect.full_name,
-                    "title": prospect.title,
-                    "company": prospect.company
-                })
-                
                 # Send message
                 result = await linkedin_service.send_message(
                     prospect.linkedin_url,
-                    message
+                    content
                 )
                 
                 if result["success"]:
                     action.status = "completed"
+                    analytics.stage_changed(db, prospect.campaign_id, prospect.stage, "messaged")
+                    analytics.record(db, action.campaign_id, messages_sent=1)
                     prospect.stage = "messaged"
+                    _emit_stage(db, prospect)
                     
                     # Add to conversation history
                     if not prospect.conversation_history:
                         prospect.conversation_history = []
                     prospect.conversation_history.append({
                         "role": "assistant",
-                        "message": message,
+                        "message": content,
                         "timestamp": datetime.now(timezone.utc).isoformat()
                     })
                 else:
@@ -138,18 +177,23 @@ def execute_action(action_id: str):
                 
                 if result["success"]:
                     action.status = "completed"
+                    analytics.record(db, action.campaign_id, profile_views=1)
                     
                     # Update campaign stats
                     campaign = db.query(Campaign).filter(
                         Campaign.campaign_id == action.campaign_id
                     ).first()
                     if campaign:
-                        campaign.stats["views"] = campaign.stats.get("views", 0) + 1
+                        stats = dict(campaign.stats or {})
+                        stats["views"] = stats.get("views", 0) + 1
+                        campaign.stats = stats
+                        emit(db, action.user_id, "campaign.stats", campaign_id=campaign.campaign_id, delta={"views": 1})
                 else:
                     raise Exception(result.get("error", "Unknown error"))
             
             action.executed_at = datetime.now(timezone.utc)
             prospect.last_interaction_at = datetime.now(timezone.utc)
+            _emit_action(db, action)
             
             db.commit()
             
@@ -157,28 +201,190 @@ def execute_action(action_id: str):
             # Retry logic
             action.retry_count += 1
             action.error_message = str(e)
+            logger.warning("Action attempt %d failed: %s", action.retry_count, e)
             
             if action.retry_count >= 3:
                 action.status = "failed"
+                analytics.record(db, action.campaign_id, actions_failed=1)
             else:
                 action.status = "pending"  # Will retry
             
+            _emit_action(db, action)
             db.commit()
             
         finally:
             await linkedin_service.close()
     
     except Exception as e:
-        print(f"Task error: {e}")
+        logger.exception("Action execution failed")
         if action:
             action.status = "failed"
             action.error_message = str(e)
+            analytics.record(db, action.campaign_id, actions_failed=1)
+            _emit_action(db, action)
             db.commit()
     
+    finally:
+        if action:
+            metrics.observe_action(action.action_type, action.status, time.perf_counter() - started)
+        db.close()
+
+
+@celery_app.task
+def pregenerate_action_content():
+    """
+    Generate connection notes / messages for actions due within the lead window
+    so execution only sends pre-rendered text
+    Run this task every 5 minutes via Celery Beat
+    """
+    return asyncio.run(_pregenerate_action_content())
+
+
+async def _pregenerate_action_content():
+    db = SessionLocal()
+    
+    try:
+        horizon = datetime.now(timezone.utc) + timedelta(minutes=settings.PREGENERATE_LEAD_MINUTES)
+        rows = db.query(Action, Prospect).join(
+            Prospect, Prospect.prospect_id == Action.prospect_id
+        ).filter(
+            Action.status == "pending",
+            Action.action_type.in_(CONTENT_KEYS.keys()),
+            Action.pregenerated_at.is_(None),
+            Action.scheduled_for <= horizon
+        ).order_by(Action.scheduled_for.asc()).limit(settings.PREGENERATE_BATCH_SIZE).all()
+        
+        if not rows:
+            return {"generated": 0}
+        
+        campaigns = {
+            c.campaign_id: c
+            for c in db.query(Campaign).filter(Campaign.campaign_id.in_({a.campaign_id for a, _ in rows})).all()
+        }
+        
+        # One LLMService per user + campaign (metrics attribution), one semaphore per API key
+        llm_configs = {}
+        semaphores = {}
+        for user in db.query(User).filter(User.user_id.in_({a.user_id for a, _ in rows})).all():
+            try:
+                llm_config = secrets_for(user).llm_config
+            except Exception as e:
+                logger.error("Cannot decrypt LLM config: %s", e, extra={"user_id": user.user_id})
+                continue
+            llm_configs[user.user_id] = llm_config
+            semaphores.setdefault(
+                llm_config["api_key"],
+                asyncio.Semaphore(settings.PREGENERATE_CONCURRENCY_PER_KEY)
+            )
+        llm_services = {
+            (a.user_id, a.campaign_id): LLMService(llm_configs[a.user_id], a.user_id, a.campaign_id)
+            for a, _ in rows if a.user_id in llm_configs
+        }
+        
+        async def generate(action, prospect):
+            llm_service = llm_services.get((action.user_id, action.campaign_id))
+            if not llm_service:
+                return None
+            async with semaphores[llm_service.api_key]:
+                try:
+                    return await _generate_content(llm_service, action, prospect, campaigns.get(action.campaign_id))
+                except Exception as e:
+                    logger.warning("Pre-generation failed: %s", e, extra={"action_id": action.action_id})
+                    return None
+        
+        results = await asyncio.gather(*(
+            generate(action, prospect) for action, prospect in rows
+            if not (action.action_data or {}).get(CONTENT_KEYS[action.action_type])
+        ))
+        
+        # Every selected row is stamped, including failures (undecryptable credentials,
+        # LLM errors): they generate inline at execution instead of being picked first
+        # on every run and crowding other users out of the batch
+        pending_rows = iter(results)
+        now = datetime.now(timezone.utc)
+        generated = 0
+        for action, prospect in rows:
+            action.pregenerated_at = now
+            key = CONTENT_KEYS[action.action_type]
+            if (action.action_data or {}).get(key):
+                continue  # User-provided text counts as pre-generated
+            content = next(pending_rows)
+            if content:
+                action.action_data = {**(action.action_data or {}), key: content}
+                generated += 1
+        
+        db.commit()
+        return {"generated": generated}
+    
     finally:
         db.close()
 
 
+async def _action_content(action: Action, prospect: Prospect, campaign: Campaign, llm_config: dict):
+    """Pre-rendered text from action_data, or render/generate it now"""
+    key = CONTENT_KEYS.get(action.action_type)
+    if not key:
+        return None
+    
+    content = (action.action_data or {}).get(key)
+    if content:
+        return content
+    
+    llm_service = LLMService(llm_config, action.user_id, action.campaign_id)
+    return await _generate_content(llm_service, action, prospect, campaign)
+
+
+async def _generate_content(llm_service: LLMService, action: Action, prospect: Prospect, campaign: Campaign) -> str:
+    """
+    Render the campaign step's template - the LLM is only called to fill an AI
+    slot (llm_personalize_template), for llm steps, or when a placeholder has no value
+    """
+    prospect_data = {
+        "full_name": prospect.full_name,
+        "title": prospect.title,
+        "company": prospect.company,
+        "headline": prospect.headline,
+        "location": prospect.location
+    }
+    
+    step = _sequence_step(campaign, action)
+    mode = resolve_mode(step)
+    if mode != "llm":
+        template = compile_template(step["template"])
+        ai_text = None
+        if mode == "llm_personalize_template" and template.ai_slot:
+            ai_text = await llm_service.generate_template_slot(prospect_data, step["template"])
+        rendered = template.render(template_values(prospect_data), ai_text)
+        if rendered:
+            return rendered
+    
+    if action.action_type == "connect":
+        return await llm_service.generate_connection_note({
+            "full_name": prospect.full_name,
+            "title": prospect.title,
+            "company": prospect.company,
+            "headline": prospect.headline
+        })
+    
+    return await llm_service.generate_first_message({
+        "full_name": prospect.full_name,
+        "title": prospect.title,
+        "company": prospect.company
+    })
+
+
+def _sequence_step(campaign: Campaign, action: Action):
+    """Campaign step for an action: action_data["step"] index, else the first step of its type"""
+    if not campaign or not campaign.sequence:
+        return None
+    
+    index = (action.action_data or {}).get("step")
+    if isinstance(index, int) and 0 <= index < len(campaign.sequence):
+        return campaign.sequence[index]
+    
+    return next((step for step in campaign.sequence if step.get("action") == action.action_type), None)
+
+
 @celery_app.task
 def process_campaign_sequence(campaign_id: str):
     """
@@ -207,10 +413,672 @@ def process_campaign_sequence(campaign_id: str):
         db.close()
 
 
-# Celery Beat schedule (run every 5 minutes)
+@celery_app.task
+def sync_all_connections():
+    """
+    Queue one connection sync per user with pending connection requests
+    Run this task every 30 minutes via Celery Beat
+    """
+    db = SessionLocal()
+    
+    try:
+        user_ids = db.query(Prospect.user_id).filter(
+            Prospect.connection_status == "pending"
+        ).distinct().all()
+        
+        for (user_id,) in user_ids:
+            try:
+                sync_connections.delay(user_id)
+            except Exception as e:
+                logger.error("Failed to queue connection sync: %s", e, extra={"user_id": user_id})
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def sync_connections(user_id: str):
+    """
+    Detect accepted connection requests for all of a user's pending prospects
+    One login, one pass over sent invitations + new connections, one transaction
+    """
+    return asyncio.run(_sync_connections(user_id))
+
+
+async def _sync_connections(user_id: str):
+    bind_log_context(user_id=user_id)
+    db = SessionLocal()
+    
+    try:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user or not user.automation_enabled:
+            return {"accepted": 0}
+        
+        # All pending prospects in one indexed query (user_id, connection_status)
+        pending = db.query(
+            Prospect.id,
+            Prospect.prospect_id,
+            Prospect.campaign_id,
+            Prospect.stage,
+            Prospect.linkedin_url,
+            Prospect.linkedin_url_normalized
+        ).filter(
+            Prospect.user_id == user_id,
+            Prospect.connection_status == "pending"
+        ).all()
+        
+        if not pending:
+            return {"accepted": 0}
+        
+        by_url = {}
+        for row in pending:
+            by_url.setdefault(row.linkedin_url_normalized or normalize_profile_url(row.linkedin_url), []).append(row)
+        
+        sync_state = _get_sync_state(db, user_id, "connections")
+        watermark = sync_state.watermark
+        db.commit()  # Don't hold a DB connection during browser work
+        
+        linkedin_service = LinkedInService(secrets_for(user).linkedin_creds)
+        try:
+            await linkedin_service.login()
+            
+            # Still in the sent list = not accepted yet, no need to look for them
+            still_pending = await linkedin_service.fetch_sent_invitations()
+            candidates = {url: rows for url, rows in by_url.items() if url not in still_pending}
+            
+            connections = []
+            if candidates:
+                connections = await linkedin_service.fetch_connections(
+                    since=watermark,
+                    max_pages=settings.CONNECTION_SYNC_MAX_PAGES
+                )
+        finally:
+            await linkedin_service.close()
+        
+        accepted = [
+            row
+            for connection in connections
+            for row in candidates.get(connection["profile_url"], [])
+        ]
+        
+        # Single transaction: prospects, campaign counters, watermark
+        now = datetime.now(timezone.utc)
+        accepted_ids = [row.id for row in accepted]
+        for i in range(0, len(accepted_ids), 500):
+            chunk = accepted_ids[i:i + 500]
+            db.query(Prospect).filter(Prospect.id.in_(chunk)).update(
+                {Prospect.connection_status: "accepted", Prospect.last_interaction_at: now},
+                synchronize_session=False
+            )
+            db.query(Prospect).filter(
+                Prospect.id.in_(chunk),
+                Prospect.stage.in_(["new", "contacted"])
+            ).update({Prospect.stage: "connected"}, synchronize_session=False)
+        response_cache.invalidate_after_commit(db, "prospect", [row.prospect_id for row in accepted])
+        
+        per_campaign = Counter(row.campaign_id for row in accepted if row.campaign_id)
+        if per_campaign:
+            campaigns = db.query(Campaign).filter(Campaign.campaign_id.in_(per_campaign.keys())).all()
+            for campaign in campaigns:
+                stats = dict(campaign.stats or {})
+                stats["accepted"] = stats.get("accepted", 0) + per_campaign[campaign.campaign_id]
+                campaign.stats = stats
+                emit(db, user_id, "campaign.stats", campaign_id=campaign.campaign_id,
+                     delta={"accepted": per_campaign[campaign.campaign_id]})
+        for campaign_id, n in per_campaign.items():
+            analytics.record(db, campaign_id, accepted=n)
+        for (campaign_id, stage), n in Counter(
+            (row.campaign_id, row.stage) for row in accepted if row.stage in ("new", "contacted")
+        ).items():
+            analytics.stage_changed(db, campaign_id, stage, "connected", n)
+        for row in accepted:
+            emit(db, user_id, "prospect.connection", prospect_id=row.prospect_id,
+                 campaign_id=row.campaign_id, connection_status="accepted")
+        
+        newest = max((c["connected_at"] for c in connections if c["connected_at"]), default=None)
+        if newest:
+            sync_state.watermark = newest
+        sync_state.last_synced_at = now
+        sync_state.state = {
+            "pending_checked": len(pending),
+            "connections_scanned": len(connections),
+            "accepted": len(accepted_ids)
+        }
+        
+        db.commit()
+        return {"accepted": len(accepted_ids)}
+    
+    except Exception as e:
+        db.rollback()
+        logger.exception("Connection sync failed")
+        return {"error": str(e)}
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def poll_inboxes():
+    """
+    Queue an inbox sync for every user whose adaptive poll interval has elapsed
+    Run this task every 5 minutes via Celery Beat
+    """
+    db = SessionLocal()
+    
+    try:
+        due = db.query(User.user_id).outerjoin(
+            SyncState,
+            and_(SyncState.user_id == User.user_id, SyncState.sync_type == "inbox")
+        ).filter(
+            User.automation_enabled == True,  # noqa: E712
+            or_(SyncState.next_sync_at.is_(None), SyncState.next_sync_at <= datetime.now(timezone.utc))
+        ).all()
+        
+        for (user_id,) in due:
+            try:
+                sync_inbox.delay(user_id)
+            except Exception as e:
+                logger.error("Failed to queue inbox sync: %s", e, extra={"user_id": user_id})
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def sync_inbox(user_id: str):
+    """
+    Record prospect replies from LinkedIn messages newer than the inbox watermark
+    """
+    return asyncio.run(_sync_inbox(user_id))
+
+
+async def _sync_inbox(user_id: str):
+    bind_log_context(user_id=user_id)
+    db = SessionLocal()
+    
+    try:
+        user = db.query(User).filter(User.user_id == user_id).first()
+        if not user or not user.automation_enabled:
+            return {"replied": 0}
+        
+        sync_state = _get_sync_state(db, user_id, "inbox")
+        # First sync: nothing before our first outbound contact can be a reply
+        watermark = sync_state.watermark or _first_outbound_at(db, user_id) or datetime.now(timezone.utc)
+        interval = (sync_state.state or {}).get("interval", settings.INBOX_POLL_MIN_SECONDS)
+        db.commit()  # Don't hold a DB connection during browser work
+        
+        linkedin_service = LinkedInService(secrets_for(user).linkedin_creds)
+        try:
+            await linkedin_service.login()
+            inbox = await linkedin_service.fetch_inbox_messages(since=watermark)
+        finally:
+            await linkedin_service.close()
+        
+        _backfill_normalized_urls(db, user_id)
+        
+        by_url = {}
+        for message in sorted(inbox["messages"], key=lambda m: m["sent_at"]):
+            by_url.setdefault(message["profile_url"], []).append(message)
+        
+        # Match senders through the (user_id, linkedin_url_normalized) index
+        prospects = []
+        urls = list(by_url.keys())
+        for i in range(0, len(urls), 500):
+            prospects += db.query(Prospect).filter(
+                Prospect.user_id == user_id,
+                Prospect.linkedin_url_normalized.in_(urls[i:i + 500])
+            ).all()
+        
+        # Only messages after a prospect's first connect/message from us are replies
+        contacted_at = _first_outbound_by_prospect(db, [p.prospect_id for p in prospects])
+        
+        newly_replied = Counter()
+        for prospect in prospects:
+            since = contacted_at.get(prospect.prospect_id)
+            replies = [m for m in by_url[prospect.linkedin_url_normalized] if since and m["sent_at"] > since]
+            if not replies:
+                continue
+            
+            history = list(prospect.conversation_history or [])
+            for message in replies:
+                history.append({
+                    "role": "prospect",
+                    "message": message["message"],
+                    "timestamp": message["sent_at"].isoformat()
+                })
+            prospect.conversation_history = history
+            prospect.last_interaction_at = replies[-1]["sent_at"]
+            
+            if prospect.stage != "replied":
+                analytics.stage_changed(db, prospect.campaign_id, prospect.stage, "replied")
+                prospect.stage = "replied"
+                _emit_stage(db, prospect)
+                if prospect.campaign_id:
+                    newly_replied[prospect.campaign_id] += 1
+        
+        if newly_replied:
+            campaigns = db.query(Campaign).filter(Campaign.campaign_id.in_(newly_replied.keys())).all()
+            for campaign in campaigns:
+                stats = dict(campaign.stats or {})
+                stats["replied"] = stats.get("replied", 0) + newly_replied[campaign.campaign_id]
+                campaign.stats = stats
+                emit(db, user_id, "campaign.stats", campaign_id=campaign.campaign_id,
+                     delta={"replied": newly_replied[campaign.campaign_id]})
+        for campaign_id, n in newly_replied.items():
+            analytics.record(db, campaign_id, replied=n)
+        
+        # Busy inbox -> poll often, idle inbox -> back off
+        if inbox["newest_activity_at"]:
+            interval = settings.INBOX_POLL_MIN_SECONDS
+        else:
+            interval = min(interval * 2, settings.INBOX_POLL_MAX_SECONDS)
+        
+        now = datetime.now(timezone.utc)
+        sync_state.watermark = inbox["newest_activity_at"] or watermark
+        sync_state.last_synced_at = now
+        sync_state.next_sync_at = now + timedelta(seconds=interval)
+        sync_state.state = {
+            "interval": interval,
+            "messages": len(inbox["messages"]),
+            "replied": sum(newly_replied.values())
+        }
+        
+        db.commit()
+        return {"replied": sum(newly_replied.values()), "messages": len(inbox["messages"])}
+    
+    except Exception as e:
+        db.rollback()
+        logger.exception("Inbox sync failed")
+        return {"error": str(e)}
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def score_prospect(prospect_id: str):
+    """
+    Score one prospect with the LLM (queued by POST /api/prospects/add)
+    Progress is tracked on the row: score_status [pending ->] queued -> scored | failed
+    """
+    return asyncio.run(_score_prospect(prospect_id))
+
+
+async def _score_prospect(prospect_id: str):
+    bind_log_context(prospect_id=prospect_id)
+    db = SessionLocal()
+    
+    try:
+        prospect = db.query(Prospect).filter(Prospect.prospect_id == prospect_id).first()
+        if not prospect:
+            return {"error": "Prospect not found"}
+        if prospect.score_status != "queued":
+            # Already handled (e.g. re-queued on startup and redelivered) - don't pay for a second score
+            return {"prospect_id": prospect_id, "status": prospect.score_status, "ai_score": prospect.ai_score}
+        campaign = db.query(Campaign).filter(Campaign.campaign_id == prospect.campaign_id).first()
+        
+        try:
+            llm_service = LLMService(
+                get_user_secrets(db, prospect.user_id).llm_config,
+                prospect.user_id,
+                prospect.campaign_id
+            )
+            prospect_data = {
+                "full_name": prospect.full_name,
+                "title": prospect.title,
+                "company": prospect.company,
+                "headline": prospect.headline
+            }
+            db.commit()  # Don't hold a DB connection during the LLM call
+            
+            result = await llm_service.score_prospect(prospect_data, campaign.target_filters)
+            analytics.score_changed(db, prospect.campaign_id, prospect.ai_score, result.get("score", 5))
+            prospect.ai_score = result.get("score", 5)
+            prospect.score_reasoning = result.get("reasoning", "")
+            prospect.score_status = "scored"
+            prospect.score_error = None
+        except Exception as e:
+            logger.warning("AI scoring failed: %s", e)
+            prospect.score_status = "failed"
+            prospect.score_error = str(e)
+        
+        emit(db, prospect.user_id, "prospect.scored", prospect_id=prospect_id, campaign_id=prospect.campaign_id,
+             score_status=prospect.score_status, ai_score=prospect.ai_score)
+        db.commit()
+        return {"prospect_id": prospect_id, "status": prospect.score_status, "ai_score": prospect.ai_score}
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def enqueue_pending_scores():
+    """
+    Queue prospects whose score_prospect enqueue failed when they were added (score_status "pending")
+    Run this task every 5 minutes via Celery Beat
+    """
+    db = SessionLocal()
+    
+    try:
+        prospects = db.query(Prospect).filter(Prospect.score_status == "pending").order_by(Prospect.id).limit(500).all()
+        # Marked queued before sending, or a fast worker would skip them as already handled
+        for prospect in prospects:
+            prospect.score_status = "queued"
+        db.commit()
+        
+        queued = 0
+        for prospect in prospects:
+            try:
+                score_prospect.delay(prospect.prospect_id)
+                queued += 1
+            except Exception:
+                logger.exception("Queueing prospect scoring failed", extra={"prospect_id": prospect.prospect_id})
+                prospect.score_status = "pending"
+        db.commit()
+        return {"queued": queued}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def submit_campaign_rescore(campaign_id: str, only_unscored: bool = False):
+    """
+    Score a campaign's prospects offline through the user's provider batch API
+    Splits into SCORING_BATCH_MAX_SIZE batches; poll_scoring_batches applies results
+    """
+    return asyncio.run(_submit_campaign_rescore(campaign_id, only_unscored))
+
+
+async def _submit_campaign_rescore(campaign_id: str, only_unscored: bool):
+    db = SessionLocal()
+    
+    try:
+        campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+        if not campaign:
+            return {"error": "Campaign not found"}
+        
+        user = db.query(User).filter(User.user_id == campaign.user_id).first()
+        llm_service = LLMService(secrets_for(user).llm_config, user.user_id, campaign_id)
+        
+        query = db.query(
+            Prospect.id, Prospect.prospect_id, Prospect.full_name, Prospect.title, Prospect.company,
+            Prospect.headline
+        ).filter(Prospect.campaign_id == campaign_id)
+        if only_unscored:
+            query = query.filter(Prospect.ai_score.is_(None))
+        rows = query.order_by(Prospect.id).all()
+        total = len(rows)
+        
+        # Score clear matches / rejects locally in one vectorized pass, batch only the rest
+        locally_scored = 0
+        if settings.PREFILTER_ENABLED and rows:
+            decisions = prefilter_prospects([row._asdict() for row in rows], campaign.target_filters)
+            local_updates = [
+                {"id": row.id, "ai_score": d["score"], "score_reasoning": d["reasoning"], "score_status": "scored"}
+                for row, d in zip(rows, decisions) if d["decision"] != "ambiguous"
+            ]
+            for i in range(0, len(local_updates), 500):
+                db.bulk_update_mappings(Prospect, local_updates[i:i + 500])
+            response_cache.invalidate_after_commit(
+                db, "prospect", [row.prospect_id for row, d in zip(rows, decisions) if d["decision"] != "ambiguous"]
+            )
+            analytics.rebuild_scores(db, campaign_id)
+            db.commit()
+            locally_scored = len(local_updates)
+            rows = [row for row, d in zip(rows, decisions) if d["decision"] == "ambiguous"]
+        
+        batch_ids = []
+        size = settings.SCORING_BATCH_MAX_SIZE
+        for i in range(0, len(rows), size):
+            chunk = rows[i:i + size]
+            provider_batch_id = await llm_service.submit_scoring_batch(
+                {
+                    f"prospect-{row.id}": {
+                        "full_name": row.full_name,
+                        "title": row.title,
+                        "company": row.company,
+                        "headline": row.headline
+                    }
+                    for row in chunk
+                },
+                campaign.target_filters
+            )
+            
+            batch = ScoringBatch(
+                batch_id=f"batch_{uuid.uuid4().hex[:12]}",
+                provider_batch_id=provider_batch_id,
+                user_id=campaign.user_id,
+                campaign_id=campaign_id,
+                provider=llm_service.provider,
+                status="submitted",
+                request_count=len(chunk)
+            )
+            db.add(batch)
+            db.commit()  # Record each batch as soon as the provider accepts it
+            batch_ids.append(batch.batch_id)
+        
+        return {"batches": batch_ids, "prospects": total, "locally_scored": locally_scored}
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def poll_scoring_batches():
+    """
+    Check submitted scoring batches and apply finished ones
+    Run this task every 5 minutes via Celery Beat
+    """
+    return asyncio.run(_poll_scoring_batches())
+
+
+async def _poll_scoring_batches():
+    db = SessionLocal()
+    
+    try:
+        batches = db.query(ScoringBatch).filter(ScoringBatch.status == "submitted").all()
+        llm_services = {}
+        completed = 0
+        
+        for batch in batches:
+            batch_id = batch.batch_id  # Still readable after a rollback expires the row
+            try:
+                if batch.user_id not in llm_services:
+                    llm_config = get_user_secrets(db, batch.user_id).llm_config
+                    llm_services[batch.user_id] = LLMService(llm_config)
+                llm_service = llm_services[batch.user_id]
+                
+                status = await llm_service.get_batch_status(batch.provider_batch_id)
+                if status["status"] == "in_progress":
+                    continue
+                
+                if status["results_ref"]:
+                    await _apply_batch_results(db, batch, llm_service, status["results_ref"])
+                
+                batch.status = "completed" if status["status"] == "ended" else "failed"
+                batch.completed_at = datetime.now(timezone.utc)
+                db.commit()
+                completed += 1
+            
+            except Exception:
+                db.rollback()
+                logger.exception("Scoring batch %s poll failed", batch_id, extra={"batch_id": batch_id})
+        
+        return {"completed": completed}
+    
+    finally:
+        db.close()
+
+
+async def _apply_batch_results(db: Session, batch: ScoringBatch, llm_service: LLMService, results_ref: str):
+    """Stream batch results into Prospect.ai_score / score_reasoning, 500 rows per bulk update"""
+    updates = []
+    scored = failed = 0
+    
+    async for custom_id, result in llm_service.fetch_batch_results(results_ref):
+        if not custom_id or not custom_id.startswith("prospect-") or result is None:
+            failed += 1
+            continue
+        
+        updates.append({
+            "id": int(custom_id.split("-", 1)[1]),
+            "ai_score": result.get("score", 5),
+            "score_reasoning": result.get("reasoning", ""),
+            "score_status": "scored"
+        })
+        if len(updates) >= 500:
+            _bulk_update_scores(db, updates)
+            scored += len(updates)
+            updates = []
+    
+    if updates:
+        _bulk_update_scores(db, updates)
+        scored += len(updates)
+    
+    batch.scored_count = scored
+    batch.failed_count = failed
+    analytics.rebuild_scores(db, batch.campaign_id)
+
+
+def _bulk_update_scores(db: Session, updates: list):
+    db.bulk_update_mappings(Prospect, updates)
+    prospect_ids = db.query(Prospect.prospect_id).filter(Prospect.id.in_([u["id"] for u in updates]))
+    response_cache.invalidate_after_commit(db, "prospect", [row.prospect_id for row in prospect_ids])
+
+
+@celery_app.task
+def rebuild_campaign_analytics(campaign_id: str):
+    """Recompute a campaign's analytics rollups from prospects and actions"""
+    db = SessionLocal()
+    
+    try:
+        analytics.rebuild_campaign(db, campaign_id)
+        db.commit()
+        return {"campaign_id": campaign_id}
+    finally:
+        db.close()
+
+
+@celery_app.task
+def purge_idempotency_keys():
+    """Delete Idempotency-Key records older than IDEMPOTENCY_TTL_HOURS"""
+    db = SessionLocal()
+    
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        deleted = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete()
+        db.commit()
+        return {"deleted": deleted}
+    finally:
+        db.close()
+
+
+def _emit_action(db: Session, action: Action):
+    emit(db, action.user_id, "action.status", action_id=action.action_id, action_type=action.action_type,
+         prospect_id=action.prospect_id, campaign_id=action.campaign_id, status=action.status,
+         error_message=action.error_message)
+
+
+def _emit_stage(db: Session, prospect: Prospect):
+    emit(db, prospect.user_id, "prospect.stage", prospect_id=prospect.prospect_id,
+         campaign_id=prospect.campaign_id, stage=prospect.stage)
+
+
+def _first_outbound_at(db: Session, user_id: str):
+    """When we first connected with / messaged any of the user's prospects (None if never)"""
+    first = db.query(func.min(Action.executed_at)).filter(
+        Action.user_id == user_id,
+        Action.action_type.in_(["connect", "message"]),
+        Action.status == "completed"
+    ).scalar()
+    return _as_utc(first)
+
+
+def _first_outbound_by_prospect(db: Session, prospect_ids: list) -> dict:
+    """prospect_id -> time of our first completed connect/message to them"""
+    first = {}
+    for i in range(0, len(prospect_ids), 500):
+        rows = db.query(Action.prospect_id, func.min(Action.executed_at)).filter(
+            Action.prospect_id.in_(prospect_ids[i:i + 500]),
+            Action.action_type.in_(["connect", "message"]),
+            Action.status == "completed"
+        ).group_by(Action.prospect_id).all()
+        first.update((prospect_id, _as_utc(executed_at)) for prospect_id, executed_at in rows)
+    return first
+
+
+def _as_utc(value):
+    # DateTime columns come back naive (stored as UTC)
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _backfill_normalized_urls(db: Session, user_id: str):
+    """Fill linkedin_url_normalized for prospects created before the column existed"""
+    missing = db.query(Prospect).filter(
+        Prospect.user_id == user_id,
+        Prospect.linkedin_url_normalized.is_(None)
+    ).all()
+    for prospect in missing:
+        prospect.linkedin_url_normalized = normalize_profile_url(prospect.linkedin_url)
+    if missing:
+        db.flush()
+
+
+@celery_app.task
+def reencrypt_credentials(batch_size: int = None):
+    """
+    Re-encrypt all stored credentials with the current ENCRYPTION_KEY
+    Run after rotating keys (old key in ENCRYPTION_OLD_KEYS); resumable
+    """
+    db = SessionLocal()
+    
+    try:
+        return reencrypt_users(db, batch_size)
+    finally:
+        db.close()
+
+
+def _get_sync_state(db: Session, user_id: str, sync_type: str) -> SyncState:
+    sync_state = db.query(SyncState).filter(
+        SyncState.user_id == user_id,
+        SyncState.sync_type == sync_type
+    ).first()
+    if not sync_state:
+        sync_state = SyncState(user_id=user_id, sync_type=sync_type, state={})
+        db.add(sync_state)
+    return sync_state
+
+
+# Celery Beat schedule
 celery_app.conf.beat_schedule = {
     'execute-pending-actions': {
         'task': 'app.tasks.linkedin_tasks.execute_pending_actions',
         'schedule': 300.0,  # 5 minutes
     },
+    'sync-all-connections': {
+        'task': 'app.tasks.linkedin_tasks.sync_all_connections',
+        'schedule': 1800.0,  # 30 minutes
+    },
+    'pregenerate-action-content': {
+        'task': 'app.tasks.linkedin_tasks.pregenerate_action_content',
+        'schedule': 300.0,  # 5 minutes
+    },
+    'poll-scoring-batches': {
+        'task': 'app.tasks.linkedin_tasks.poll_scoring_batches',
+        'schedule': 300.0,  # 5 minutes
+    },
+    'poll-inboxes': {
+        'task': 'app.tasks.linkedin_tasks.poll_inboxes',
+        'schedule': 300.0,  # 5 minutes (per-user interval is adaptive)
+    },
+    'enqueue-pending-scores': {
+        'task': 'app.tasks.linkedin_tasks.enqueue_pending_scores',
+        'schedule': 300.0,  # 5 minutes
+    },
+    'purge-idempotency-keys': {
+        'task': 'app.tasks.linkedin_tasks.purge_idempotency_keys',
+        'schedule': 3600.0,  # 1 hour
+    },
 }
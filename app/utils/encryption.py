@@ -1,21 +1,35 @@
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+from functools import lru_cache
 from app.config import settings
+import hashlib
 import json
 import base64
 
 
-def _cipher():
+def _cipher() -> MultiFernet:
     if not settings.ENCRYPTION_KEY:
         raise ValueError("ENCRYPTION_KEY not set in environment")
-    
+
+    return _build_cipher(settings.ENCRYPTION_KEY, settings.ENCRYPTION_OLD_KEYS)
+
+
+@lru_cache(maxsize=4)
+def _build_cipher(primary_key: str, old_keys: str) -> MultiFernet:
+    """
+    Built once per key set: the primary key encrypts, old keys (comma-separated)
+    are only tried for decryption until re-encryption has rotated every row
+    """
+    keys = [primary_key] + [k.strip() for k in old_keys.split(",") if k.strip()]
+    return MultiFernet([_fernet(k) for k in keys])
+
+
+def _fernet(key: str) -> Fernet:
     # Validate key format
     try:
-        key = settings.ENCRYPTION_KEY.encode()
-        # Test if it's a valid Fernet key
-        base64.urlsafe_b64decode(key)
-        if len(base64.urlsafe_b64decode(key)) != 32:
+        raw = base64.urlsafe_b64decode(key.encode())
+        if len(raw) != 32:
             raise ValueError("Encryption key must be 32 bytes (44 chars base64)")
-        return Fernet(key)
+        return Fernet(key.encode())
     except Exception as e:
         raise ValueError(f"Invalid ENCRYPTION_KEY format: {e}. Generate one with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'") from e
 
@@ -28,3 +42,13 @@ def encrypt_data(data: dict) -> str:
 def decrypt_data(encrypted: str) -> dict:
     """Decrypt sensitive data"""
     return json.loads(_cipher().decrypt(encrypted.encode()).decode())
+
+
+def rotate_data(encrypted: str) -> str:
+    """Re-encrypt a token with the primary key (raises InvalidToken if no key matches)"""
+    return _cipher().rotate(encrypted.encode()).decode()
+
+
+def primary_key_id() -> str:
+    """Short fingerprint of the primary key (never the key itself)"""
+    return hashlib.sha256(settings.ENCRYPTION_KEY.encode()).hexdigest()[:12]
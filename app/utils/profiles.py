@@ -0,0 +1,30 @@
+from urllib.parse import urlparse, unquote
+
+
+def normalize_profile_url(url: str) -> str:
+    """
+    Normalize a LinkedIn profile URL to a stable key: "linkedin.com/in/<slug>"
+
+    Strips scheme, subdomain (www., de., ...), query string, fragment,
+    trailing slashes and case so the same profile always maps to one key.
+    """
+    if not url:
+        return ""
+
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+
+    parsed = urlparse(url)
+    parts = [p for p in unquote(parsed.path).lower().split("/") if p]
+
+    if len(parts) >= 2 and parts[0] == "in":
+        return f"linkedin.com/in/{parts[1]}"
+
+    # Not a /in/ profile URL - fall back to host + path
+    return f"linkedin.com/{'/'.join(parts)}"
+
+
+def profile_url_from_identifier(public_identifier: str) -> str:
+    """Build the normalized profile key from a LinkedIn public identifier"""
+    return normalize_profile_url(f"https://www.linkedin.com/in/{public_identifier}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Anthropic and OpenAI endpoints used by LLMService
+
+Covers sync calls plus the batch APIs, so batch scoring can be tested
+end to end without network access or API keys:
+
+    python -m uvicorn --app-dir scripts mock_llm_server:app --port 8400
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8400 OPENAI_BASE_URL=http://127.0.0.1:8400 \
+        python -m uvicorn app.main:app --port 8000
+
+Batches finish MOCK_BATCH_SECONDS after submission (default 0).
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Mock LLM provider")
+
+BATCH_SECONDS = float(os.environ.get("MOCK_BATCH_SECONDS", "0"))
+
+# In-memory state
+anthropic_batches = {}  # id -> {created, requests}
+openai_files = {}  # id -> bytes
+openai_batches = {}  # id -> {created, input_file_id}
+
+
+def _reply(system: str, prompt: str) -> str:
+    """Deterministic answer: a score JSON for scoring prompts, short text otherwise"""
+    if "Score LinkedIn prospects" not in (system or ""):
+        return "Hi! Great to connect - would love to hear what you're working on."
+
+    match = re.search(r"Looking for: (.*)", system)
+    wanted = re.findall(r"[a-z]+", match.group(1).lower()) if match else []
+    hits = sum(1 for word in set(wanted) if word in prompt.lower())
+    score = min(10, 3 + 3 * hits)
+    return json.dumps({
+        "score": score,
+        "reasoning": f"Matched {hits} target keyword(s)",
+        "recommended_hook": "Ask about their current priorities"
+    })
+
+
+def _anthropic_message(params: dict) -> dict:
+    system = "".join(block.get("text", "") for block in params.get("system") or [])
+    prompt = params["messages"][-1]["content"]
+    text = _reply(system, prompt)
+
+    # Forced tool call -> answer with a tool_use block like the real API
+    if params.get("tools"):
+        content = [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:12]}",
+                    "name": params["tools"][0]["name"], "input": json.loads(text)}]
+    else:
+        content = [{"type": "text", "text": text}]
+
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:12]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get("model"),
+        "content": content,
+        "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 40, "cache_read_input_tokens": len(system) // 4}
+    }
+
+
+def _openai_completion(body: dict) -> dict:
+    system = "".join(m["content"] for m in body["messages"] if m["role"] == "system")
+    prompt = body["messages"][-1]["content"]
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": _reply(system, prompt)}}],
+        "usage": {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": 40,
+            "prompt_tokens_details": {"cached_tokens": len(system) // 4}
+        }
+    }
+
+
+def _finished(created: float) -> bool:
+    return time.time() - created >= BATCH_SECONDS
+
+
+# --- Anthropic ---
+
+@app.post("/v1/messages")
+async def anthropic_messages(request: Request):
+    return _anthropic_message(await request.json())
+
+
+@app.post("/v1/messages/batches")
+async def anthropic_create_batch(request: Request):
+    body = await request.json()
+    batch_id = f"msgbatch_{uuid.uuid4().hex[:12]}"
+    anthropic_batches[batch_id] = {"created": time.time(), "requests": body["requests"]}
+    return {"id": batch_id, "type": "message_batch", "processing_status": "in_progress"}
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+async def anthropic_get_batch(batch_id: str, request: Request):
+    batch = anthropic_batches.get(batch_id)
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+
+    ended = _finished(batch["created"])
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "results_url": f"{str(request.base_url).rstrip('/')}/v1/messages/batches/{batch_id}/results" if ended else None
+    }
+
+
+@app.get("/v1/messages/batches/{batch_id}/results")
+async def anthropic_batch_results(batch_id: str):
+    batch = anthropic_batches.get(batch_id)
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+
+    def lines():
+        for item in batch["requests"]:
+            yield json.dumps({
+                "custom_id": item["custom_id"],
+                "result": {"type": "succeeded", "message": _anthropic_message(item["params"])}
+            }) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-jsonl")
+
+
+# --- OpenAI ---
+
+@app.post("/v1/chat/completions")
+async def openai_chat(request: Request):
+    return _openai_completion(await request.json())
+
+
+@app.post("/v1/files")
+async def openai_upload(file: UploadFile = File(...), purpose: str = Form(...)):
+    file_id = f"file-{uuid.uuid4().hex[:12]}"
+    openai_files[file_id] = await file.read()
+    return {"id": file_id, "object": "file", "purpose": purpose}
+
+
+@app.post("/v1/batches")
+async def openai_create_batch(request: Request):
+    body = await request.json()
+    if body["input_file_id"] not in openai_files:
+        raise HTTPException(404, "Input file not found")
+
+    batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+    openai_batches[batch_id] = {"created": time.time(), "input_file_id": body["input_file_id"]}
+    return {"id": batch_id, "object": "batch", "status": "validating"}
+
+
+@app.get("/v1/batches/{batch_id}")
+async def openai_get_batch(batch_id: str):
+    batch = openai_batches.get(batch_id)
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+
+    if not _finished(batch["created"]):
+        return {"id": batch_id, "object": "batch", "status": "in_progress"}
+
+    # Build the output file on completion
+    output_id = batch.setdefault("output_file_id", f"file-{uuid.uuid4().hex[:12]}")
+    if output_id not in openai_files:
+        out = []
+        for line in openai_files[batch["input_file_id"]].decode().splitlines():
+            item = json.loads(line)
+            out.append(json.dumps({
+                "custom_id": item["custom_id"],
+                "response": {"status_code": 200, "body": _openai_completion(item["body"])}
+            }))
+        openai_files[output_id] = "\n".join(out).encode()
+
+    return {"id": batch_id, "object": "batch", "status": "completed", "output_file_id": output_id}
+
+
+@app.get("/v1/files/{file_id}/content")
+async def openai_file_content(file_id: str):
+    if file_id not in openai_files:
+        raise HTTPException(404, "File not found")
+    return StreamingResponse(iter([openai_files[file_id]]), media_type="application/x-jsonl")
@@ -0,0 +1,168 @@
+"""
+Shared fixtures: a throwaway SQLite database and a TestClient for the app
+
+Environment is set before any app module is imported (settings are read at
+import): SQLite in a temp dir, a fresh encryption key, SYNC_MODE so nothing
+needs Celery/Redis, tracing and Prometheus multiprocess off.
+"""
+
+import json
+import os
+import tempfile
+
+from cryptography.fernet import Fernet
+
+_tmp = tempfile.mkdtemp(prefix="linkedin_agent_tests_")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_tmp}/test.db",
+    "ENCRYPTION_KEY": Fernet.generate_key().decode(),
+    "SYNC_MODE": "true",
+    "TRACING_EXPORTER": "none",
+    "LOG_FORMAT": "text",
+    "EMBEDDING_DIR": f"{_tmp}/embeddings",
+    "PROFILE_DIR": f"{_tmp}/profiles",
+})
+os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)  # prometheus_client treats even "" as multiprocess mode
+
+import pytest  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.utils.encryption import encrypt_data  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app  # Creates tables and search index
+    return app
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.services import scoring_queue
+
+    # SYNC_MODE scoring workers are bound to the event loop of the TestClient that started them
+    monkeypatch.setattr(scoring_queue, "_queue", None)
+    monkeypatch.setattr(scoring_queue, "_workers", [])
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def _clean_state(app):
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    from app.services import credential_cache, response_cache
+    credential_cache._cache.clear()
+    response_cache._cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    from app.models import User
+
+    def make(user_id="u1", llm_config=None, **fields):
+        fields.setdefault("daily_limits", {"connections": 50, "messages": 30})
+        user = User(
+            user_id=user_id,
+            linkedin_email="a@example.com",
+            linkedin_credentials_encrypted=encrypt_data({"email": "a@example.com", "password": "pw"}),
+            llm_config_encrypted=encrypt_data(llm_config or {"type": "anthropic", "model": "m", "api_key": "sk-test"}),
+            **fields
+        )
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_campaign(db):
+    from app.models import Campaign
+
+    def make(campaign_id="c1", user_id="u1", **fields):
+        fields.setdefault("target_filters", {"title": ["CEO"]})
+        fields.setdefault("sequence", [{"day": 0, "action": "connect", "template": "Hi {first_name}"}])
+        fields.setdefault("stats", {"sent": 0, "accepted": 0, "replied": 0, "views": 0})
+        campaign = Campaign(campaign_id=campaign_id, user_id=user_id, name="Campaign", **fields)
+        db.add(campaign)
+        db.commit()
+        return campaign
+    return make
+
+
+@pytest.fixture
+def make_prospect(db):
+    from app.models import Prospect
+    from app.utils.profiles import normalize_profile_url
+
+    counter = iter(range(1, 1_000_000))
+
+    def make(user_id="u1", campaign_id="c1", **fields):
+        n = next(counter)
+        fields.setdefault("linkedin_url", f"https://www.linkedin.com/in/person-{n}")
+        fields.setdefault("full_name", f"Person {n}")
+        fields.setdefault("stage", "new")
+        prospect = Prospect(
+            prospect_id=f"prospect_{n}", user_id=user_id, campaign_id=campaign_id,
+            linkedin_url_normalized=normalize_profile_url(fields["linkedin_url"]), **fields
+        )
+        db.add(prospect)
+        db.commit()
+        return prospect
+    return make
+
+
+class FakeLLMProvider:
+    """
+    Answers LLMService HTTP calls in-process (httpx.MockTransport)
+    `respond(request, payload)` returns an httpx.Response; the default is a
+    plain Anthropic/OpenAI text completion of `text`
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.text = "Hello there"
+        self.respond = None
+
+    def handle(self, request):
+        import httpx
+        payload = json.loads(request.content) if request.content else {}
+        self.requests.append((request, payload))
+        if self.respond:
+            return self.respond(request, payload)
+        if "chat/completions" in request.url.path:
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": self.text}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5}
+            })
+        return httpx.Response(200, json={
+            "content": [{"type": "text", "text": self.text}],
+            "usage": {"input_tokens": 10, "output_tokens": 5}
+        })
+
+
+@pytest.fixture
+def llm_provider(monkeypatch):
+    import httpx
+    from app.services import llm_failover, llm_limiter
+
+    provider = FakeLLMProvider()
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(provider.handle), **kwargs))
+    monkeypatch.setattr(llm_failover, "_breakers", {})
+    monkeypatch.setattr(llm_failover, "_latencies", {})
+    monkeypatch.setattr(llm_limiter, "_limiters", {})
+    return provider
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models import Action
+from app.services import analytics
+
+
+def _add(client, n):
+    return client.post("/api/prospects/add", json={
+        "user_id": "u1", "campaign_id": "c1", "linkedin_url": f"https://www.linkedin.com/in/p{n}", "title": "CEO"
+    }).json()
+
+
+def test_rollups_follow_prospect_changes(client, llm_provider, make_user, make_campaign):
+    make_user()
+    make_campaign()
+    added = [_add(client, n) for n in range(3)]
+    client.post(f"/api/prospects/{added[0]['prospect_id']}/update-stage", params={"stage": "replied"})
+
+    report = client.get("/api/campaigns/c1/analytics", params={"days": 7}).json()
+    assert report["funnel"]["prospects"] == 3
+    assert report["stages"]["new"] == 2 and report["stages"]["replied"] == 1
+    assert len(report["daily"]) == 7
+    assert report["daily"][-1]["day"] == datetime.now(timezone.utc).date().isoformat()
+    assert report["daily"][-1]["prospects_added"] == 3
+
+
+def test_counters_and_rates(db, make_user, make_campaign):
+    make_user()
+    make_campaign()
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    analytics.record(db, "c1", connections_sent=4, messages_sent=0)
+    analytics.record(db, "c1", yesterday, connections_sent=4, accepted=2, replied=1)
+    analytics.score_changed(db, "c1", None, 7)
+    analytics.score_changed(db, "c1", 7, 9)
+    analytics.record(db, None, connections_sent=1)  # No campaign - ignored
+    db.commit()
+
+    report = analytics.campaign_analytics(db, "c1", days=2)
+    assert report["totals"]["connections_sent"] == 8
+    assert report["rates"] == {"acceptance_rate": 0.25, "reply_rate": 0.5}
+    assert report["score_distribution"]["7"] == 0 and report["score_distribution"]["9"] == 1
+    assert [d["connections_sent"] for d in report["daily"]] == [4, 4]
+
+
+def test_rates_without_activity_are_null(db, make_user, make_campaign):
+    make_user()
+    make_campaign()
+    assert analytics.campaign_analytics(db, "c1")["rates"] == {"acceptance_rate": None, "reply_rate": None}
+
+
+def test_rebuild_recomputes_from_rows(db, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    now = datetime.now(timezone.utc)
+    accepted = make_prospect(stage="connected", connection_status="accepted", ai_score=8, last_interaction_at=now)
+    make_prospect(stage="new", ai_score=3)
+    for n, (action_type, status) in enumerate([("connect", "completed"), ("message", "completed"),
+                                               ("connect", "failed")]):
+        db.add(Action(action_id=f"a{n}", user_id="u1", prospect_id=accepted.prospect_id, campaign_id="c1",
+                      action_type=action_type, action_data={}, scheduled_for=now, executed_at=now, status=status))
+    analytics.record(db, "c1", connections_sent=100)  # Drifted counter - replaced by the rebuild
+    db.commit()
+
+    analytics.rebuild_campaign(db, "c1")
+    db.commit()
+
+    report = analytics.campaign_analytics(db, "c1")
+    assert report["funnel"] == {"prospects": 2, "connections_sent": 1, "accepted": 1, "messages_sent": 1, "replied": 0}
+    assert report["totals"]["actions_failed"] == 1
+    assert report["stages"]["connected"] == 1 and report["stages"]["new"] == 1
+    assert report["score_distribution"]["8"] == 1 and report["score_distribution"]["3"] == 1
+
+
+def test_unknown_campaign(client):
+    assert client.get("/api/campaigns/missing/analytics").status_code == 404
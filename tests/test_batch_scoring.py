@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import httpx
+
+from app.models import Prospect, ScoringBatch
+from app.services.llm_service import LLMService
+from app.tasks import linkedin_tasks
+
+ANTHROPIC = {"type": "anthropic", "model": "claude-test", "api_key": "sk-ant"}
+
+
+def _tool_result(custom_id, score):
+    return {"custom_id": custom_id, "result": {"type": "succeeded", "message": {"content": [
+        {"type": "tool_use", "input": {"score": score, "reasoning": "fits", "recommended_hook": "hi"}}
+    ]}}}
+
+
+def test_submit_sends_one_structured_request_per_prospect(llm_provider):
+    llm_provider.respond = lambda request, payload: httpx.Response(200, json={"id": "msgbatch_1"})
+    prospects = {"prospect-1": {"full_name": "A"}, "prospect-2": {"full_name": "B"}}
+
+    assert asyncio.run(LLMService(ANTHROPIC).submit_scoring_batch(prospects, {"title": ["CEO"]})) == "msgbatch_1"
+
+    _, payload = llm_provider.requests[0]
+    assert [r["custom_id"] for r in payload["requests"]] == ["prospect-1", "prospect-2"]
+    params = payload["requests"][0]["params"]
+    assert params["tool_choice"]["name"] == "record_prospect_score"
+    assert params["system"] == payload["requests"][1]["params"]["system"]
+
+
+def test_poll_applies_finished_batch(db, llm_provider, make_user, make_campaign, make_prospect):
+    make_user(llm_config=ANTHROPIC)
+    make_campaign()
+    alice, bob = make_prospect(), make_prospect()
+    db.add(ScoringBatch(batch_id="b1", provider_batch_id="msgbatch_1", user_id="u1", campaign_id="c1",
+                        provider="anthropic", status="submitted", request_count=3))
+    db.commit()
+
+    results = "\n".join(json.dumps(line) for line in [
+        _tool_result(f"prospect-{alice.id}", 9),
+        {"custom_id": f"prospect-{bob.id}", "result": {"type": "errored"}},
+        _tool_result("prospect-999999", 11),  # Invalid score
+    ])
+
+    def respond(request, payload):
+        if request.url.path.endswith("/msgbatch_1"):
+            return httpx.Response(200, json={"processing_status": "ended", "results_url": "https://results.test/r"})
+        return httpx.Response(200, text=results)
+    llm_provider.respond = respond
+
+    assert asyncio.run(linkedin_tasks._poll_scoring_batches()) == {"completed": 1}
+
+    db.expire_all()
+    batch = db.query(ScoringBatch).one()
+    assert (batch.status, batch.scored_count, batch.failed_count) == ("completed", 1, 2)
+    assert db.get(Prospect, alice.id).ai_score == 9
+    assert db.get(Prospect, bob.id).ai_score is None
+
+
+def test_poll_leaves_running_batches(db, llm_provider, make_user, make_campaign):
+    make_user(llm_config=ANTHROPIC)
+    make_campaign()
+    db.add(ScoringBatch(batch_id="b1", provider_batch_id="msgbatch_1", user_id="u1", campaign_id="c1",
+                        provider="anthropic", status="submitted"))
+    db.commit()
+    llm_provider.respond = lambda request, payload: httpx.Response(200, json={"processing_status": "in_progress"})
+
+    assert asyncio.run(linkedin_tasks._poll_scoring_batches()) == {"completed": 0}
+    db.expire_all()
+    assert db.query(ScoringBatch).one().status == "submitted"
+
+
+def test_poll_logs_failures_with_the_batch_id(db, llm_provider, make_user, make_campaign, caplog):
+    make_user(llm_config=ANTHROPIC)
+    make_campaign()
+    db.add(ScoringBatch(batch_id="b1", provider_batch_id="msgbatch_1", user_id="u1", campaign_id="c1",
+                        provider="anthropic", status="submitted"))
+    db.commit()
+    llm_provider.respond = lambda request, payload: httpx.Response(404, json={"error": "not found"})
+
+    assert asyncio.run(linkedin_tasks._poll_scoring_batches()) == {"completed": 0}
+    [record] = [r for r in caplog.records if r.name == linkedin_tasks.logger.name]
+    assert record.getMessage() == "Scoring batch b1 poll failed"
+    assert record.batch_id == "b1" and record.exc_info
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.config import settings
+from app.models import User
+from app.services import credential_cache
+from app.utils.encryption import encrypt_data
+
+
+@pytest.fixture
+def decrypts(monkeypatch):
+    """Count decryptions; no Redis subscriber in tests"""
+    calls = []
+    real = credential_cache.decrypt_data
+    monkeypatch.setattr(credential_cache, "decrypt_data", lambda token: calls.append(token) or real(token))
+    monkeypatch.setattr(credential_cache, "_ensure_subscriber", lambda: None)
+    return calls
+
+
+def _expire(user_id):
+    entry = credential_cache._cache[user_id]
+    credential_cache._cache[user_id] = entry._replace(expires_at=0)
+
+
+def test_secrets_are_decrypted_once_per_version(db, make_user, decrypts):
+    make_user()
+    secrets = credential_cache.get_user_secrets(db, "u1")
+    assert secrets.linkedin_creds["password"] == "pw"
+    assert secrets.llm_config["api_key"] == "sk-test"
+    assert len(decrypts) == 2
+
+    assert credential_cache.get_user_secrets(db, "u1") is secrets
+    _expire("u1")
+    assert credential_cache.get_user_secrets(db, "u1") is secrets  # Stale but unchanged - renewed
+    assert len(decrypts) == 2
+
+
+def test_changed_user_is_decrypted_again_after_ttl(db, make_user, decrypts):
+    user = make_user()
+    credential_cache.get_user_secrets(db, "u1")
+
+    user.llm_config_encrypted = encrypt_data({"type": "openai", "model": "gpt", "api_key": "sk-new"})
+    user.updated_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    db.commit()
+    assert credential_cache.get_user_secrets(db, "u1").llm_config["api_key"] == "sk-test"  # Within TTL
+
+    _expire("u1")
+    assert credential_cache.get_user_secrets(db, "u1").llm_config["api_key"] == "sk-new"
+
+
+def test_invalidate_drops_the_entry_even_without_redis(db, make_user, decrypts, monkeypatch):
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://127.0.0.1:1/0")
+    make_user()
+    credential_cache.get_user_secrets(db, "u1")
+
+    credential_cache.invalidate_user("u1")
+    assert "u1" not in credential_cache._cache
+
+
+def test_unknown_user(db, decrypts):
+    assert credential_cache.get_user_secrets(db, "nobody") is None
+
+
+def test_loaded_row_reuses_cached_secrets(db, make_user, decrypts):
+    make_user()
+    cached = credential_cache.get_user_secrets(db, "u1")
+    assert credential_cache.secrets_for(db.query(User).one()) is cached
+    assert len(decrypts) == 2
+
+
+def test_cache_is_bounded(db, make_user, decrypts, monkeypatch):
+    monkeypatch.setattr(settings, "CREDENTIAL_CACHE_MAX_ENTRIES", 2)
+    for user_id in ("u1", "u2", "u3"):
+        make_user(user_id)
+        credential_cache.get_user_secrets(db, user_id)
+    assert list(credential_cache._cache) == ["u2", "u3"]
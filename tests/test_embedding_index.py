@@ -0,0 +1,108 @@
+import threading
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Prospect
+from app.services.embedding_index import CampaignEmbeddingIndex, embed_texts, profile_text
+
+CEO_QUERY = {"title": ["CEO"]}
+
+
+def _ranked_ids(index, k=10):
+    return [pk for pk, _ in index.top_k(embed_texts([profile_text(CEO_QUERY)])[0], k)]
+
+
+def test_sync_appends_new_prospects_once(db, make_prospect, tmp_path):
+    ceo = make_prospect(title="CEO", company="Acme")
+    engineer = make_prospect(title="Software Engineer", company="Initech")
+    index = CampaignEmbeddingIndex("c1", str(tmp_path))
+
+    assert index.sync(db) == {"added": 2, "updated": 0}
+    assert index.sync(db)["added"] == 0
+    assert len(index) == 2
+    assert _ranked_ids(index) == [ceo.id, engineer.id]
+
+    newcomer = make_prospect(title="CEO", company="Globex")
+    assert index.sync(db)["added"] == 1
+    assert set(_ranked_ids(index)) == {ceo.id, engineer.id, newcomer.id}
+
+
+def test_edited_prospect_is_re_embedded(db, make_prospect, tmp_path):
+    first = make_prospect(title="Software Engineer")
+    second = make_prospect(title="CEO")
+    index = CampaignEmbeddingIndex("c1", str(tmp_path))
+    index.sync(db)
+    assert _ranked_ids(index)[0] == second.id
+
+    first.title = "Chief Executive Officer"
+    second.title = "Software Engineer"
+    db.commit()
+
+    result = index.sync(db)
+    assert result["added"] == 0
+    assert result["updated"] >= 2
+    assert len(index) == 2
+    assert _ranked_ids(index)[0] == first.id
+
+
+def test_index_without_watermark_is_re_embedded_once(db, make_prospect, tmp_path):
+    make_prospect(title="CEO")
+    index = CampaignEmbeddingIndex("c1", str(tmp_path))
+    index.sync(db)
+
+    (tmp_path / "c1.meta").unlink()  # As left by a version that didn't track edits
+    assert index.sync(db)["updated"] == 1
+    assert (tmp_path / "c1.meta").exists()
+
+
+def test_concurrent_syncs_do_not_duplicate_rows(db, make_prospect, tmp_path):
+    for n in range(40):
+        make_prospect(title="CEO" if n % 2 else "Engineer")
+    errors = []
+
+    def sync():
+        session = SessionLocal()
+        try:
+            CampaignEmbeddingIndex("c1", str(tmp_path)).sync(session, chunk_size=7)
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=sync) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    index = CampaignEmbeddingIndex("c1", str(tmp_path))
+    assert len(index) == 40
+    assert len(set(_ranked_ids(index, 100))) == 40
+
+
+def test_ranked_endpoint(client, monkeypatch, tmp_path, make_user, make_campaign, make_prospect):
+    monkeypatch.setattr(settings, "EMBEDDING_DIR", str(tmp_path))
+    make_user()
+    make_campaign()
+    make_prospect(title="Software Engineer", full_name="Eng")
+    make_prospect(title="CEO", full_name="Boss")
+
+    response = client.get("/api/prospects/campaign/c1/ranked", params={"limit": 1})
+    assert response.status_code == 200
+    assert [p["full_name"] for p in response.json()] == ["Boss"]
+    assert client.get("/api/prospects/campaign/missing/ranked").status_code == 404
+
+
+def test_ranked_endpoint_for_empty_campaign(client, db, monkeypatch, tmp_path, make_user, make_campaign,
+                                            make_prospect):
+    monkeypatch.setattr(settings, "EMBEDDING_DIR", str(tmp_path))
+    make_user()
+    make_campaign()
+    assert client.get("/api/prospects/campaign/c1/ranked").json() == []
+
+    # Rows without updated_at (inserted outside the ORM defaults) don't break the watermark either
+    prospect = make_prospect(title="CEO")
+    db.execute(Prospect.__table__.update().values(updated_at=None))
+    db.commit()
+    assert [p["prospect_id"] for p in client.get("/api/prospects/campaign/c1/ranked").json()] == [prospect.prospect_id]
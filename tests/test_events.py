@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from app.api.routes import users as user_routes
+from app.database import SessionLocal
+from app.services import events
+
+
+async def _next_event(stream, publish, timeout=2):
+    """Start waiting on `stream`, then run `publish`, then return what arrived"""
+    waiting = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.01)  # Let the subscription register
+    publish()
+    return await asyncio.wait_for(waiting, timeout)
+
+
+def _emit_and(finish, user_id="u1", **data):
+    def publish():
+        db = SessionLocal()
+        events.emit(db, user_id, "action.status", **data)
+        finish(db)
+        db.close()
+    return publish
+
+
+def test_events_are_published_after_commit():
+    async def run():
+        stream = events.subscribe("u1", heartbeat=5)
+        message = await _next_event(stream, _emit_and(lambda db: db.commit(), action_id="a1", status="completed"))
+        await stream.aclose()
+        return message
+
+    message = asyncio.run(run())
+    assert message["type"] == "action.status" and message["user_id"] == "u1"
+    assert message["data"] == {"action_id": "a1", "status": "completed"}
+
+
+def test_rolled_back_events_are_dropped():
+    async def run():
+        stream = events.subscribe("u1", heartbeat=0.2)
+        message = await _next_event(stream, _emit_and(lambda db: db.rollback(), action_id="a1"))
+        await stream.aclose()
+        return message
+
+    assert asyncio.run(run()) is None  # Only the heartbeat arrives
+
+
+def test_other_users_events_are_not_delivered():
+    async def run():
+        stream = events.subscribe("u1", heartbeat=0.2)
+        message = await _next_event(stream, _emit_and(lambda db: db.commit(), user_id="u2"))
+        await stream.aclose()
+        return message
+
+    assert asyncio.run(run()) is None
+    assert not events._subscribers.get("u1")
+
+
+def test_sse_endpoint_formats_events(make_user, monkeypatch):
+    make_user()
+    monkeypatch.setattr(user_routes, "SSE_HEARTBEAT_SECONDS", 0.2)
+
+    async def run():
+        response = await user_routes.stream_user_events("u1", db=SessionLocal())
+        body = response.body_iterator
+        chunks = [await body.__anext__()]
+        chunks.append(await _next_event(body, _emit_and(lambda db: db.commit(), action_id="a1")))
+        chunks.append(await body.__anext__())
+        await body.aclose()
+        return response, chunks
+
+    response, (retry, event, heartbeat) = asyncio.run(run())
+    assert response.media_type == "text/event-stream"
+    assert retry.startswith("retry: ")
+    assert event.startswith("event: action.status\ndata: ")
+    assert json.loads(event.split("data: ", 1)[1])["data"] == {"action_id": "a1"}
+    assert heartbeat == ": keep-alive\n\n"
+
+
+def test_sse_endpoint_unknown_user(client):
+    assert client.get("/api/users/nobody/events").status_code == 404
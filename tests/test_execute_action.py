@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import Action, Campaign
+from app.tasks import linkedin_tasks
+
+
+class FakeLinkedIn:
+    """Stands in for the Playwright-backed LinkedInService"""
+
+    def __init__(self, creds):
+        pass
+
+    async def login(self):
+        pass
+
+    async def send_connection_request(self, url, note):
+        return {"success": True}
+
+    async def visit_profile(self, url):
+        return {"success": True}
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.parametrize("action_type, action_data, counter", [
+    ("connect", {"note": "Hi Alice"}, "sent"),
+    ("visit_profile", {}, "views"),
+])
+def test_completed_action_counts_in_campaign_stats(db, monkeypatch, make_user, make_campaign, make_prospect,
+                                                   action_type, action_data, counter):
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", FakeLinkedIn)
+    make_user()
+    campaign = make_campaign()
+    stamped = campaign.updated_at
+    prospect = make_prospect()
+    db.add(Action(action_id="a1", user_id="u1", prospect_id=prospect.prospect_id, campaign_id="c1",
+                  action_type=action_type, action_data=action_data,
+                  scheduled_for=datetime.now(timezone.utc), status="pending"))
+    db.commit()
+
+    asyncio.run(linkedin_tasks._execute_action("a1"))
+
+    db.expire_all()
+    assert db.query(Action).one().status == "completed"
+    campaign = db.query(Campaign).one()
+    assert campaign.stats[counter] == 1
+    assert campaign.updated_at != stamped
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.models import Campaign, IdempotencyKey
+
+STEP = {"day": 0, "action": "connect", "template": "Hi {first_name}"}
+
+
+def _create(client, user_id="u1", key="key-1", name="Launch"):
+    return client.post(
+        "/api/campaigns/create",
+        json={"user_id": user_id, "name": name, "target_filters": {"title": ["CEO"]}, "sequence": [STEP]},
+        headers={"Idempotency-Key": key}
+    )
+
+
+def _requests(route, status="200"):
+    return REGISTRY.get_sample_value(
+        "http_request_duration_seconds_count", {"method": "POST", "route": route, "status": status}
+    ) or 0
+
+
+def test_retry_replays_the_first_response(client, db, make_user):
+    make_user()
+    first = _create(client)
+    retry = _create(client)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Campaign).count() == 1
+
+
+def test_same_key_with_a_different_body_is_rejected(client, make_user):
+    make_user()
+    _create(client)
+    assert _create(client, name="Other").status_code == 422
+
+
+def test_keys_are_scoped_per_user(client, db, make_user):
+    make_user("u1")
+    make_user("u2")
+    first = _create(client, "u1").json()
+    second = _create(client, "u2").json()
+
+    assert first["campaign_id"] != second["campaign_id"]
+    assert {c.user_id for c in db.query(Campaign)} == {"u1", "u2"}
+    assert {k.user_id for k in db.query(IdempotencyKey)} == {"u1", "u2"}
+
+
+def test_client_errors_are_stored(client, db):
+    assert _create(client, "nobody").status_code == 404
+    assert db.query(IdempotencyKey).one().status == "completed"
+
+
+def test_replays_are_labelled_with_the_route_template(client, make_user):
+    make_user()
+    _create(client)
+    route_before, unmatched_before = _requests("/api/campaigns/create"), _requests("unmatched")
+
+    _create(client)
+    assert _requests("/api/campaigns/create") == route_before + 1
+    assert _requests("unmatched") == unmatched_before
+
+
+@pytest.mark.parametrize("age_minutes, status_code, campaigns", [(10, 409, 1), (31, 200, 2)])
+def test_in_progress_keys_are_only_taken_over_after_the_timeout(client, db, make_user, age_minutes, status_code,
+                                                                campaigns):
+    make_user()
+    _create(client)
+    # As if the first request were still running (or its process had crashed) for age_minutes
+    db.query(IdempotencyKey).update({
+        "status": "in_progress",
+        "created_at": datetime.now(timezone.utc) - timedelta(minutes=age_minutes)
+    })
+    db.commit()
+
+    retry = _create(client)
+    assert retry.status_code == status_code
+    assert "Idempotent-Replayed" not in retry.headers
+    assert db.query(Campaign).count() == campaigns
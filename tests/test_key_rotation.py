@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.config import settings
+from app.models import User
+from app.services.key_rotation import reencrypt_users
+from app.utils.encryption import decrypt_data, encrypt_data, primary_key_id
+
+
+@pytest.fixture
+def rotate_to_new_key(monkeypatch):
+    """Make a fresh key primary, keeping the current one for decryption"""
+    def rotate():
+        monkeypatch.setattr(settings, "ENCRYPTION_OLD_KEYS", settings.ENCRYPTION_KEY)
+        monkeypatch.setattr(settings, "ENCRYPTION_KEY", Fernet.generate_key().decode())
+    return rotate
+
+
+def _only_primary_key(monkeypatch):
+    monkeypatch.setattr(settings, "ENCRYPTION_OLD_KEYS", "")
+
+
+def test_old_keys_still_decrypt(rotate_to_new_key, monkeypatch):
+    token = encrypt_data({"password": "pw"})
+    rotate_to_new_key()
+    assert decrypt_data(token) == {"password": "pw"}
+
+    _only_primary_key(monkeypatch)
+    with pytest.raises(InvalidToken):
+        decrypt_data(token)
+
+
+def test_invalid_key_is_reported(monkeypatch):
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "not-a-key")
+    with pytest.raises(ValueError, match="Invalid ENCRYPTION_KEY"):
+        encrypt_data({})
+
+
+def test_reencrypts_every_user_and_checkpoints(db, make_user, rotate_to_new_key, monkeypatch, tmp_path):
+    for n in range(5):
+        make_user(f"u{n}", linkedin_session=encrypt_data({"cookies": []}))
+    rotate_to_new_key()
+    checkpoint = tmp_path / "rotation.json"
+
+    stats = reencrypt_users(db, batch_size=2, checkpoint_path=str(checkpoint))
+    assert stats == {"rotated": 5, "skipped": 0, "failed": 0, "resumed_from": 0}
+
+    saved = json.loads(checkpoint.read_text())
+    assert saved["key_id"] == primary_key_id() and saved["completed"]
+
+    _only_primary_key(monkeypatch)
+    db.expire_all()
+    for user in db.query(User):
+        assert decrypt_data(user.linkedin_credentials_encrypted)["password"] == "pw"
+        assert decrypt_data(user.llm_config_encrypted)["api_key"] == "sk-test"
+        assert decrypt_data(user.linkedin_session) == {"cookies": []}
+
+
+def test_resumes_from_checkpoint_for_the_same_key(db, make_user, rotate_to_new_key, tmp_path):
+    users = [make_user(f"u{n}") for n in range(3)]
+    rotate_to_new_key()
+    checkpoint = tmp_path / "rotation.json"
+    checkpoint.write_text(json.dumps({"key_id": primary_key_id(), "last_id": users[1].id}))
+
+    stats = reencrypt_users(db, batch_size=10, checkpoint_path=str(checkpoint))
+    assert stats["resumed_from"] == users[1].id and stats["rotated"] == 1
+
+
+def test_checkpoint_for_another_key_is_ignored(db, make_user, rotate_to_new_key, tmp_path):
+    make_user()
+    rotate_to_new_key()
+    checkpoint = tmp_path / "rotation.json"
+    checkpoint.write_text(json.dumps({"key_id": "previous-key", "last_id": 10_000}))
+
+    assert reencrypt_users(db, checkpoint_path=str(checkpoint))["rotated"] == 1
+
+
+def test_unknown_ciphertext_is_counted_not_fatal(db, make_user, rotate_to_new_key, tmp_path):
+    make_user("u1", linkedin_session=Fernet(Fernet.generate_key()).encrypt(b"{}").decode())
+    rotate_to_new_key()
+
+    stats = reencrypt_users(db, checkpoint_path=str(tmp_path / "rotation.json"))
+    assert stats["failed"] == 1 and stats["rotated"] == 1  # The other two columns still rotate
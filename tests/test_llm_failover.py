@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import llm_failover
+from app.services.llm_service import LLMAPIError, LLMRateLimitError, LLMService
+
+PRIMARY = {"type": "anthropic", "model": "m", "api_key": "sk-a"}
+FALLBACK = {"type": "openai", "model": "gpt", "api_key": "sk-b"}
+
+
+@pytest.fixture(autouse=True)
+def _fast(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURES", 2)
+
+
+def _note(config):
+    return asyncio.run(LLMService(config, "u1").generate_connection_note({"full_name": "Alice"}))
+
+
+def _fail_anthropic(status):
+    def respond(request, payload):
+        if "chat/completions" in request.url.path:
+            return httpx.Response(200, json={"choices": [{"message": {"content": "From fallback"}}]})
+        return httpx.Response(status, json={"error": {"message": "nope"}})
+    return respond
+
+
+def _half_open(breaker):
+    breaker.failures = settings.LLM_BREAKER_FAILURES
+    breaker.opened_at = time.monotonic() - settings.LLM_BREAKER_RESET_SECONDS - 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_allows_one_trial():
+    breaker = llm_failover.CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    _half_open(breaker)
+    assert breaker.allow()
+    assert not breaker.allow()  # Trial in flight
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_server_errors_open_the_breaker_for_that_key_only(llm_provider):
+    llm_provider.respond = _fail_anthropic(500)
+    for _ in range(2):
+        with pytest.raises(LLMAPIError):
+            _note(PRIMARY)
+
+    with pytest.raises(LLMAPIError) as error:
+        _note(PRIMARY)
+    assert error.value.status_code == 503  # Circuit open - provider not called
+    assert len(llm_provider.requests) == 2
+
+    llm_provider.respond = None
+    assert _note({**PRIMARY, "api_key": "sk-other-tenant"}) == "Hello there"
+    stats = llm_failover.breaker_stats()
+    assert sorted(s["state"] for s in stats.values()) == ["closed", "open"]
+    assert not any("sk-a" in key for key in stats)
+
+
+def test_rate_limits_do_not_open_the_breaker(llm_provider):
+    llm_provider.respond = _fail_anthropic(429)
+    for _ in range(3):
+        with pytest.raises(LLMRateLimitError):
+            _note(PRIMARY)
+    assert llm_failover.get_breaker("anthropic", "sk-a").state == "closed"
+    assert len(llm_provider.requests) == 3
+
+
+def test_fails_over_to_the_next_provider(llm_provider):
+    llm_provider.respond = _fail_anthropic(503)
+    assert _note({**PRIMARY, "fallbacks": [FALLBACK]}) == "From fallback"
+    assert llm_failover.get_breaker("anthropic", "sk-a").failures == 1
+
+
+def test_unused_fallback_keeps_its_half_open_trial(llm_provider):
+    fallback_breaker = llm_failover.get_breaker("openai", "sk-b")
+    _half_open(fallback_breaker)
+
+    assert _note({**PRIMARY, "fallbacks": [FALLBACK]}) == "Hello there"
+    assert len(llm_provider.requests) == 1
+    assert not fallback_breaker.trial_in_flight
+    assert fallback_breaker.allow()
+
+
+def test_half_open_fallback_trial_is_resolved(llm_provider):
+    fallback_breaker = llm_failover.get_breaker("openai", "sk-b")
+    _half_open(fallback_breaker)
+    llm_provider.respond = _fail_anthropic(500)
+
+    assert _note({**PRIMARY, "fallbacks": [FALLBACK]}) == "From fallback"
+    assert fallback_breaker.state == "closed"
@@ -0,0 +1,49 @@
+import asyncio
+
+from app.services import llm_limiter, metrics
+from app.services.llm_limiter import KeyLimiter
+
+
+def test_rate_limit_halves_limit_and_pauses():
+    limiter = KeyLimiter(8)
+    assert limiter.observe(429, {"retry-after": "2"}) == 2.0
+    assert limiter.limit == 4
+    assert limiter.stats()["paused_for"] > 1.5
+
+
+def test_low_headroom_shrinks_and_success_grows_back():
+    limiter = KeyLimiter(4)
+    limiter.observe(200, {"anthropic-ratelimit-requests-remaining": "5",
+                          "anthropic-ratelimit-requests-limit": "100"})
+    assert limiter.limit == 3
+    limiter.observe(200, {"x-ratelimit-remaining-requests": "90", "x-ratelimit-limit-requests": "100"})
+    assert limiter.limit == 4
+    limiter.observe(200, {})
+    assert limiter.limit == 4  # Never above max_concurrency
+
+
+def test_acquire_waits_for_a_free_slot():
+    async def scenario():
+        limiter = KeyLimiter(1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done() and limiter.stats()["queue_depth"] == 1
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.stats()["in_flight"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_limiter_state_is_exported(monkeypatch):
+    monkeypatch.setattr(llm_limiter, "_limiters", {})
+    limiter = llm_limiter.get_limiter("sk-secret-key")
+    limiter.observe(429, {})
+
+    body, _ = metrics.render()
+    text = body.decode()
+    key_id = llm_limiter.hash_key("sk-secret-key")
+    assert f'llm_key_concurrency_limit{{key="{key_id}"}} 4.0' in text
+    assert f'llm_key_queue_depth{{key="{key_id}"}} 0.0' in text
+    assert "sk-secret-key" not in text
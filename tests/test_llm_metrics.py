@@ -0,0 +1,104 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.config import settings
+from app.models import LLMCall
+from app.services import llm_metrics
+from app.services.llm_service import LLMService
+
+
+@pytest.fixture(autouse=True)
+def _empty_buffer(monkeypatch):
+    monkeypatch.setattr(llm_metrics, "_buffer", [])
+    monkeypatch.setattr(llm_metrics, "_ensure_flusher", lambda: None)  # Tests flush explicitly
+
+
+def _call(feature="note", latency_ms=100, success=True, **fields):
+    fields.setdefault("provider", "anthropic")
+    fields.setdefault("model", "m")
+    fields.setdefault("user_id", "u1")
+    fields.setdefault("campaign_id", "c1")
+    llm_metrics.record(feature=feature, latency_ms=latency_ms, success=success,
+                       input_tokens=10, output_tokens=5, **fields)
+
+
+def test_records_are_buffered_until_flushed(db):
+    _call()
+    _call()
+    assert db.query(LLMCall).count() == 0
+
+    llm_metrics.flush()
+    assert db.query(LLMCall).count() == 2
+    assert llm_metrics._buffer == []
+
+
+def test_buffer_drops_oldest_records_past_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_METRICS_MAX_BUFFER", 3)
+    for latency in range(5):
+        _call(latency_ms=latency)
+    assert [r["latency_ms"] for r in llm_metrics._buffer] == [2, 3, 4]
+
+
+def test_failed_flush_keeps_records_for_the_next_round(monkeypatch):
+    from app import database
+
+    class BrokenSession:
+        def bulk_insert_mappings(self, *args):
+            raise RuntimeError("db down")
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    _call()
+    monkeypatch.setattr(database, "SessionLocal", BrokenSession)
+    llm_metrics.flush()
+    assert len(llm_metrics._buffer) == 1
+
+
+def test_llm_service_records_each_call(db, llm_provider):
+    service = LLMService({"type": "anthropic", "model": "m", "api_key": "sk-test"}, "u1", "c1")
+    asyncio.run(service.generate_connection_note({"full_name": "Alice"}))
+    llm_metrics.flush()
+
+    call = db.query(LLMCall).one()
+    assert (call.provider, call.feature, call.user_id, call.campaign_id) == ("anthropic", "note", "u1", "c1")
+    assert call.success and (call.input_tokens, call.output_tokens) == (10, 5)
+
+
+def test_usage_endpoints(client, db, make_user, make_campaign):
+    make_user()
+    make_campaign()
+    for latency in (100, 200, 300):
+        _call(latency_ms=latency)
+    _call(feature="score", success=False, campaign_id="c2")
+    _call(created_at=datetime.now(timezone.utc) - timedelta(days=30))
+    llm_metrics.flush()
+
+    campaign = client.get("/api/campaigns/c1/llm-usage").json()
+    assert campaign["total_calls"] == 3
+    [note] = campaign["by_feature"]
+    assert note["calls"] == 3 and note["errors"] == 0
+    assert note["p50_latency_ms"] == 200.0 and note["input_tokens"] == 30
+    assert "by_campaign" not in campaign
+
+    user = client.get("/api/users/u1/llm-usage", params={"days": 60}).json()
+    assert user["total_calls"] == 5
+    assert {row["campaign_id"]: row["calls"] for row in user["by_campaign"]} == {"c1": 4, "c2": 1}
+    assert next(row for row in user["by_feature"] if row["feature"] == "score")["errors"] == 1
+
+    assert client.get("/api/campaigns/missing/llm-usage").status_code == 404
+    assert client.get("/api/users/u1/llm-usage", params={"days": 0}).status_code == 422
+
+
+def test_idle_process_exits_without_touching_the_database(tmp_path):
+    env = {**os.environ, "DATABASE_URL": "sqlite:///./exit.db", "PYTHONPATH": os.getcwd()}
+    subprocess.run([sys.executable, "-c", "import app.services.llm_metrics"], cwd=tmp_path, env=env, check=True)
+    assert not (tmp_path / "exit.db").exists()
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_service import (
+    CHARS_PER_TOKEN, CONNECTION_NOTE_INSTRUCTIONS, FIRST_MESSAGE_INSTRUCTIONS,
+    TEMPLATE_SLOT_INSTRUCTIONS, LLMService, _anthropic_system, _cache_min_tokens, _scoring_prefix
+)
+
+ANTHROPIC = {"type": "anthropic", "model": "claude-test", "api_key": "sk-ant"}
+OPENAI = {"type": "openai", "model": "gpt-test", "api_key": "sk-oai"}
+PROSPECT = {"full_name": "Alice Smith", "title": "CEO", "company": "Acme", "headline": "Building Acme"}
+
+
+def test_anthropic_prefix_is_the_system_block(llm_provider):
+    service = LLMService(ANTHROPIC)
+    assert asyncio.run(service.generate_connection_note(PROSPECT)) == "Hello there"
+
+    _, payload = llm_provider.requests[0]
+    assert "connection request note" in payload["system"][0]["text"]
+    assert "Alice Smith" in payload["messages"][0]["content"]
+    assert "Alice Smith" not in payload["system"][0]["text"]
+
+
+def test_openai_prefix_is_the_leading_system_message(llm_provider):
+    asyncio.run(LLMService(OPENAI).generate_first_message(PROSPECT))
+
+    _, payload = llm_provider.requests[0]
+    assert [m["role"] for m in payload["messages"]] == ["system", "user"]
+
+
+def test_scoring_prefix_is_identical_for_equal_criteria():
+    a = _scoring_prefix({"title": ["CEO"], "industry": "SaaS", "company": ["Acme"]})
+    b = _scoring_prefix({"company": ["Acme"], "industry": "SaaS", "title": ["CEO"]})
+    assert a == b
+
+
+def test_usage_includes_cache_tokens(llm_provider):
+    # Accounting only: whether anything was cached is the provider's answer
+    import httpx
+    llm_provider.respond = lambda request, payload: httpx.Response(200, json={
+        "content": [{"type": "text", "text": "ok"}],
+        "usage": {"input_tokens": 12, "output_tokens": 3, "cache_read_input_tokens": 1500,
+                  "cache_creation_input_tokens": 0}
+    })
+    service = LLMService(ANTHROPIC)
+    asyncio.run(service.generate_connection_note(PROSPECT))
+    asyncio.run(service.generate_connection_note(PROSPECT))
+
+    assert service.last_usage["cache_read_tokens"] == 1500
+    assert service.usage_totals == {"input_tokens": 24, "output_tokens": 6, "cache_read_tokens": 3000,
+                                    "cache_creation_tokens": 0}
+
+
+@pytest.mark.parametrize("instructions", [
+    CONNECTION_NOTE_INSTRUCTIONS, FIRST_MESSAGE_INSTRUCTIONS, TEMPLATE_SLOT_INSTRUCTIONS,
+    _scoring_prefix({"title": ["CEO"], "industry": "SaaS"}),
+])
+def test_short_prefixes_are_not_marked_cacheable(instructions):
+    # Below Anthropic's minimum the marker would be ignored - don't claim a cache
+    assert len(instructions) // CHARS_PER_TOKEN < _cache_min_tokens("claude-sonnet")
+    assert "cache_control" not in _anthropic_system(instructions, "claude-sonnet")[0]
+
+
+def test_prefixes_past_the_model_minimum_are_marked_cacheable(llm_provider):
+    import httpx
+    criteria = {"title": ["CEO"], "keywords": [f"keyword-{n}" for n in range(400)]}
+    prefix = _scoring_prefix(criteria)
+    assert _cache_min_tokens("claude-sonnet") <= len(prefix) // CHARS_PER_TOKEN < _cache_min_tokens("claude-haiku")
+
+    llm_provider.respond = lambda request, payload: httpx.Response(200, json={
+        "content": [{"type": "tool_use", "input": {"score": 7, "reasoning": "Fit", "recommended_hook": "Hi"}}],
+        "usage": {"input_tokens": 10, "output_tokens": 5}
+    })
+    asyncio.run(LLMService({**ANTHROPIC, "model": "claude-sonnet"}).score_prospect(PROSPECT, criteria))
+    asyncio.run(LLMService({**ANTHROPIC, "model": "claude-haiku"}).score_prospect(PROSPECT, criteria))
+
+    (_, sonnet), (_, haiku) = llm_provider.requests
+    assert sonnet["system"] == [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    assert "cache_control" not in haiku["system"][0]
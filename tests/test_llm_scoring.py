@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services.llm_service import JSONObjectParser, LLMService
+
+ANTHROPIC = {"type": "anthropic", "model": "claude-test", "api_key": "sk-ant"}
+PROSPECT = {"full_name": "Alice Smith", "title": "CEO", "company": "Acme"}
+
+
+def _parsed(mode, outcome):
+    return REGISTRY.get_sample_value("llm_score_parse_total", {"mode": mode, "outcome": outcome}) or 0
+
+
+def _tool_reply(score):
+    return httpx.Response(200, json={"content": [
+        {"type": "tool_use", "input": {"score": score, "reasoning": "fits", "recommended_hook": "hi"}}
+    ], "usage": {}})
+
+
+def test_structured_score_is_validated_and_counted(llm_provider):
+    llm_provider.respond = lambda request, payload: _tool_reply(8)
+    before = _parsed("structured", "ok")
+
+    result = asyncio.run(LLMService(ANTHROPIC).score_prospect(PROSPECT, {"title": ["CEO"]}))
+
+    assert result == {"score": 8, "reasoning": "fits", "recommended_hook": "hi"}
+    assert _parsed("structured", "ok") == before + 1
+    assert llm_provider.requests[0][1]["tool_choice"]["name"] == "record_prospect_score"
+
+
+def test_out_of_range_score_counts_as_parse_failure(llm_provider):
+    llm_provider.respond = lambda request, payload: _tool_reply(11)
+    before = _parsed("structured", "failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(LLMService(ANTHROPIC).score_prospect(PROSPECT, {}))
+    assert _parsed("structured", "failed") == before + 1
+
+
+def test_models_without_tools_fall_back_to_streamed_json(llm_provider):
+    events = [
+        {"type": "message_start", "message": {"usage": {"input_tokens": 7}}},
+        {"type": "content_block_delta", "delta": {"text": 'Sure! {"score": 6, "reason'}},
+        {"type": "content_block_delta", "delta": {"text": 'ing": "ok {braces}", "recommended_hook": ""} trailing'}},
+    ]
+
+    def respond(request, payload):
+        if payload.get("stream"):
+            return httpx.Response(200, text="".join(f"data: {json.dumps(e)}\n\n" for e in events))
+        return httpx.Response(400, json={"error": {"message": "tools not supported"}})
+    llm_provider.respond = respond
+    before = _parsed("stream", "ok")
+
+    result = asyncio.run(LLMService(ANTHROPIC).score_prospect(PROSPECT, {}))
+
+    assert result["score"] == 6 and result["reasoning"] == "ok {braces}"
+    assert _parsed("stream", "ok") == before + 1
+
+
+def test_json_object_parser_handles_chunked_input():
+    parser = JSONObjectParser()
+    assert not parser.feed('noise {not json} {"a": "}"')
+    assert parser.feed(', "b": {"c": 1}} more')
+    assert parser.result == {"a": "}", "b": {"c": 1}}
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import logging
+import queue
+
+import pytest
+
+from app.logging_config import (
+    ContextFilter, DebugSamplingFilter, JsonFormatter, _QueueHandler, bind_log_context, log_context
+)
+
+
+@pytest.fixture
+def records():
+    """A logger wired like setup_logging(): filters + queue handler; returns the formatted JSON entries"""
+    handler = _QueueHandler(queue.SimpleQueue())
+    handler.addFilter(DebugSamplingFilter(0))
+    handler.addFilter(ContextFilter())
+    logger = logging.getLogger("tests.logging_config")
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+
+    def drain():
+        entries = []
+        while not handler.queue.empty():
+            entries.append(json.loads(JsonFormatter().format(handler.queue.get())))
+        return entries
+
+    yield logger, drain
+    logger.handlers[:] = []
+
+
+def test_records_carry_context_and_extra_fields(records):
+    logger, drain = records
+    with log_context(user_id="u1", campaign_id=None):
+        with log_context(action_id="a1"):
+            logger.info("Sent %s", "note", extra={"attempt": 2})
+        logger.warning("Outside the inner block")
+    logger.info("No context")
+
+    inner, outer, bare = drain()
+    assert inner["msg"] == "Sent note" and inner["level"] == "INFO"
+    assert inner["logger"] == "tests.logging_config"
+    assert (inner["user_id"], inner["action_id"], inner["attempt"]) == ("u1", "a1", 2)
+    assert "campaign_id" not in inner
+    assert outer["user_id"] == "u1" and "action_id" not in outer
+    assert "user_id" not in bare
+
+
+def test_context_follows_tasks_and_threads(records):
+    logger, drain = records
+
+    async def task(n):
+        bind_log_context(prospect_id=f"p{n}")
+        await asyncio.sleep(0)
+        await asyncio.to_thread(logger.info, "scored")
+
+    async def run():
+        await asyncio.gather(task(1), task(2))
+
+    asyncio.run(run())
+    assert sorted(entry["prospect_id"] for entry in drain()) == ["p1", "p2"]
+
+
+def test_tracebacks_are_rendered_before_queueing(records):
+    logger, drain = records
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("Failed")
+
+    [entry] = drain()
+    assert entry["level"] == "ERROR"
+    assert "RuntimeError: boom" in entry["exc"]
+
+
+def test_debug_records_are_sampled(records):
+    logger, drain = records
+    logger.debug("dropped at rate 0")
+    logger.info("kept")
+    assert [entry["msg"] for entry in drain()] == ["kept"]
+
+    always = DebugSamplingFilter(1)
+    assert always.filter(logging.makeLogRecord({"levelno": logging.DEBUG}))
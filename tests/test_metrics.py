@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from prometheus_client import REGISTRY
+
+from app.models import Action
+from app.services import metrics
+
+
+def _sample(name, labels=None):
+    return REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+def test_requests_are_timed_by_route_template(client):
+    labels = {"method": "GET", "route": "/api/campaigns/{campaign_id}", "status": "404"}
+    before = _sample("http_request_duration_seconds_count", labels)
+    unmatched = {"method": "GET", "route": "unmatched", "status": "404"}
+    unmatched_before = _sample("http_request_duration_seconds_count", unmatched)
+
+    client.get("/api/campaigns/c-123")
+    client.get("/api/campaigns/c-456")
+    client.get("/no/such/path")
+
+    assert _sample("http_request_duration_seconds_count", labels) == before + 2
+    assert _sample("http_request_duration_seconds_count", unmatched) == unmatched_before + 1
+
+
+def test_metrics_endpoint_renders_every_family(client, db, make_user):
+    make_user()
+    now = datetime.now(timezone.utc)
+    for n, due_in in enumerate((timedelta(minutes=-5), timedelta(days=1))):
+        db.add(Action(action_id=f"a{n}", user_id="u1", action_type="connect", action_data={},
+                      scheduled_for=now + due_in, status="pending"))
+    db.commit()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'actions_queue_depth{state="pending"} 2.0' in body
+    assert 'actions_queue_depth{state="due"} 1.0' in body
+    assert "scoring_queue_depth" in body
+    assert "db_pool_checkout_wait_seconds_count" in body
+
+
+def test_action_outcomes():
+    labels = {"action_type": "connect", "outcome": "retry"}
+    before = _sample("action_execution_duration_seconds_count", labels)
+    metrics.observe_action("connect", "pending", 3.0)
+    assert _sample("action_execution_duration_seconds_count", labels) == before + 1
+
+
+def test_celery_task_durations_are_recorded():
+    from celery.signals import task_postrun, task_prerun
+
+    from app.tasks.linkedin_tasks import poll_inboxes as task
+
+    labels = {"task": task.name, "state": "SUCCESS"}
+    before = _sample("celery_task_duration_seconds_count", labels)
+    task_prerun.send(sender=task, task_id="t1", task=task, args=(), kwargs={})
+    task_postrun.send(sender=task, task_id="t1", task=task, args=(), kwargs={}, retval=None, state="SUCCESS")
+
+    assert _sample("celery_task_duration_seconds_count", labels) == before + 1
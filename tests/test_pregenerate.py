@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.models import Action
+from app.tasks import linkedin_tasks
+
+
+def _action(db, action_id, prospect, action_type, due_in, action_data=None):
+    action = Action(action_id=action_id, user_id="u1", prospect_id=prospect.prospect_id, campaign_id="c1",
+                    action_type=action_type, action_data=action_data or {},
+                    scheduled_for=datetime.now(timezone.utc) + due_in, status="pending")
+    db.add(action)
+    db.commit()
+    return action
+
+
+def test_renders_content_for_actions_due_within_lead_window(db, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign(sequence=[
+        {"day": 0, "action": "connect", "template": "Hi {first_name}, let's connect"},
+        {"day": 3, "action": "message", "template": "Thanks {first_name}!"},
+    ])
+    alice = make_prospect(full_name="Alice Smith")
+    due = _action(db, "due", alice, "connect", timedelta(minutes=10))
+    later = _action(db, "later", alice, "message", timedelta(days=1))
+    written = _action(db, "written", alice, "message", timedelta(minutes=5), {"message": "Custom text"})
+
+    assert asyncio.run(linkedin_tasks._pregenerate_action_content()) == {"generated": 1}
+
+    db.expire_all()
+    due, later, written = (db.get(Action, a.id) for a in (due, later, written))
+    assert due.action_data["note"] == "Hi Alice, let's connect" and due.pregenerated_at
+    assert "message" not in later.action_data and later.pregenerated_at is None
+    assert written.action_data["message"] == "Custom text" and written.pregenerated_at
+
+
+def test_nothing_due(make_user):
+    make_user()
+    assert asyncio.run(linkedin_tasks._pregenerate_action_content()) == {"generated": 0}
+
+
+def test_failing_rows_do_not_starve_later_actions(db, make_user, make_campaign, make_prospect, monkeypatch):
+    monkeypatch.setattr(linkedin_tasks.settings, "PREGENERATE_BATCH_SIZE", 2)
+    make_user()
+    broken = make_user("broken")
+    broken.llm_config_encrypted = "not-a-fernet-token"
+    make_campaign()
+    alice = make_prospect()
+    failing = [_action(db, f"broken-{n}", alice, "connect", timedelta(minutes=n)) for n in (1, 2)]
+    for action in failing:
+        action.user_id = "broken"
+    db.commit()
+    healthy = _action(db, "healthy", alice, "connect", timedelta(minutes=10))
+
+    assert asyncio.run(linkedin_tasks._pregenerate_action_content()) == {"generated": 0}
+    assert asyncio.run(linkedin_tasks._pregenerate_action_content()) == {"generated": 1}
+
+    db.expire_all()
+    assert all(db.get(Action, a.id).pregenerated_at for a in failing)
+    assert "note" not in db.get(Action, failing[0].id).action_data
+    assert db.get(Action, healthy.id).action_data["note"] == "Hi Person"
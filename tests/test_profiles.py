@@ -0,0 +1,21 @@
+import pytest
+
+from app.utils.profiles import normalize_profile_url, profile_url_from_identifier
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.linkedin.com/in/Jane-Doe/",
+    "http://de.linkedin.com/in/jane-doe?trk=abc#top",
+    "linkedin.com/in/jane-doe",
+    "  https://linkedin.com/in/jane-doe/detail/contact-info/  ",
+])
+def test_normalizes_profile_variants(url):
+    assert normalize_profile_url(url) == "linkedin.com/in/jane-doe"
+
+
+def test_identifier_matches_normalized_url():
+    assert profile_url_from_identifier("Jane-Doe") == normalize_profile_url("https://www.linkedin.com/in/jane-doe")
+
+
+def test_empty_url():
+    assert normalize_profile_url("") == ""
@@ -0,0 +1,79 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import profiling
+
+TOKEN = "profile-secret"
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    return tmp_path
+
+
+def _reports(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".speedscope.json"))
+
+
+def test_profiled_request_returns_the_report(client):
+    response = client.get("/health", params={"__profile": "1"}, headers={"X-Profile-Token": TOKEN})
+
+    assert response.headers["x-profiled-status"] == "200"
+    assert "speedscope" in response.json()["$schema"]
+
+
+def test_stored_profile_keeps_the_response(client, profile_dir):
+    response = client.get("/health", headers={"X-Profile": "store", "X-Profile-Token": TOKEN})
+
+    assert response.json() == {"status": "ok"}
+    profile_id = response.headers["x-profile-id"]
+    [report] = _reports(profile_dir)
+    assert report.endswith(f"_request_GET_health_{profile_id}.speedscope.json")
+    json.loads((profile_dir / report).read_text())
+
+
+@pytest.mark.parametrize("headers", [{"X-Profile": "1"}, {"X-Profile": "1", "X-Profile-Token": "wrong"}])
+def test_profiling_needs_the_token(client, headers):
+    response = client.get("/health", headers=headers)
+    assert response.json() == {"status": "ok"} and "x-profiled-status" not in response.headers
+
+
+def test_disabled_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", "")
+    response = client.get("/health", headers={"X-Profile": "1", "X-Profile-Token": ""})
+    assert response.json() == {"status": "ok"}
+
+
+def test_sampled_requests_are_stored(client, monkeypatch, profile_dir):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1)
+    assert "x-profile-id" in client.get("/health").headers
+    assert len(_reports(profile_dir)) == 1
+
+
+def test_old_reports_are_rotated(monkeypatch, profile_dir):
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 2)
+    for n in range(4):
+        profiler = profiling.new_profiler()
+        profiler.start()
+        profiler.stop()
+        profiling.store(profiler, "task", f"job {n}", f"id{n}")
+    assert len(_reports(profile_dir)) == 2
+
+
+def test_celery_task_with_profile_header_is_stored(profile_dir):
+    from celery.signals import task_postrun, task_prerun
+
+    import app.tasks.linkedin_tasks  # noqa: F401 - installs the Celery signal hooks
+
+    task = SimpleNamespace(name="app.tasks.linkedin_tasks.sync_inbox", request=SimpleNamespace(profile="1"))
+    task_prerun.send(sender=task.name, task_id="abc-123", task=task, args=(), kwargs={})
+    task_postrun.send(sender=task.name, task_id="abc-123", task=task, args=(), kwargs={}, retval=None, state="SUCCESS")
+
+    [report] = _reports(profile_dir)
+    assert report.endswith("_task_sync_inbox_abc123.speedscope.json")
@@ -0,0 +1,53 @@
+import pytest
+
+from app.services.prospect_prefilter import prefilter_prospects, tokenize
+
+CEO = {"title": ["CEO"]}
+
+
+def _decide(target_filters, **prospect):
+    return prefilter_prospects([prospect], target_filters)[0]["decision"]
+
+
+@pytest.mark.parametrize("title", ["CEO", "Chief Executive Officer", "Co-CEO", "Interim CEO", "ceo"])
+def test_target_title_is_a_match(title):
+    assert _decide(CEO, title=title) == "match"
+
+
+@pytest.mark.parametrize("title", ["Assistant to the CEO", "Founder & CEO", "CEO Office Manager"])
+def test_title_containing_the_target_is_not_a_clear_match(title):
+    assert _decide(CEO, title=title) == "ambiguous"
+
+
+def test_title_made_of_several_targets_matches():
+    assert _decide({"title": ["CEO", "Founder"]}, title="Founder & CEO") == "match"
+
+
+@pytest.mark.parametrize("title", ["Managing Director", "Head of Growth"])
+def test_zero_overlap_title_alone_is_not_a_reject(title):
+    assert _decide(CEO, title=title) == "ambiguous"
+    assert _decide(CEO, title=title, headline=f"{title} | ex-CEO of Acme") == "ambiguous"
+
+
+def test_reject_needs_title_and_headline_disjoint():
+    assert _decide(CEO, title="Software Engineer", headline="Backend developer at Acme") == "reject"
+
+
+def test_company_filter_must_match_too():
+    filters = {"title": ["CTO"], "company": ["Acme"]}
+    assert _decide(filters, title="Chief Technology Officer", company="Acme Inc") == "match"
+    assert _decide(filters, title="CTO", company="Globex") == "ambiguous"
+
+
+def test_no_title_filter_leaves_everything_to_the_llm():
+    assert _decide({"industry": "SaaS"}, title="CEO") == "ambiguous"
+
+
+def test_spelled_out_titles_normalize_to_abbreviation():
+    assert tokenize("Vice President of Sales") == {"vp", "sales"}
+    assert tokenize("Cofounder") == {"founder"}
+
+
+def test_disabled_by_default():
+    from app.config import Settings
+    assert Settings.model_fields["PREFILTER_ENABLED"].default is False
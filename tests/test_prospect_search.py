@@ -0,0 +1,84 @@
+import pytest
+
+from app.services import prospect_search
+from app.services.prospect_search import search_prospects
+
+
+@pytest.fixture(params=["fts", "scan"])
+def text_index(request, monkeypatch):
+    """Run text searches against the SQLite FTS index and the LIKE fallback"""
+    monkeypatch.setitem(prospect_search._text_index, "sqlite", request.param == "fts")
+    return request.param
+
+
+@pytest.fixture
+def prospects(make_user, make_campaign, make_prospect):
+    make_user()
+    make_user("u2")
+    make_campaign()
+    make_campaign("c2")
+    return {
+        "cto": make_prospect(title="CTO", headline="Building fintech infra", company="Acme Corp", ai_score=8),
+        "sales": make_prospect(title="Sales Lead", company="Globex", stage="contacted", ai_score=5),
+        "engineer": make_prospect(title="Engineer", headline="Ex-Acme", company="Initech", ai_score=3,
+                                  campaign_id="c2"),
+        "other_user": make_prospect(user_id="u2", title="CTO", company="Acme Corp"),
+    }
+
+
+def _names(db, prospects, **kwargs):
+    by_id = {p.id: name for name, p in prospects.items()}
+    found, _ = search_prospects(db, "u1", **kwargs)
+    return [by_id[p.id] for p in found]
+
+
+def test_text_filters(db, prospects, text_index):
+    assert _names(db, prospects, filters={"text": "cto"}) == ["cto"]
+    assert _names(db, prospects, filters={"text": "fin"}) == ["cto"]  # Word prefix
+    assert _names(db, prospects, filters={"text": "sales le"}) == ["sales"]
+    assert _names(db, prospects, filters={"text": "acme"}) == ["engineer"]  # Headline, not company
+    assert _names(db, prospects, filters={"text": "%"}) == ["engineer", "sales", "cto"]  # No words - no filter
+
+
+def test_company_is_a_substring_match_on_every_backend(db, prospects, text_index):
+    # Same semantics as the pg_trgm-backed ILIKE on PostgreSQL
+    assert _names(db, prospects, filters={"company": "acme"}) == ["cto"]
+    assert _names(db, prospects, filters={"company": "CME CO"}) == ["cto"]  # Mid-word, across words
+    assert _names(db, prospects, filters={"company": "corp acme"}) == []  # Not a bag of words
+    assert _names(db, prospects, filters={"company": "ini", "text": "engineer"}) == ["engineer"]
+    assert _names(db, prospects, filters={"company": "100%"}) == []
+
+
+def test_structured_filters(db, prospects):
+    assert _names(db, prospects, filters={"stage": ["contacted"]}) == ["sales"]
+    assert _names(db, prospects, filters={"min_score": 4, "max_score": 6}) == ["sales"]
+    assert _names(db, prospects, campaign_id="c2") == ["engineer"]
+
+
+def test_edits_are_searchable(db, prospects, text_index):
+    prospects["sales"].title = "Chief Revenue Officer"
+    db.commit()
+    assert _names(db, prospects, filters={"text": "revenue"}) == ["sales"]
+    assert _names(db, prospects, filters={"text": "sales"}) == []
+
+
+def test_keyset_pages(db, prospects, text_index):
+    first, cursor = search_prospects(db, "u1", limit=2)
+    second, last_cursor = search_prospects(db, "u1", limit=2, cursor=cursor)
+    assert [p.id for p in first + second] == sorted((p.id for n, p in prospects.items() if n != "other_user"),
+                                                    reverse=True)
+    assert last_cursor is None
+
+    with pytest.raises(ValueError):
+        search_prospects(db, "u1", cursor="abc")
+
+
+def test_search_endpoint(client, prospects):
+    response = client.post("/api/prospects/search", json={
+        "user_id": "u1", "filters": {"text": "cto", "min_score": 5}, "limit": 10
+    }).json()
+    assert [p["title"] for p in response["prospects"]] == ["CTO"]
+    assert response["next_cursor"] is None
+
+    assert client.post("/api/prospects/search", json={"user_id": "u1", "cursor": "x"}).status_code == 400
+    assert client.post("/api/prospects/search", json={"user_id": "nobody"}).status_code == 404
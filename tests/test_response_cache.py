@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app.config import settings
+from app.database import engine
+from app.models import Campaign
+from app.services import response_cache
+
+
+def _write_from_another_process(campaign_id, **values):
+    """UPDATE outside any tracked session - like a Celery worker would"""
+    with engine.begin() as conn:
+        conn.execute(update(Campaign).where(Campaign.campaign_id == campaign_id).values(
+            updated_at=datetime(2030, 1, 1, tzinfo=timezone.utc), **values
+        ))
+
+
+@pytest.fixture
+def campaign(make_user, make_campaign):
+    make_user()
+    return make_campaign()
+
+
+def test_unchanged_resource_is_a_304(client, campaign):
+    first = client.get("/api/campaigns/c1")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    second = client.get("/api/campaigns/c1", headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.headers["etag"] == etag
+    assert client.get("/api/campaigns/c1", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_write_by_another_process_is_never_a_stale_304(client, campaign):
+    etag = client.get("/api/campaigns/c1/stats").headers["etag"]
+    _write_from_another_process("c1", stats={"sent": 5, "accepted": 0, "replied": 0, "views": 0})
+
+    response = client.get("/api/campaigns/c1/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["stats"]["sent"] == 5
+    assert response.headers["etag"] != etag
+
+
+def test_session_commits_invalidate_entries(client, db, campaign):
+    etag = client.get("/api/campaigns/c1").headers["etag"]
+    campaign.name = "Renamed"
+    db.commit()
+
+    assert ("campaign", "c1") not in response_cache._cache
+    response = client.get("/api/campaigns/c1", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()["name"] == "Renamed"
+
+
+def test_deleted_resource_is_not_served_from_cache(client, db, campaign):
+    client.get("/api/campaigns/c1")
+    with engine.begin() as conn:
+        conn.execute(Campaign.__table__.delete())
+    assert client.get("/api/campaigns/c1").status_code == 404
+
+
+class FakeRedis:
+    """In-memory stand-in for the shared cache; pipelines block until `release` is set"""
+
+    def __init__(self):
+        self.data = {}
+        self.published = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis_):
+        self.redis, self.deleted, self.messages = redis_, [], []
+
+    def delete(self, *keys):
+        self.deleted.extend(keys)
+
+    def publish(self, channel, message):
+        self.messages.append(json.loads(message))
+
+    def execute(self):
+        self.redis.release.wait(5)
+        for key in self.deleted:
+            self.redis.data.pop(key, None)
+        self.redis.published.extend(self.messages)
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    fake = FakeRedis()
+    subscribed = threading.Event()
+    subscribed.set()
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_REDIS", True)
+    monkeypatch.setattr(response_cache, "_client", lambda: fake)
+    monkeypatch.setattr(response_cache, "_ensure_subscriber", lambda: None)
+    monkeypatch.setattr(response_cache, "_subscribed", subscribed)
+    return fake
+
+
+def test_shared_cache_serves_fresh_entries_without_a_query(client, campaign, shared_cache):
+    etag = client.get("/api/campaigns/c1").headers["etag"]
+    _write_from_another_process("c1", name="Changed")
+
+    # Trusted until the TTL: with the subscriber connected, the writer's invalidation would arrive
+    assert client.get("/api/campaigns/c1", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_disconnected_subscriber_falls_back_to_revalidation(client, campaign, shared_cache):
+    etag = client.get("/api/campaigns/c1").headers["etag"]
+    response_cache._subscribed.clear()  # Redis down: other processes' invalidations can't arrive
+    _write_from_another_process("c1", name="Changed")
+
+    response = client.get("/api/campaigns/c1", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.json()["name"] == "Changed"
+
+    response_cache._cache.clear()  # Entries read back from Redis are revalidated too
+    assert client.get("/api/campaigns/c1", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_invalidations_are_published_off_the_commit_path(client, db, campaign, shared_cache):
+    client.get("/api/campaigns/c1")
+    assert shared_cache.data
+    shared_cache.release.clear()  # Redis hangs
+
+    campaign.name = "Renamed"
+    db.commit()  # Returns without waiting on Redis
+    assert shared_cache.published == []
+
+    # Redis still holds the old body, but this process knows an invalidation is pending
+    assert client.get("/api/campaigns/c1").json()["name"] == "Renamed"
+
+    shared_cache.release.set()
+    deadline = time.monotonic() + 5
+    while not shared_cache.published and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ["campaign", ["c1"]] in shared_cache.published
+
+
+@pytest.mark.parametrize("configured, sync_mode, shared", [
+    (None, True, False),
+    (None, False, True),
+    (False, False, False),
+    (True, True, True),
+])
+def test_redis_is_used_by_default_unless_sync_mode(monkeypatch, configured, sync_mode, shared):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_REDIS", configured)
+    monkeypatch.setattr(settings, "SYNC_MODE", sync_mode)
+    assert response_cache.shared() is shared
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models import Action
+from app.services.scheduling import spread_schedule
+
+NOW = datetime(2026, 10, 19, 6, 0, tzinfo=timezone.utc)
+UTC_WINDOW = {"send_window": {"start_hour": 9, "end_hour": 18, "timezone": "UTC"}}
+
+
+def _days(schedule):
+    return [(at - NOW).days if at else None for at in schedule]
+
+
+def _action(db, n, action_type, scheduled_for, status="pending", executed_at=None):
+    db.add(Action(action_id=f"existing_{n}", user_id="u1", action_type=action_type, action_data={},
+                  scheduled_for=scheduled_for, status=status, executed_at=executed_at))
+    db.commit()
+
+
+def test_actions_are_spread_over_the_window_within_daily_limits(make_user):
+    user = make_user(preferences=UTC_WINDOW, daily_limits={"connections": 2})
+    schedule = spread_schedule(["connect", "connect", "connect", "message"], user, now=NOW)
+
+    assert _days(schedule) == [0, 0, 1, 0]
+    for at in schedule:
+        assert 9 <= at.hour < 18
+    assert schedule[0] < schedule[1]
+
+
+def test_missing_limit_is_unlimited_and_zero_never_schedules(make_user):
+    user = make_user(preferences=UTC_WINDOW, daily_limits={"messages": 0})
+    schedule = spread_schedule(["connect"] * 100 + ["message", "visit_profile"], user, now=NOW)
+    assert _days(schedule) == [0] * 100 + [None, 0]
+
+
+def test_pending_and_sent_actions_count_against_the_limit(db, make_user):
+    user = make_user(preferences=UTC_WINDOW, daily_limits={"connections": 2, "messages": 1})
+    _action(db, 1, "connect", NOW + timedelta(hours=4))
+    _action(db, 2, "connect", NOW - timedelta(hours=1), status="completed", executed_at=NOW - timedelta(hours=1))
+    _action(db, 3, "connect", NOW - timedelta(days=1), status="completed", executed_at=NOW - timedelta(days=1))
+    _action(db, 4, "connect", NOW + timedelta(days=1, hours=4))
+    _action(db, 5, "message", NOW - timedelta(days=3))  # Overdue - runs today
+    _action(db, 6, "message", NOW + timedelta(hours=4), status="failed")
+
+    schedule = spread_schedule(["connect", "connect", "message"], user, db, now=NOW)
+    assert _days(schedule) == [1, 2, 1]
+
+
+def test_bulk_queue_uses_existing_actions_and_rejects_zero_limits(client, db, make_user, make_campaign, make_prospect):
+    make_user(daily_limits={"connections": 1, "messages": 0})
+    make_campaign()
+    prospect_id = make_prospect().prospect_id
+    _action(db, 1, "connect", datetime.now(timezone.utc) + timedelta(hours=1))
+
+    response = client.post("/api/actions/queue-bulk", json={"user_id": "u1", "items": [
+        {"prospect_id": prospect_id, "action_type": "connect"},
+        {"prospect_id": prospect_id, "action_type": "message"},
+    ]}).json()
+
+    assert response["queued"] == 1 and response["failed"] == 1
+    connect, message = response["results"]
+    scheduled_for = datetime.fromisoformat(connect["scheduled_for"])
+    assert scheduled_for.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(hours=6)
+    assert message["status"] == "error" and message["error"] == "Daily limit for message is 0"
+    assert db.query(Action).count() == 2
@@ -0,0 +1,56 @@
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.schema_upgrades import upgrade_schema
+
+
+def _old_database(tmp_path):
+    """A database whose prospects/actions tables predate the newer columns and indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE prospects (id INTEGER PRIMARY KEY, prospect_id VARCHAR(255) NOT NULL, "
+            "user_id VARCHAR(255) NOT NULL, campaign_id VARCHAR(255), linkedin_url TEXT NOT NULL, "
+            "stage VARCHAR(50), connection_status VARCHAR(50))"
+        ))
+        conn.execute(text(
+            "CREATE TABLE actions (id INTEGER PRIMARY KEY, action_id VARCHAR(255) NOT NULL, "
+            "user_id VARCHAR(255) NOT NULL, action_type VARCHAR(50) NOT NULL, action_data JSON NOT NULL, "
+            "scheduled_for DATETIME NOT NULL, status VARCHAR(50))"
+        ))
+        conn.execute(text(
+            "INSERT INTO prospects (prospect_id, user_id, linkedin_url, stage) VALUES ('p1', 'u1', 'x', 'new')"
+        ))
+    return engine
+
+
+def test_adds_missing_columns_and_indexes(tmp_path):
+    engine = _old_database(tmp_path)
+    Base.metadata.create_all(bind=engine)  # Leaves the existing tables alone
+    assert "linkedin_url_normalized" not in {c["name"] for c in inspect(engine).get_columns("prospects")}
+
+    upgrade_schema(engine)
+
+    inspector = inspect(engine)
+    prospect_columns = {c["name"] for c in inspector.get_columns("prospects")}
+    assert {"linkedin_url_normalized", "score_status", "score_job_id", "score_error", "updated_at"} <= prospect_columns
+    assert "pregenerated_at" in {c["name"] for c in inspector.get_columns("actions")}
+    prospect_indexes = {i["name"] for i in inspector.get_indexes("prospects")}
+    assert {"ix_prospects_user_connection_status", "ix_prospects_user_url_normalized",
+            "ix_prospects_user_campaign_id"} <= prospect_indexes
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT stage FROM prospects WHERE prospect_id = 'p1'")).scalar() == "new"
+
+
+def test_is_idempotent(tmp_path):
+    engine = _old_database(tmp_path)
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    upgrade_schema(engine)
+
+    fresh = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    Base.metadata.create_all(bind=fresh)
+    upgrade_schema(fresh)
+    assert {c["name"] for c in inspect(fresh).get_columns("prospects")} == \
+        {c["name"] for c in inspect(engine).get_columns("prospects")}
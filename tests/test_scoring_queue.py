@@ -0,0 +1,123 @@
+import asyncio
+
+import httpx
+
+from app.api.routes import prospects as prospect_routes
+from app.database import SessionLocal
+from app.models import Prospect
+from app.services import scoring_queue
+from app.tasks import linkedin_tasks
+
+
+def _score_reply(request, payload):
+    return httpx.Response(200, json={"content": [
+        {"type": "tool_use", "input": {"score": 7, "reasoning": "fits", "recommended_hook": "hi"}}
+    ], "usage": {}})
+
+
+def test_added_prospect_is_scored_in_the_background(client, llm_provider, make_user, make_campaign):
+    llm_provider.respond = _score_reply
+    make_user()
+    make_campaign()
+
+    added = client.post("/api/prospects/add", json={
+        "user_id": "u1", "campaign_id": "c1", "linkedin_url": "https://www.linkedin.com/in/alice",
+        "full_name": "Alice", "title": "CEO"
+    }).json()
+    assert added["score_status"] == "queued"
+
+    status = client.get(f"/api/prospects/{added['prospect_id']}/score-status", params={"wait": 10}).json()
+    assert status["score_status"] == "scored" and status["ai_score"] == 7
+    assert status["score_job_id"] == added["score_job_id"]
+
+
+def test_long_poll_reads_each_poll_in_a_fresh_session(client, make_user, make_campaign, make_prospect, monkeypatch):
+    make_user()
+    make_campaign()
+    prospect_id = make_prospect(score_status="queued").prospect_id
+    monkeypatch.setattr(prospect_routes, "SCORE_STATUS_POLL_SECONDS", 0.01)
+    polls = []
+    real = prospect_routes._score_status
+
+    def score_status(pid):
+        polls.append(pid)
+        if len(polls) == 3:  # Scored by a worker between polls
+            db = SessionLocal()
+            db.query(Prospect).filter(Prospect.prospect_id == pid).update({"score_status": "scored", "ai_score": 4})
+            db.commit()
+            db.close()
+        return real(pid)
+
+    monkeypatch.setattr(prospect_routes, "_score_status", score_status)
+    status = client.get(f"/api/prospects/{prospect_id}/score-status", params={"wait": 5}).json()
+    assert status["score_status"] == "scored" and status["ai_score"] == 4
+    assert len(polls) == 3
+
+
+def test_score_status_without_wait(client, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    prospect_id = make_prospect(ai_score=6).prospect_id
+
+    assert client.get(f"/api/prospects/{prospect_id}/score-status").json()["score_status"] == "scored"
+    assert client.get("/api/prospects/missing/score-status").status_code == 404
+
+
+def test_queued_prospects_are_requeued_on_startup(make_user, make_campaign, make_prospect, monkeypatch):
+    make_user()
+    make_campaign()
+    waiting = [make_prospect(score_status=status).prospect_id for status in ("queued", "pending", "queued")]
+    make_prospect(score_status="scored", ai_score=5)
+    queued = []
+    monkeypatch.setattr(scoring_queue, "enqueue", queued.append)
+
+    assert scoring_queue.requeue_pending() == 3
+    assert queued == waiting
+
+
+def test_already_scored_prospect_is_not_scored_again(db, llm_provider, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    prospect = make_prospect(score_status="scored", ai_score=5)
+
+    result = asyncio.run(linkedin_tasks._score_prospect(prospect.prospect_id))
+    assert result["status"] == "scored" and result["ai_score"] == 5
+    assert llm_provider.requests == []
+
+
+def test_enqueue_failure_still_answers_success(client, db, make_user, make_campaign, monkeypatch):
+    make_user()
+    make_campaign()
+
+    def unreachable(prospect_id):
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(scoring_queue, "enqueue", unreachable)
+    body = {"user_id": "u1", "campaign_id": "c1", "linkedin_url": "https://www.linkedin.com/in/alice", "title": "CEO"}
+    first = client.post("/api/prospects/add", json=body, headers={"Idempotency-Key": "add-1"})
+    retry = client.post("/api/prospects/add", json=body, headers={"Idempotency-Key": "add-1"})
+
+    assert first.status_code == retry.status_code == 200
+    assert first.json()["score_status"] == "pending"
+    assert retry.json() == first.json() and retry.headers["Idempotent-Replayed"] == "true"
+    assert db.query(Prospect).one().score_status == "pending"
+
+
+def test_pending_scores_are_enqueued_by_the_beat_job(db, make_user, make_campaign, make_prospect, monkeypatch):
+    make_user()
+    make_campaign()
+    sent, failing = make_prospect(score_status="pending"), make_prospect(score_status="pending")
+    make_prospect(score_status="failed")
+    delayed = []
+
+    def delay(prospect_id):
+        if prospect_id == failing.prospect_id:
+            raise ConnectionError("broker down")
+        delayed.append(prospect_id)
+
+    monkeypatch.setattr(linkedin_tasks.score_prospect, "delay", delay)
+    assert linkedin_tasks.enqueue_pending_scores() == {"queued": 1}
+
+    db.expire_all()
+    assert delayed == [sent.prospect_id]
+    assert (sent.score_status, failing.score_status) == ("queued", "pending")
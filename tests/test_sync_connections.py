@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timezone
+
+from app.models import Campaign, Prospect, SyncState
+from app.tasks import linkedin_tasks
+
+
+class FakeLinkedIn:
+    """Stands in for the Playwright-backed LinkedInService"""
+    sent_invitations = set()
+    connections = []
+
+    def __init__(self, creds):
+        pass
+
+    async def login(self):
+        pass
+
+    async def fetch_sent_invitations(self):
+        return self.sent_invitations
+
+    async def fetch_connections(self, since=None, max_pages=None):
+        return self.connections
+
+    async def close(self):
+        pass
+
+
+def test_marks_accepted_and_updates_campaign(db, monkeypatch, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    accepted = make_prospect(linkedin_url="https://www.linkedin.com/in/alice/", connection_status="pending",
+                             stage="contacted")
+    still_pending = make_prospect(linkedin_url="https://www.linkedin.com/in/bob", connection_status="pending",
+                                  stage="contacted")
+    connected_at = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+    FakeLinkedIn.sent_invitations = {"linkedin.com/in/bob"}
+    FakeLinkedIn.connections = [{"profile_url": "linkedin.com/in/alice", "connected_at": connected_at}]
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", FakeLinkedIn)
+
+    assert asyncio.run(linkedin_tasks._sync_connections("u1")) == {"accepted": 1}
+
+    db.expire_all()
+    alice = db.query(Prospect).filter(Prospect.prospect_id == accepted.prospect_id).one()
+    bob = db.query(Prospect).filter(Prospect.prospect_id == still_pending.prospect_id).one()
+    assert (alice.connection_status, alice.stage) == ("accepted", "connected")
+    assert (bob.connection_status, bob.stage) == ("pending", "contacted")
+    assert db.query(Campaign).one().stats["accepted"] == 1
+    assert db.query(SyncState).filter(SyncState.sync_type == "connections").one().watermark == connected_at.replace(tzinfo=None)
+
+
+def test_no_pending_prospects_skips_login(monkeypatch, make_user):
+    make_user()
+
+    class Unreachable(FakeLinkedIn):
+        async def login(self):
+            raise AssertionError("should not log in")
+
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", Unreachable)
+    assert asyncio.run(linkedin_tasks._sync_connections("u1")) == {"accepted": 0}
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.models import Action, Campaign, Prospect, SyncState
+from app.tasks import linkedin_tasks
+
+CONTACTED_AT = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+
+
+class FakeLinkedIn:
+    messages = []
+    requested_since = []
+
+    def __init__(self, creds):
+        pass
+
+    async def login(self):
+        pass
+
+    async def fetch_inbox_messages(self, since=None):
+        self.requested_since.append(since)
+        newest = max((m["sent_at"] for m in self.messages), default=None)
+        return {"messages": self.messages, "newest_activity_at": newest}
+
+    async def close(self):
+        pass
+
+
+def _message(slug, sent_at, text="hi"):
+    return {"profile_url": f"linkedin.com/in/{slug}", "message": text, "sent_at": sent_at}
+
+
+def _contacted(db, prospect, at=CONTACTED_AT):
+    db.add(Action(action_id=f"a_{prospect.prospect_id}", user_id=prospect.user_id, prospect_id=prospect.prospect_id,
+                  campaign_id=prospect.campaign_id, action_type="connect", action_data={},
+                  scheduled_for=at, executed_at=at, status="completed"))
+    db.commit()
+
+
+def test_first_sync_starts_at_first_outbound_contact(db, monkeypatch, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    alice = make_prospect(linkedin_url="https://linkedin.com/in/alice", stage="contacted")
+    _contacted(db, alice)
+    FakeLinkedIn.messages, FakeLinkedIn.requested_since = [], []
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", FakeLinkedIn)
+
+    asyncio.run(linkedin_tasks._sync_inbox("u1"))
+
+    assert FakeLinkedIn.requested_since == [CONTACTED_AT]
+    db.expire_all()
+    assert db.query(SyncState).filter(SyncState.sync_type == "inbox").one().watermark == CONTACTED_AT.replace(tzinfo=None)
+
+
+def test_first_sync_without_outbound_contact_starts_now(monkeypatch, make_user):
+    make_user()
+    FakeLinkedIn.messages, FakeLinkedIn.requested_since = [], []
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", FakeLinkedIn)
+
+    asyncio.run(linkedin_tasks._sync_inbox("u1"))
+
+    assert datetime.now(timezone.utc) - FakeLinkedIn.requested_since[0] < timedelta(minutes=1)
+
+
+def test_only_messages_after_outbound_contact_count(db, monkeypatch, make_user, make_campaign, make_prospect):
+    make_user()
+    make_campaign()
+    alice = make_prospect(linkedin_url="https://linkedin.com/in/alice", stage="contacted")
+    old_friend = make_prospect(linkedin_url="https://linkedin.com/in/old-friend", stage="new")
+    _contacted(db, alice)
+    FakeLinkedIn.messages = [
+        _message("alice", CONTACTED_AT - timedelta(days=300), "from before the campaign"),
+        _message("alice", CONTACTED_AT + timedelta(hours=2), "thanks for connecting"),
+        _message("old-friend", CONTACTED_AT + timedelta(hours=3), "long time no see"),
+    ]
+    monkeypatch.setattr(linkedin_tasks, "LinkedInService", FakeLinkedIn)
+
+    assert asyncio.run(linkedin_tasks._sync_inbox("u1"))["replied"] == 1
+
+    db.expire_all()
+    alice = db.query(Prospect).filter(Prospect.prospect_id == alice.prospect_id).one()
+    old_friend = db.query(Prospect).filter(Prospect.prospect_id == old_friend.prospect_id).one()
+    assert alice.stage == "replied"
+    assert [m["message"] for m in alice.conversation_history] == ["thanks for connecting"]
+    assert old_friend.stage == "new" and not old_friend.conversation_history
+    assert db.query(Campaign).one().stats["replied"] == 1
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_service import LLMService
+from app.services.templates import compile_template, resolve_mode, template_values
+from app.tasks import linkedin_tasks
+
+ALICE = template_values({"full_name": "Alice Smith", "title": "CEO", "company": "Acme"})
+
+
+def test_placeholders_in_either_brace_style_are_rendered():
+    template = compile_template("Hi {first_name}, how is {{ company }}? Regards, {unknown}")
+    assert template.fields == {"first_name", "company"}
+    assert template.render(ALICE) == "Hi Alice, how is Acme? Regards, {unknown}"
+
+
+def test_compiled_templates_are_cached():
+    assert compile_template("Hi {first_name}") is compile_template("Hi {first_name}")
+
+
+def test_missing_value_renders_none():
+    assert compile_template("Hi {first_name} at {location}").render(ALICE) is None
+    assert compile_template("Hi {last_name}").render(template_values({"full_name": "Cher"})) is None
+
+
+def test_ai_slot_is_filled_with_generated_text():
+    template = compile_template("Hi {first_name}. {ai_note} Talk soon")
+    assert template.ai_slot == "ai_note"
+    assert template.render(ALICE) is None
+    assert template.render(ALICE, "Loved your talk.") == "Hi Alice. Loved your talk. Talk soon"
+
+
+@pytest.mark.parametrize("step, mode", [
+    (None, "llm"),
+    ({"action": "connect"}, "llm"),
+    ({"template": "  "}, "llm"),
+    ({"template": "Hi {first_name}"}, "template"),
+    ({"template": "Hi {first_name}, {ai}"}, "llm_personalize_template"),
+    ({"template": "Hi {first_name}", "mode": "llm"}, "llm"),
+    ({"template": "Hi", "mode": "bogus"}, "template"),
+])
+def test_resolve_mode(step, mode):
+    assert resolve_mode(step) == mode
+
+
+def _generate(llm_provider, step, full_name="Alice Smith", action_type="connect"):
+    campaign = SimpleNamespace(sequence=[step])
+    action = SimpleNamespace(action_type=action_type, action_data={})
+    prospect = SimpleNamespace(full_name=full_name, title="CEO", company="Acme", headline=None, location=None)
+    service = LLMService({"type": "anthropic", "model": "m", "api_key": "sk-test"}, "u1")
+    return asyncio.run(linkedin_tasks._generate_content(service, action, prospect, campaign))
+
+
+def test_template_step_skips_the_llm(llm_provider):
+    assert _generate(llm_provider, {"action": "connect", "template": "Hi {first_name}"}) == "Hi Alice"
+    assert llm_provider.requests == []
+
+
+def test_personalized_step_asks_only_for_the_slot(llm_provider):
+    llm_provider.text = "Congrats on the launch."
+    text = _generate(llm_provider, {"action": "connect", "template": "Hi {first_name}. {ai}"})
+    assert text == "Hi Alice. Congrats on the launch."
+    assert len(llm_provider.requests) == 1
+    assert llm_provider.requests[0][1]["max_tokens"] == 60
+
+
+def test_unrenderable_template_falls_back_to_full_generation(llm_provider):
+    llm_provider.text = "Generated note"
+    assert _generate(llm_provider, {"action": "connect", "template": "Hi {first_name}"}, full_name="") == "Generated note"
+    assert len(llm_provider.requests) == 1
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from app.services import tracing
+from app.services.llm_service import LLMService
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    """Record spans in memory (the tracer provider can only be installed once per process)"""
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    trace.set_tracer_provider(provider)
+    return memory
+
+
+@pytest.fixture
+def spans(exporter):
+    exporter.clear()
+    return lambda: {span.name: span for span in exporter.get_finished_spans()}
+
+
+def test_request_span_continues_incoming_trace(client, spans):
+    client.get("/api/campaigns/c-123", headers={"traceparent": f"00-{TRACE_ID}-00f067aa0ba902b7-01"})
+
+    server = spans()["GET /api/campaigns/{campaign_id}"]
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+    assert server.attributes["http.route"] == "/api/campaigns/{campaign_id}"
+    assert server.attributes["http.status_code"] == 404
+
+
+def test_llm_calls_are_child_spans(llm_provider, spans):
+    service = LLMService({"type": "anthropic", "model": "m", "api_key": "sk-test"}, "u1")
+    with tracing.span("parent"):
+        asyncio.run(service.generate_connection_note({"full_name": "Alice"}))
+
+    recorded = spans()
+    assert recorded["llm.generate"].parent.span_id == recorded["parent"].context.span_id
+    assert recorded["llm.call"].parent.span_id == recorded["llm.generate"].context.span_id
+    assert recorded["llm.call"].attributes["provider"] == "anthropic"
+    assert recorded["llm.generate"].attributes["feature"] == "note"
+
+
+def test_trace_travels_through_celery_headers(spans):
+    from celery.signals import before_task_publish, task_postrun, task_prerun
+
+    import app.tasks.linkedin_tasks  # noqa: F401 - installs the Celery signal hooks
+
+    headers = {}
+    with tracing.span("enqueue") as publisher:
+        before_task_publish.send(sender="app.tasks.linkedin_tasks.execute_action", headers=headers)
+
+    task = SimpleNamespace(name="app.tasks.linkedin_tasks.execute_action", request=SimpleNamespace(**headers))
+    task_prerun.send(sender=task.name, task_id="task-1", task=task, args=(), kwargs={})
+    task_postrun.send(sender=task.name, task_id="task-1", task=task, args=(), kwargs={}, retval=None, state="FAILURE")
+
+    consumer = spans()["celery.task app.tasks.linkedin_tasks.execute_action"]
+    assert consumer.parent.span_id == publisher.get_span_context().span_id
+    assert consumer.attributes["celery.state"] == "FAILURE"
+    assert not consumer.status.is_ok
+
+
+def test_file_exporter_writes_json_lines(exporter, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    file_exporter = tracing.JsonFileSpanExporter(str(path))
+    with tracing.span("work", user_id="u1", campaign_id=None):
+        pass
+
+    file_exporter.export(exporter.get_finished_spans()[-1:])
+    [line] = path.read_text().splitlines()
+    record = json.loads(line)
+    assert record["name"] == "work" and record["attributes"] == {"user_id": "u1"}
+
+
+def test_unknown_exporter():
+    with pytest.raises(ValueError):
+        tracing._exporter("nope")